@@ -1,6 +1,9 @@
+from typing import Dict
 from typing import List
 
 from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.forms.models import model_to_dict
 
 from gitmate.utils import GitmatePluginConfig
 
@@ -28,3 +31,34 @@ def get_all_plugins(
 def get_settings(plugin_name, repo):
     config = apps.get_app_config(f'gitmate_{plugin_name}')
     return config.get_settings(repo)
+
+
+def get_settings_snapshot(
+        repo, plugins: List[GitmatePluginConfig]
+) -> Dict[str, dict]:
+    """
+    Returns the settings of the given plugins for the specified repository,
+    keyed by plugin name. All of them are loaded in a single query, only the
+    missing ones are created.
+    """
+    if not plugins:
+        return {}
+
+    accessors = {
+        config.plugin_name:
+            config.settings_model._meta.get_field('repo')
+            .remote_field.get_accessor_name()
+        for config in plugins
+    }
+    loaded = repo._meta.model.objects.select_related(
+        *accessors.values()).get(pk=repo.pk)
+
+    snapshot = {}
+    for config in plugins:
+        try:
+            settings = getattr(loaded, accessors[config.plugin_name])
+        except ObjectDoesNotExist:
+            settings = config._default_settings(repo)
+        snapshot[config.plugin_name] = model_to_dict(
+            settings, exclude=['repo', 'id'])
+    return snapshot
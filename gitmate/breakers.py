@@ -0,0 +1,174 @@
+"""
+This module contains the circuit breakers guarding the requests to the
+hosters.
+
+With ``CIRCUIT_BREAKERS`` turned on, every process keeps track of the
+requests it sent to each endpoint class of a hoster, e.g. the pull requests
+or the statuses of GitHub, within the last ``CIRCUIT_BREAKER_WINDOW``
+seconds. Once at least ``CIRCUIT_BREAKER_MIN_REQUESTS`` were sent and the
+share of failed requests, i.e. server errors and connection failures, or of
+requests slower than ``CIRCUIT_BREAKER_SLOW_REQUEST`` seconds reaches
+``CIRCUIT_BREAKER_ERROR_RATE``, the breaker of the endpoint class trips.
+
+A tripped breaker is open for all processes: requests to the endpoint class
+fail right away with ``CircuitOpenError``, which IGitt doesn't retry, and
+new tasks for the hoster are deferred, see ``gitmate_hooks.deferral``. The
+breaker closes again after ``CIRCUIT_BREAKER_COOLDOWN`` seconds, doubled for
+every further trip within an hour.
+"""
+from collections import defaultdict
+from collections import deque
+from threading import Lock
+from time import monotonic
+from urllib.parse import urlsplit
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from gitmate.metrics import increment
+from gitmate.utils import ExpiringCache
+
+
+# the longest a breaker stays open
+MAX_COOLDOWN = 30 * 60
+
+# seconds after which further trips don't prolong the cooldown anymore
+TRIP_MEMORY = 60 * 60
+
+# seconds for which processes rely on the breaker states they read
+STATE_TIMEOUT = 5
+
+# the requests of this process within the window by hoster and endpoint
+_requests = defaultdict(deque)
+_requests_lock = Lock()
+
+_states = ExpiringCache(max_entries=1000, timeout=STATE_TIMEOUT)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to an endpoint whose breaker is open.
+    """
+
+
+def get_hoster(name: str) -> str:
+    """
+    Returns the hoster of the given provider name or API host.
+    """
+    for hoster in ('github', 'gitlab'):
+        if hoster in name:
+            return hoster
+    return name
+
+
+def get_endpoint(url: str) -> tuple:
+    """
+    Returns the hoster and the endpoint class of the given API URL, e.g.
+    ``('github', 'pulls')`` for the URL of a pull request.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if segments[:2] == ['api', 'v4']:
+        segments = segments[2:]
+    if segments[:1] == ['repos'] and len(segments) > 3:
+        endpoint = segments[3]
+    elif segments[:1] == ['projects'] and len(segments) > 2:
+        endpoint = segments[2]
+    else:
+        endpoint = segments[0] if segments else ''
+    return get_hoster(parts.netloc), endpoint
+
+
+def _get_cache_key(hoster: str, endpoint: str = None) -> str:
+    if endpoint is None:
+        return f'circuit:{hoster}'
+    return f'circuit:{hoster}:{endpoint}'
+
+
+def _is_open(key: str) -> bool:
+    state = _states.get(key)
+    if state is None:
+        state = cache.get(key) is not None
+        _states.set(key, state)
+    return state
+
+
+def is_open(hoster: str) -> bool:
+    """
+    Checks whether a breaker of the given hoster is open.
+    """
+    return settings.CIRCUIT_BREAKERS and _is_open(_get_cache_key(hoster))
+
+
+def check(url: str):
+    """
+    Raises ``CircuitOpenError`` if the breaker of the endpoint class the URL
+    belongs to is open.
+    """
+    if not settings.CIRCUIT_BREAKERS:
+        return
+    hoster, endpoint = get_endpoint(url)
+    if _is_open(_get_cache_key(hoster, endpoint)):
+        raise CircuitOpenError(f'The {endpoint} endpoints of {hoster} are '
+                               f'failing, the request was not sent.')
+
+
+def record(url: str, duration: float, failed: bool):
+    """
+    Records a request sent to the hoster and trips the breaker of its
+    endpoint class if too many requests failed or were slow.
+
+    :param url:      The URL of the request.
+    :param duration: The seconds it took to get a response or fail.
+    :param failed:   Whether the request failed because of the hoster.
+    """
+    if not settings.CIRCUIT_BREAKERS:
+        return
+
+    key = get_endpoint(url)
+    now = monotonic()
+    slow = duration > settings.CIRCUIT_BREAKER_SLOW_REQUEST
+    with _requests_lock:
+        requests = _requests[key]
+        requests.append((now, failed or slow))
+        while requests[0][0] < now - settings.CIRCUIT_BREAKER_WINDOW:
+            requests.popleft()
+        if len(requests) < settings.CIRCUIT_BREAKER_MIN_REQUESTS:
+            return
+        failures = sum(1 for _, failure in requests if failure)
+        if failures / len(requests) < settings.CIRCUIT_BREAKER_ERROR_RATE:
+            return
+        requests.clear()
+    _trip(*key)
+
+
+def _trip(hoster: str, endpoint: str):
+    trips_key = f'circuit-trips:{hoster}'
+    # incrementing would keep the default timeout of the database cache
+    trips = cache.get(trips_key, 0) + 1
+    cache.set(trips_key, trips, timeout=TRIP_MEMORY)
+
+    cooldown = min(settings.CIRCUIT_BREAKER_COOLDOWN * 2 ** (trips - 1),
+                   MAX_COOLDOWN)
+    endpoints = cache.get(_get_cache_key(hoster), set()) | {endpoint}
+    cache.set_many({_get_cache_key(hoster): endpoints,
+                    _get_cache_key(hoster, endpoint): True},
+                   timeout=cooldown)
+    _states.delete(_get_cache_key(hoster))
+    _states.delete(_get_cache_key(hoster, endpoint))
+    increment(f'circuits.{hoster}.tripped')
+    logging.warning(f'The {endpoint} endpoints of {hoster} are failing, '
+                    f'holding back requests and tasks for {cooldown}s.')
+
+
+def reset(hoster: str):
+    """
+    Closes the breakers of the given hoster, e.g. once it's known to have
+    recovered.
+    """
+    endpoints = cache.get(_get_cache_key(hoster), set())
+    cache.delete_many([_get_cache_key(hoster)] +
+                      [_get_cache_key(hoster, endpoint)
+                       for endpoint in endpoints])
+    _states.clear()
@@ -4,6 +4,9 @@ import os
 
 from celery import Celery
 
+from gitmate.serialization import register_serializer
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gitmate.settings')
+register_serializer()
 app = Celery('gitmate')
 app.config_from_object('django.conf:settings')
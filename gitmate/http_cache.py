@@ -0,0 +1,131 @@
+"""
+This module contains a request scoped cache for the HTTP requests IGitt makes.
+
+Within a scope, e.g. a task, identical ``GET`` requests are only sent once and
+answered from the first response afterwards. Identical means the same URL and
+headers, so the conditional requests IGitt makes with the ``ETag`` of its
+own cache (see ``IGitt.Utils.Cache``) are deduplicated as well. Across scopes
+requests are revalidated with those conditional requests, which GitHub doesn't
+count against the rate limit when answered with ``304 Not Modified``.
+
+Any other request empties the cache of the scope, as it may have changed any
+of the cached resources. Entries expire after ``HTTP_REQUEST_CACHE_TTL``
+seconds, so that long running tasks eventually see changes made by others.
+The requests a scope actually sent are counted, see ``get_request_count``,
+and guarded by the circuit breakers, see ``gitmate.breakers``.
+"""
+from contextlib import contextmanager
+from copy import copy
+from threading import local
+from time import monotonic
+
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from gitmate import breakers
+from gitmate.metrics import increment
+from gitmate.rate_limits import observe
+
+
+_scope = local()
+
+
+@contextmanager
+def request_scope():
+    """
+    Deduplicates identical ``GET`` requests made in the current thread until
+    the block is left. Nested scopes share the cache of the outermost one.
+    """
+    if getattr(_scope, 'responses', None) is not None:
+        yield
+        return
+
+    _scope.responses = {}
+    _scope.sent = 0
+    try:
+        yield
+    finally:
+        _scope.responses = None
+
+
+def invalidate_request_scope():
+    """
+    Empties the cache of the current scope, e.g. to make sure the next
+    requests see the changes made by other processes.
+    """
+    responses = getattr(_scope, 'responses', None)
+    if responses is not None:
+        responses.clear()
+
+
+def get_request_count() -> int:
+    """
+    Returns the number of requests sent to the hosters in the current scope,
+    not counting the ones answered from its cache.
+    """
+    return getattr(_scope, 'sent', 0)
+
+
+def _get_key(request) -> tuple:
+    return request.url, tuple(sorted(
+        (name.lower(), value) for name, value in request.headers.items()))
+
+
+def _send_guarded(send, adapter, request, **kwargs):
+    # sends the request unless its endpoint is failing, see ``breakers``
+    breakers.check(request.url)
+    started = monotonic()
+    try:
+        response = send(adapter, request, **kwargs)
+    except RequestException:
+        breakers.record(request.url, monotonic() - started, failed=True)
+        raise
+    breakers.record(request.url, monotonic() - started,
+                    failed=response.status_code >= 500)
+    _scope.sent += 1
+    observe(response)
+    return response
+
+
+def _cached_send(send):
+    def _send(adapter, request, **kwargs):
+        responses = getattr(_scope, 'responses', None)
+        if responses is None:
+            return send(adapter, request, **kwargs)
+
+        if not settings.HTTP_REQUEST_CACHE_TTL:
+            return _send_guarded(send, adapter, request, **kwargs)
+
+        if request.method != 'GET':
+            responses.clear()
+            return _send_guarded(send, adapter, request, **kwargs)
+
+        key = _get_key(request)
+        fetched_at, response = responses.get(key, (None, None))
+        if (fetched_at is not None and
+                monotonic() - fetched_at < settings.HTTP_REQUEST_CACHE_TTL):
+            increment('http.cached')
+            return copy(response)
+
+        fetched_at = monotonic()
+        response = _send_guarded(send, adapter, request, **kwargs)
+        if response.status_code == 304:
+            increment('http.revalidated')
+        if response.status_code in (200, 304):
+            # read the body so that the response can be handed out again
+            response.content  # Ignore PyUnusedCodeBear
+            responses[key] = fetched_at, response
+        return response
+
+    _send.cached = True
+    return _send
+
+
+def install_request_cache():
+    """
+    Hooks the request scoped cache into ``requests``. Requests made outside of
+    a scope are sent as usual.
+    """
+    if not getattr(HTTPAdapter.send, 'cached', False):
+        HTTPAdapter.send = _cached_send(HTTPAdapter.send)
@@ -0,0 +1,147 @@
+"""
+This module contains label transactions, which collect the label changes
+responders make to issues and merge requests and write them once.
+
+Responders declare changes with ``add_labels``, ``remove_labels`` and
+``retain_labels`` instead of assigning ``.labels`` themselves. When the
+transaction ends, the changes of each object are applied to its current labels
+under the ``label mr`` or ``label issue`` lock, with a single refresh and a
+single write, which is skipped if nothing changed. Changes that depend on the
+current labels should use ``retain_labels``, which is evaluated under the
+lock, rather than computing them from ``get_labels`` beforehand.
+
+Every responder task runs in its own transaction, so responders running in
+separate tasks still write separately. Only with ``RESPONDER_FUSED_DISPATCH``
+do the short queue responders of an event share a transaction, and with it a
+single write per object.
+
+Changes are applied in declaration order, i.e. if the same label is added and
+removed, the later declaration wins. The result is the same as applying the
+changes one after another, and ``get_labels`` returns the labels as they would
+be written right now. The changes declared by a responder which raises are
+discarded, like before a failing responder didn't get to write them.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import local
+from typing import Callable
+
+from IGitt.Interfaces.MergeRequest import MergeRequest
+
+from gitmate.metrics import increment
+from gitmate.utils import get_object_key
+from gitmate.utils import lock_igitt_object
+
+
+_transaction = local()
+
+
+def _get_changes() -> OrderedDict:
+    return getattr(_transaction, 'changes', None)
+
+
+@contextmanager
+def label_transaction():
+    """
+    Collects the label changes declared in the current thread and writes them
+    when the block is left. Nested transactions are part of the outermost one,
+    but their changes are discarded if the block raises.
+    """
+    changes = _get_changes()
+    if changes is not None:
+        saved = OrderedDict((key, (igitt_object, list(declared)))
+                            for key, (igitt_object, declared)
+                            in changes.items())
+        try:
+            yield
+        except BaseException:
+            changes.clear()
+            changes.update(saved)
+            raise
+        return
+
+    _transaction.changes = OrderedDict()
+    try:
+        yield
+        changes = _transaction.changes
+    finally:
+        _transaction.changes = None
+    _commit(changes)
+
+
+def _commit(changes: OrderedDict):
+    for igitt_object, declared in changes.values():
+        task = ('label mr' if isinstance(igitt_object, MergeRequest)
+                else 'label issue')
+        with lock_igitt_object(task, igitt_object):
+            current = set(igitt_object.labels)
+            new = _apply(current, declared)
+            if new == current:
+                increment('labels.unchanged')
+                continue
+
+            igitt_object.labels = new
+            increment('labels.written')
+
+
+def _apply(current: set, declared: list) -> set:
+    labels = set(current)
+    for change in declared:
+        if callable(change):
+            labels = {label for label in labels if change(label)}
+        elif change[1]:
+            labels.add(change[0])
+        else:
+            labels.discard(change[0])
+    return labels
+
+
+def _declare(igitt_object, *declared):
+    changes = _get_changes()
+    if changes is None:
+        # outside of a responder, e.g. in a management command
+        with label_transaction():
+            _declare(igitt_object, *declared)
+        return
+
+    key = get_object_key(igitt_object)
+    if key not in changes:
+        changes[key] = igitt_object, []
+    changes[key][1].extend(declared)
+
+
+def add_labels(igitt_object, *labels: str):
+    """
+    Adds the given labels to the issue or merge request at the end of the
+    current label transaction.
+    """
+    _declare(igitt_object, *((label, True) for label in labels))
+
+
+def remove_labels(igitt_object, *labels: str):
+    """
+    Removes the given labels from the issue or merge request at the end of the
+    current label transaction.
+    """
+    _declare(igitt_object, *((label, False) for label in labels))
+
+
+def retain_labels(igitt_object, keep: Callable[[str], bool]):
+    """
+    Removes the labels of the issue or merge request for which ``keep``
+    returns False at the end of the current label transaction. ``keep`` is
+    called with the labels as they are then, after changes declared before.
+    """
+    _declare(igitt_object, keep)
+
+
+def get_labels(igitt_object) -> set:
+    """
+    Returns the labels of the issue or merge request with the changes declared
+    in the current label transaction applied.
+    """
+    current = set(igitt_object.labels)
+    change = (_get_changes() or {}).get(get_object_key(igitt_object))
+    if change is None:
+        return current
+    return _apply(current, change[1])
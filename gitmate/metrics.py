@@ -0,0 +1,71 @@
+"""
+This module contains simple counters and gauges which are shared between all
+GitMate processes through the django cache. They keep track of the work done
+or saved by the webhook and responder machinery and can be inspected with the
+``show_metrics`` management command.
+"""
+from math import ceil
+
+from django.core.cache import cache
+
+
+METRICS_PREFIX = 'gitmate-metrics:'
+_INDEX_KEY = METRICS_PREFIX + '__index__'
+
+
+def _register(name: str):
+    # the index of known metrics is only updated when a metric is created, a
+    # lost update here only hides a metric until it is created again.
+    names = cache.get(_INDEX_KEY, set())
+    if name not in names:
+        cache.set(_INDEX_KEY, names | {name}, timeout=None)
+
+
+def increment(name: str, delta: int = 1):
+    """
+    Increments the counter with the given name.
+
+    :param name:  The dotted name of the counter, e.g. ``webhooks.duplicate``.
+    :param delta: The amount to increment the counter by.
+    """
+    key = METRICS_PREFIX + name
+    if cache.add(key, delta, timeout=None):
+        _register(name)
+        return
+
+    try:
+        cache.incr(key, delta)
+    except ValueError:  # pragma: no cover, evicted in the meantime
+        cache.set(key, delta, timeout=None)
+        _register(name)
+
+
+def set_gauge(name: str, value):
+    """
+    Sets the gauge with the given name to the given value.
+    """
+    cache.set(METRICS_PREFIX + name, value, timeout=None)
+    _register(name)
+
+
+def get_metrics(prefix: str = '') -> dict:
+    """
+    Returns the current values of all metrics whose names start with the given
+    prefix.
+    """
+    names = sorted(name for name in cache.get(_INDEX_KEY, set())
+                   if name.startswith(prefix))
+    values = cache.get_many([METRICS_PREFIX + name for name in names])
+    return {name: values.get(METRICS_PREFIX + name, 0) for name in names}
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Returns the nearest-rank percentile of the given values, or ``None`` if
+    there are none.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
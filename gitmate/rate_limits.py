@@ -0,0 +1,117 @@
+"""
+This module contains the tracking of the rate limit budgets GitMate spends
+requests from.
+
+Every installation, and every user whose token is used for repositories
+without an installation, has a rate limit budget of its own at the hoster.
+With ``RATE_LIMIT_BUDGETS`` turned on, responder tasks carry the budget of
+their repository and the ``X-RateLimit-*`` (GitHub) or ``RateLimit-*``
+(GitLab) headers of the responses they get are stored for it in the django
+cache, where all processes share them.
+
+Before a task is published, the dispatcher consults the budget. If no more
+than ``RATE_LIMIT_RESERVE`` requests are left, the task is delayed until the
+budget resets, rather than running out of requests halfway through.
+"""
+from contextlib import contextmanager
+from threading import local
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from gitmate.metrics import increment
+
+
+# seconds to wait beyond the announced reset, covering clock skew
+RESET_MARGIN = 5
+
+_budget = local()
+
+
+def get_budget(repo) -> str:
+    """
+    Returns the budget the requests for the given repository are spent from,
+    or ``None`` if budgets aren't tracked.
+    """
+    if not settings.RATE_LIMIT_BUDGETS:
+        return None
+    if repo.installation_id is not None:
+        return get_installation_budget(repo.installation_id)
+    return f'user:{repo.user_id}:{repo.provider}'
+
+
+def get_installation_budget(installation_id: int) -> str:
+    """
+    Returns the budget of the installation with the given primary key.
+    """
+    return f'installation:{installation_id}'
+
+
+def _get_cache_key(budget: str) -> str:
+    return 'rate-limit:' + budget
+
+
+@contextmanager
+def budget_scope(budget: str):
+    """
+    Accounts the responses received in the current thread to the given budget
+    while the block runs. Without a budget, the outer one stays in effect.
+    """
+    outer = getattr(_budget, 'key', None)
+    _budget.key = budget or outer
+    try:
+        yield
+    finally:
+        _budget.key = outer
+
+
+def observe(response):
+    """
+    Updates the budget of the current thread from the rate limit headers of
+    the given response, if it has any.
+    """
+    budget = getattr(_budget, 'key', None)
+    if budget is None:
+        return
+
+    headers = response.headers
+    if headers.get('X-RateLimit-Resource', 'core') != 'core':
+        # e.g. the separate budget of the search API
+        return
+    remaining = headers.get('X-RateLimit-Remaining',
+                            headers.get('RateLimit-Remaining'))
+    reset = headers.get('X-RateLimit-Reset', headers.get('RateLimit-Reset'))
+    if remaining is None or reset is None:
+        return
+
+    limit = headers.get('X-RateLimit-Limit', headers.get('RateLimit-Limit'))
+    cache.set(_get_cache_key(budget),
+              {'remaining': int(remaining),
+               'limit': int(limit) if limit is not None else None,
+               'reset': int(reset)},
+              timeout=max(int(reset) - time(), 0) + 60)
+
+
+def get_status(budget: str) -> dict:
+    """
+    Returns the remaining requests, the limit and the reset time as unix
+    timestamp last seen for the budget, or ``None`` if nothing was seen.
+    """
+    return cache.get(_get_cache_key(budget))
+
+
+def get_delay(budget: str) -> float:
+    """
+    Returns the seconds until the budget resets if it's exhausted, ``0``
+    otherwise.
+    """
+    status = get_status(budget)
+    if status is None or status['remaining'] > settings.RATE_LIMIT_RESERVE:
+        return 0
+
+    delay = status['reset'] - time()
+    if delay <= 0:
+        return 0
+    increment('rate_limits.delayed')
+    return delay + RESET_MARGIN
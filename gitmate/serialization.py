@@ -0,0 +1,248 @@
+"""
+This module contains the ``gitmate`` task serializer, which pickles task
+arguments like the ``pickle`` serializer but encodes IGitt objects as compact
+references instead of pickling them along with their token and data.
+
+A reference consists of the hoster, the class, the repository and the
+arguments identifying the object, e.g. the number of a merge request or the
+sha of a commit. With ``TASK_IGITT_SNAPSHOTS`` turned on, the data of objects
+seeded from a webhook payload is attached to the reference as well, so the
+worker doesn't have to fetch it again.
+
+References serialized within a ``reference_scope`` carry the primary key of
+the repository the token belongs to and the event they were dispatched for.
+Workers rehydrate references without contacting the hoster, resolving the
+token through the primary key of the repository, so renaming it in the
+meantime doesn't matter. Rehydrated objects are memoized per process for
+``TASK_IGITT_MEMO_TIMEOUT`` seconds, so that the tasks of an event share a
+single instance of each object, while the tasks of the next event don't see
+the data it fetched.
+
+Objects whose repository isn't active anymore are rehydrated as
+``UnresolvedObject``, the responder tasks receiving one are skipped.
+"""
+from contextlib import contextmanager
+from functools import partial
+from io import BytesIO
+from threading import local
+import json
+import pickle
+import zlib
+
+from django.conf import settings
+from django.http import Http404
+from IGitt.GitHub.GitHubComment import GitHubComment
+from IGitt.GitHub.GitHubCommit import GitHubCommit
+from IGitt.GitHub.GitHubIssue import GitHubIssue
+from IGitt.GitHub.GitHubMergeRequest import GitHubMergeRequest
+from IGitt.GitHub.GitHubRepository import GitHubRepository
+from IGitt.GitLab.GitLabComment import GitLabComment
+from IGitt.GitLab.GitLabCommit import GitLabCommit
+from IGitt.GitLab.GitLabIssue import GitLabIssue
+from IGitt.GitLab.GitLabMergeRequest import GitLabMergeRequest
+from IGitt.GitLab.GitLabRepository import GitLabRepository
+from kombu.serialization import pickle_protocol
+from kombu.serialization import register
+
+from gitmate.utils import ExpiringCache
+from gitmate.utils import get_snapshot_time
+from gitmate.utils import seed_snapshot
+
+
+SERIALIZER_NAME = 'gitmate'
+CONTENT_TYPE = 'application/x-gitmate'
+
+_REFERENCE_TAG = 'igitt'
+
+
+def _repository_args(obj) -> tuple:
+    # repositories created from their identifier don't know their name
+    if obj._repository is not None:
+        return (obj._repository, )
+    return (int(obj._url.rsplit('/', 1)[-1]), )
+
+
+# maps the supported IGitt classes to a function returning the arguments to
+# create an instance with, besides the token. The repository comes first.
+_REFERENCE_ARGS = {
+    GitHubRepository: _repository_args,
+    GitHubMergeRequest: lambda obj: (obj._repository, obj._number),
+    GitHubIssue: lambda obj: (obj._repository, obj._number),
+    GitHubCommit: lambda obj: (obj._repository, obj._sha),
+    GitHubComment: lambda obj: (obj._repository, obj._type, obj._id),
+    GitLabRepository: _repository_args,
+    GitLabMergeRequest: lambda obj: (obj._repository, obj._iid),
+    GitLabIssue: lambda obj: (obj._repository, obj._iid),
+    GitLabCommit: lambda obj: (obj._repository, obj._sha),
+    GitLabComment: lambda obj: (obj._repository, obj._iid, obj._type,
+                                obj._id),
+}
+_CLASSES = {cls.__name__: cls for cls in _REFERENCE_ARGS}
+
+# attribute holding the repository and event an IGitt object was rehydrated
+# for, which are kept when it's serialized again
+_SCOPE_ATTRIBUTE = '_gitmate_reference_scope'
+
+_memo = ExpiringCache(max_entries=10 ** 4)
+_scope = local()
+
+
+class UnresolvedObject:
+    """
+    Stands in for an IGitt object whose repository couldn't be resolved, e.g.
+    because it was deactivated after the task was published.
+    """
+
+    def __init__(self, class_name: str, args: tuple):
+        self.class_name = class_name
+        self.args = args
+
+    def __repr__(self):
+        return f'<unresolved {self.class_name}{self.args!r}>'
+
+
+@contextmanager
+def reference_scope(repository: int, event: str):
+    """
+    Attaches the given repository and event to the references serialized in
+    the current thread while the block runs.
+
+    :param repository: The primary key of the repository whose token the
+                       objects are used with.
+    :param event:      An identifier of the event the tasks are dispatched
+                       for, unique across events.
+    """
+    outer = getattr(_scope, 'value', None)
+    _scope.value = (repository, event)
+    try:
+        yield
+    finally:
+        _scope.value = outer
+
+
+def _get_scope(obj) -> tuple:
+    scope = getattr(_scope, 'value', None)
+    if scope is None:
+        # look at the instance only, mocks would make up the attribute
+        scope = vars(obj).get(_SCOPE_ATTRIBUTE, (None, None))
+    return scope
+
+
+def _get_snapshot(obj):
+    taken_at = get_snapshot_time(obj)
+    data = getattr(obj, '_data', None)
+    if taken_at is None or data is None:
+        return None
+    try:
+        return taken_at, zlib.compress(json.dumps(data._data).encode('utf-8'))
+    except (TypeError, ValueError):  # pragma: no cover, not from a payload
+        return None
+
+
+def get_reference(obj):
+    """
+    Returns the reference encoding the given IGitt object, or ``None`` if
+    the object isn't supported and is pickled as usual.
+    """
+    get_args = _REFERENCE_ARGS.get(type(obj))
+    if get_args is None:
+        return None
+
+    args = get_args(obj)
+    if None in args:
+        # e.g. GitLab commits created from a branch name
+        return None
+
+    snapshot = _get_snapshot(obj) if settings.TASK_IGITT_SNAPSHOTS else None
+    return (_REFERENCE_TAG, type(obj).__name__, obj.hoster, args, snapshot,
+            *_get_scope(obj))
+
+
+def _get_token(hoster: str, repository, pk: int = None):
+    # Don't move to module code, causes circular dependency!
+    from gitmate_hooks.resolution import resolutions
+
+    if pk is not None:
+        _, token = resolutions.get_repository(hoster, pk=pk)
+    elif isinstance(repository, int):
+        _, token = resolutions.get_repository(hoster, identifier=repository)
+    else:
+        _, token = resolutions.get_repository(hoster, full_name=repository)
+    return token
+
+
+def resolve_reference(reference: tuple):
+    """
+    Returns the IGitt object for the given reference, sharing the instance
+    with earlier tasks for the same object and event.
+
+    :raises Http404: If the repository of the object isn't active anymore.
+    """
+    _, class_name, hoster, args, snapshot, repository, event = reference
+    key = (class_name, hoster, args, event)
+    obj = _memo.get(key) if event is not None else None
+    if obj is None:
+        obj = _CLASSES[class_name](_get_token(hoster, args[0], repository),
+                                   *args)
+        setattr(obj, _SCOPE_ATTRIBUTE, (repository, event))
+        if event is not None:
+            _memo.set(key, obj, timeout=settings.TASK_IGITT_MEMO_TIMEOUT)
+
+    if snapshot is not None:
+        taken_at, data = snapshot
+        if taken_at > (get_snapshot_time(obj) or 0):
+            obj.data = json.loads(zlib.decompress(data).decode('utf-8'))
+            seed_snapshot(obj, taken_at)
+    return obj
+
+
+class _Pickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return get_reference(obj)
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, strict: bool):
+        super().__init__(file)
+        self.strict = strict
+
+    def persistent_load(self, pid):
+        if pid[0] != _REFERENCE_TAG:  # pragma: no cover
+            raise pickle.UnpicklingError(f'Unknown reference {pid[0]}.')
+        try:
+            return resolve_reference(pid)
+        except Http404:
+            if self.strict:
+                raise
+            return UnresolvedObject(pid[1], pid[3])
+
+
+def dumps(body) -> bytes:
+    """
+    Serializes a message body.
+    """
+    buffer = BytesIO()
+    _Pickler(buffer, protocol=pickle_protocol).dump(body)
+    return buffer.getvalue()
+
+
+def loads(data: bytes, strict: bool = True):
+    """
+    Deserializes a message body.
+
+    :param strict:   Whether to fail for objects of repositories which aren't
+                     active anymore instead of rehydrating them as
+                     ``UnresolvedObject``.
+    :raises Http404: If strict and such an object is part of the body.
+    """
+    return _Unpickler(BytesIO(data), strict).load()
+
+
+def register_serializer():
+    """
+    Registers the serializer with kombu.
+    """
+    # a lost repository mustn't make the whole message undecodable
+    register(SERIALIZER_NAME, dumps, partial(loads, strict=False),
+             content_type=CONTENT_TYPE,
+             content_encoding='binary')
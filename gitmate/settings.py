@@ -16,6 +16,7 @@ import logging
 import raven
 
 from IGitt.GitHub import GitHubJsonWebToken
+from kombu import Queue
 
 from gitmate import RANDOM_PRIVATE_KEY
 from gitmate.utils import get_plugins
@@ -353,8 +354,24 @@ STATICFILES_DIRS = ()
 
 
 # CELERY CONFIG
-CELERY_TASK_SERIALIZER = 'pickle'
-CELERY_ACCEPT_CONTENT = ['json', 'pickle', 'yaml']
+# The gitmate serializer pickles task arguments with IGitt objects encoded as
+# references, see ``gitmate.serialization``. Pickled messages are still
+# accepted, e.g. the ones queued before an upgrade.
+CELERY_TASK_SERIALIZER = os.environ.get('CELERY_TASK_SERIALIZER', 'gitmate')
+CELERY_ACCEPT_CONTENT = ['json', 'pickle', 'yaml', 'gitmate']
+
+# Attach the data of IGitt objects seeded from webhook payloads to their
+# references, trading message size for API requests on the workers.
+TASK_IGITT_SNAPSHOTS = literal_eval(
+    os.environ.get('TASK_IGITT_SNAPSHOTS', 'False'))
+
+# Seconds for which workers share rehydrated IGitt objects between the tasks
+# of an event.
+TASK_IGITT_MEMO_TIMEOUT = int(os.environ.get('TASK_IGITT_MEMO_TIMEOUT', 60))
+
+# Seconds for which identical GET requests within a task are answered from the
+# first response, see ``gitmate.http_cache``. 0 disables the deduplication.
+HTTP_REQUEST_CACHE_TTL = int(os.environ.get('HTTP_REQUEST_CACHE_TTL', 30))
 
 # RABBITMQ server base URL
 BROKER_URL = os.environ.get('CELERY_BROKER_URL',
@@ -365,6 +382,22 @@ CELERY_BROKER_POOL_LIMIT = None
 # Otherwise it throws NotImplementedError
 CELERY_RESULT_BACKEND = 'rpc'
 
+# Don't send the return values of responders back through the result backend,
+# as nobody waits for them. Their outcomes are recorded in the completion
+# ledger instead, see ``gitmate_hooks.outcomes``.
+RESPONDER_IGNORE_RESULTS = literal_eval(
+    os.environ.get('RESPONDER_IGNORE_RESULTS', 'False'))
+
+# Number of outcomes and seconds after which a worker stores the outcomes it
+# recorded.
+RESPONDER_OUTCOME_BATCH = int(os.environ.get('RESPONDER_OUTCOME_BATCH', 100))
+RESPONDER_OUTCOME_INTERVAL = int(
+    os.environ.get('RESPONDER_OUTCOME_INTERVAL', 10))
+
+# Days to keep responder outcomes for.
+RESPONDER_OUTCOME_RETENTION = int(
+    os.environ.get('RESPONDER_OUTCOME_RETENTION', 30))
+
 # Setting the task timeout hard limit to one hour
 CELERYD_TASK_TIME_LIMIT = 3600
 
@@ -376,6 +409,173 @@ CELERY_TASK_ACKS_LATE = True
 # Set default task queue to short
 CELERY_TASK_DEFAULT_QUEUE = TaskQueue.SHORT.value
 
+# Declare the task queues as priority queues, so that RabbitMQ delivers the
+# messages of interactive responders first, see ``gitmate_hooks.shedding``.
+# RabbitMQ can't change the arguments of an existing queue: queues declared
+# before have to be deleted once, e.g. with ``rabbitmqctl delete_queue``, so
+# that the workers redeclare them.
+CELERY_TASK_QUEUE_MAX_PRIORITY = 10
+CELERY_TASK_QUEUES = [
+    Queue(queue.value, routing_key=queue.value,
+          queue_arguments={'x-max-priority': CELERY_TASK_QUEUE_MAX_PRIORITY})
+    for queue in TaskQueue
+]
+
+# WEBHOOK CONFIG
+# Accept webhook deliveries right after verifying their signature and leave
+# the repository resolution, IGitt parsing and responder invocation to the
+# ``gitmate_hooks.tasks.ingest_webhook`` task.
+WEBHOOK_ASYNC_INGEST = literal_eval(
+    os.environ.get('WEBHOOK_ASYNC_INGEST', 'False'))
+
+# Deliveries received again within this many seconds are dropped. They are
+# identified by the ``X-GitHub-Delivery`` header or the digest of the GitLab
+# payload. Set it to 0 to turn the deduplication off.
+WEBHOOK_DEDUPE_TTL = int(os.environ.get('WEBHOOK_DEDUPE_TTL', 60 * 60))
+# Maximum number of deliveries remembered by each process
+WEBHOOK_DEDUPE_MAX_ENTRIES = int(
+    os.environ.get('WEBHOOK_DEDUPE_MAX_ENTRIES', 10 ** 5))
+
+# Number of seconds and maximum number of entries each process caches the
+# repository and token resolution of webhook deliveries for
+WEBHOOK_RESOLUTION_CACHE_TTL = int(
+    os.environ.get('WEBHOOK_RESOLUTION_CACHE_TTL', 5 * 60))
+WEBHOOK_RESOLUTION_CACHE_MAX_ENTRIES = int(
+    os.environ.get('WEBHOOK_RESOLUTION_CACHE_MAX_ENTRIES', 10 ** 4))
+
+# Append every accepted delivery to the webhook event log, which can be
+# replayed with the ``replay_webhooks`` management command. Deliveries older
+# than the retention period in days are pruned daily. Turned off by default,
+# as it adds a database write to every received webhook.
+WEBHOOK_EVENT_LOG = literal_eval(os.environ.get('WEBHOOK_EVENT_LOG', 'False'))
+WEBHOOK_EVENT_LOG_RETENTION = int(
+    os.environ.get('WEBHOOK_EVENT_LOG_RETENTION', 14))
+
+# Debounce windows in seconds by event, e.g.
+# "{'MergeRequestActions.SYNCHRONIZED': 10}". Responders for these events are
+# delayed by the window and skipped if a later event of the same type arrives
+# for the same object in the meantime.
+RESPONDER_DEBOUNCE_WINDOWS = literal_eval(
+    os.environ.get('RESPONDER_DEBOUNCE_WINDOWS', '{}'))
+
+# Run the responders on the short queue for an event together in a single
+# task, instead of publishing a message for each of them. The responders of a
+# fused task share one label transaction, see ``gitmate.labels``, so their
+# label changes are written once per object instead of once per responder.
+RESPONDER_FUSED_DISPATCH = literal_eval(
+    os.environ.get('RESPONDER_FUSED_DISPATCH', 'False'))
+
+# Adaptive queue routing of responders, see ``gitmate_hooks.routing``. One of
+# 'off', 'advise' (log responders on the wrong queue) or 'override' (publish
+# them to the queue their runtimes suggest).
+RESPONDER_ADAPTIVE_ROUTING = os.environ.get('RESPONDER_ADAPTIVE_ROUTING',
+                                            'advise')
+
+# The 95th percentile runtime in seconds up to which a responder belongs on
+# the short ('celery') and the medium queue, slower ones go to the long queue.
+RESPONDER_QUEUE_LIMITS = literal_eval(
+    os.environ.get('RESPONDER_QUEUE_LIMITS', "{'celery': 10, 'medium': 120}"))
+
+# Number of runtimes kept per responder and needed before it is routed.
+RESPONDER_RUNTIME_SAMPLES = int(os.environ.get('RESPONDER_RUNTIME_SAMPLES',
+                                               200))
+RESPONDER_RUNTIME_MIN_SAMPLES = int(
+    os.environ.get('RESPONDER_RUNTIME_MIN_SAMPLES', 20))
+
+# Seconds between storing the measured runtimes and reloading the routes.
+RESPONDER_RUNTIME_INTERVAL = int(
+    os.environ.get('RESPONDER_RUNTIME_INTERVAL', 60))
+
+# Maximum number of responder tasks of a single repository published but not
+# finished yet, further ones wait in a backlog, see ``gitmate_hooks.fairness``.
+# 0 disables the limit.
+TENANT_MAX_IN_FLIGHT = int(os.environ.get('TENANT_MAX_IN_FLIGHT', 0))
+
+# Seconds after which the tasks of a repository count as lost and no longer
+# take up its slots.
+TENANT_IN_FLIGHT_TIMEOUT = int(
+    os.environ.get('TENANT_IN_FLIGHT_TIMEOUT', 60 * 60))
+
+# Seconds between periodic drains of the backlogs of all repositories.
+TENANT_DRAIN_INTERVAL = int(os.environ.get('TENANT_DRAIN_INTERVAL', 30))
+
+# Number of repositories a scheduled responder is triggered for by a single
+# task, see ``run_plugin_for_all_repos``. 0 triggers it for all repositories
+# in one task.
+SCHEDULED_FANOUT_CHUNK_SIZE = int(
+    os.environ.get('SCHEDULED_FANOUT_CHUNK_SIZE', 500))
+
+# Number of such tasks in flight at once, each one publishes the next chunk
+# of its lane when it finishes.
+SCHEDULED_FANOUT_PARALLELISM = int(
+    os.environ.get('SCHEDULED_FANOUT_PARALLELISM', 8))
+
+# Stop sending requests to failing endpoints of a hoster and defer the tasks
+# for it, see ``gitmate.breakers``.
+CIRCUIT_BREAKERS = literal_eval(os.environ.get('CIRCUIT_BREAKERS', 'False'))
+
+# A breaker trips once at least CIRCUIT_BREAKER_MIN_REQUESTS requests were
+# sent to an endpoint class by a process within CIRCUIT_BREAKER_WINDOW
+# seconds, and the share of failed requests or of requests slower than
+# CIRCUIT_BREAKER_SLOW_REQUEST seconds reaches CIRCUIT_BREAKER_ERROR_RATE.
+CIRCUIT_BREAKER_WINDOW = int(os.environ.get('CIRCUIT_BREAKER_WINDOW', 60))
+CIRCUIT_BREAKER_MIN_REQUESTS = int(
+    os.environ.get('CIRCUIT_BREAKER_MIN_REQUESTS', 20))
+CIRCUIT_BREAKER_SLOW_REQUEST = float(
+    os.environ.get('CIRCUIT_BREAKER_SLOW_REQUEST', 10))
+CIRCUIT_BREAKER_ERROR_RATE = float(
+    os.environ.get('CIRCUIT_BREAKER_ERROR_RATE', 0.5))
+
+# Seconds a tripped breaker stays open, doubled with every further trip.
+CIRCUIT_BREAKER_COOLDOWN = int(
+    os.environ.get('CIRCUIT_BREAKER_COOLDOWN', 30))
+
+# Track the rate limit budgets of installations and users and delay the tasks
+# of exhausted ones until they reset, see ``gitmate.rate_limits``.
+RATE_LIMIT_BUDGETS = literal_eval(
+    os.environ.get('RATE_LIMIT_BUDGETS', 'False'))
+
+# Requests left in a budget below which its tasks are delayed, leaving room
+# for the tasks already running.
+RATE_LIMIT_RESERVE = int(os.environ.get('RATE_LIMIT_RESERVE', 100))
+
+# Cancel the responder tasks for the head of a merge request once it's pushed
+# to again, see ``gitmate_hooks.generations``.
+RESPONDER_SUPERSEDING = literal_eval(
+    os.environ.get('RESPONDER_SUPERSEDING', 'False'))
+
+# Skip dispatching responder tasks while an identical one is in flight, see
+# ``gitmate_hooks.single_flight``.
+RESPONDER_SINGLE_FLIGHT = literal_eval(
+    os.environ.get('RESPONDER_SINGLE_FLIGHT', 'False'))
+
+# Seconds after which a task counts as lost and identical ones are dispatched
+# again.
+RESPONDER_SINGLE_FLIGHT_TIMEOUT = int(
+    os.environ.get('RESPONDER_SINGLE_FLIGHT_TIMEOUT', 60 * 60))
+
+# Run the responder tasks for the same issue, merge request or commit one
+# after another, holding back later ones instead of letting them wait for
+# locks in a worker, see ``gitmate_hooks.serial``.
+RESPONDER_SERIAL_KEYS = literal_eval(
+    os.environ.get('RESPONDER_SERIAL_KEYS', 'False'))
+
+# Seconds after which a task for an object counts as lost and the next one
+# may run.
+SERIAL_KEY_TIMEOUT = int(os.environ.get('SERIAL_KEY_TIMEOUT', 30 * 60))
+
+# Load shedding of housekeeping responders, see ``gitmate_hooks.shedding``.
+# Housekeeping is deferred by the delay in seconds or dropped once its queue
+# holds as many messages as the thresholds, and dropped when it waited longer
+# than the maximum age in seconds. Thresholds of 0 disable shedding.
+HOUSEKEEPING_DEFER_DEPTH = int(os.environ.get('HOUSEKEEPING_DEFER_DEPTH', 0))
+HOUSEKEEPING_DEFER_DELAY = int(
+    os.environ.get('HOUSEKEEPING_DEFER_DELAY', 5 * 60))
+HOUSEKEEPING_SHED_DEPTH = int(os.environ.get('HOUSEKEEPING_SHED_DEPTH', 0))
+HOUSEKEEPING_MAX_AGE = int(os.environ.get('HOUSEKEEPING_MAX_AGE', 0))
+QUEUE_DEPTH_PROBE_INTERVAL = int(
+    os.environ.get('QUEUE_DEPTH_PROBE_INTERVAL', 5))
+
 # coafile Bot Tokens
 GITHUB_BOT_TOKEN = os.environ.get('GITHUB_BOT_TOKEN', None)
 GITLAB_BOT_TOKEN = os.environ.get('GITLAB_BOT_TOKEN', None)
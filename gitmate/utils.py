@@ -1,8 +1,12 @@
+from collections import OrderedDict
 from contextlib import contextmanager
 from glob import glob
 from importlib import import_module
 from os import listdir
 from os import path
+from threading import Lock
+from time import monotonic
+from time import time
 import subprocess
 
 from django.apps import apps
@@ -12,20 +16,139 @@ from django.forms.models import model_to_dict
 from django_pglocks import advisory_lock
 
 from gitmate.exceptions import MissingSettingsError
+from gitmate.http_cache import invalidate_request_scope
+
+
+def get_object_key(igitt_object) -> str:
+    """
+    Returns a key identifying the IGitt object across processes. The IGitt
+    object should have an .url property, i.e. be an issue, a merge request, a
+    commit or a repository.
+    """
+    return igitt_object.url
+
+
+# attribute holding the time an IGitt object's data was taken at
+SNAPSHOT_ATTRIBUTE = '_gitmate_snapshot_at'
+
+
+def seed_snapshot(igitt_object, taken_at: float = None):
+    """
+    Marks the data the IGitt object holds, e.g. from a webhook payload, as a
+    snapshot taken at the given time. Property reads are answered from that
+    data, and ``gitmate.serialization`` attaches it to the task messages, so
+    that workers don't fetch it again. Writes still refresh the object under
+    ``lock_igitt_object`` first.
+
+    :param igitt_object: The IGitt object built from the snapshot data.
+    :param taken_at:     The timestamp of the snapshot, defaults to now.
+    """
+    setattr(igitt_object, SNAPSHOT_ATTRIBUTE,
+            time() if taken_at is None else taken_at)
+
+
+def get_snapshot_time(igitt_object):
+    """
+    Returns the time the snapshot the IGitt object holds was taken at, or
+    ``None`` if it doesn't hold one.
+    """
+    # look at the instance only, mocks would make up the attribute otherwise
+    return vars(igitt_object).get(SNAPSHOT_ATTRIBUTE)
 
 
 @contextmanager
-def lock_igitt_object(task: str, igitt_object, refresh_needed=True):
+def lock_igitt_object(task: str, igitt_object, refresh_needed: bool = True):
     """
     The IGitt object should have an .url property, so right now this will only
     work with issues and merge requests.
+
+    The object is refreshed after acquiring the lock, so that changes done
+    since it was fetched, e.g. labels a human set, aren't overwritten.
     """
-    with advisory_lock(task + igitt_object.url):
+    with advisory_lock(task + get_object_key(igitt_object)):
+        # responses fetched before acquiring the lock may be outdated
+        invalidate_request_scope()
         if refresh_needed:
             igitt_object.refresh()
+            seed_snapshot(igitt_object)
         yield
 
 
+class ExpiringCache:
+    """
+    A thread safe in-process mapping whose entries expire after a timeout. Once
+    it holds more than ``max_entries`` entries, the ones stored the longest
+    time ago are evicted.
+
+    >>> from gitmate.utils import ExpiringCache
+    >>> cache = ExpiringCache(max_entries=2)
+    >>> cache.set('a', 1)
+    >>> cache.set('b', 2)
+    >>> cache.set('c', 3)
+    >>> 'a' in cache, cache.get('c')
+    (False, 3)
+    """
+    _missing = object()
+
+    def __init__(self, max_entries: int, timeout: float = None):
+        """
+        :param max_entries: The maximum number of entries to hold.
+        :param timeout:     The default number of seconds after which entries
+                            expire, ``None`` keeps them until evicted.
+        """
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, key):
+        return self.get(key, self._missing) is not self._missing
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored for the key, if it hasn't expired yet.
+        """
+        with self._lock:
+            try:
+                expires, value = self._entries[key]
+            except KeyError:
+                return default
+            if expires is not None and expires <= monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key, value, timeout: float = None):
+        """
+        Stores the value for the key, overriding the default timeout if one is
+        given.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        expires = monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Removes the entry for the key, if present.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
 def is_plugin(directory: str) -> bool:
     """
     Checks whether the given directory is a GitMate plugin.
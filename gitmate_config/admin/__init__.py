@@ -1,5 +1,9 @@
+from datetime import datetime
+
 from django.contrib import admin
 
+from gitmate.rate_limits import get_installation_budget
+from gitmate.rate_limits import get_status
 from gitmate_config.admin.utils import register_all_setting_models
 from gitmate_config.admin.utils import DisplayAllAdmin
 from gitmate_config.models import Repository
@@ -10,4 +14,31 @@ from gitmate_config.models import Installation
 register_all_setting_models()
 admin.site.register(Organization, DisplayAllAdmin)
 admin.site.register(Repository, DisplayAllAdmin)
-admin.site.register(Installation, DisplayAllAdmin)
+
+
+@admin.register(Installation)
+class InstallationAdmin(DisplayAllAdmin):
+    """
+    Shows the rate limit budget consumption of every installation, as last
+    seen by the responders, see ``gitmate.rate_limits``.
+    """
+    def __init__(self, model, site):
+        super().__init__(model, site)
+        self.list_display = self.list_display + [
+            'rate_limit_used', 'rate_limit_remaining', 'rate_limit_reset']
+
+    def _get_rate_limit(self, obj) -> dict:
+        return get_status(get_installation_budget(obj.pk)) or {}
+
+    def rate_limit_used(self, obj):
+        status = self._get_rate_limit(obj)
+        if status.get('limit') is None:
+            return None
+        return status['limit'] - status['remaining']
+
+    def rate_limit_remaining(self, obj):
+        return self._get_rate_limit(obj).get('remaining')
+
+    def rate_limit_reset(self, obj):
+        reset = self._get_rate_limit(obj).get('reset')
+        return datetime.fromtimestamp(reset) if reset is not None else None
@@ -3,6 +3,8 @@ from django.core.cache import cache as django_cache
 
 from IGitt.Utils import Cache
 
+from gitmate.http_cache import install_request_cache
+
 
 class GitmateConfigConfig(AppConfig):
     name = 'gitmate_config'
@@ -12,3 +14,5 @@ class GitmateConfigConfig(AppConfig):
     def ready(self):
         # Initialise the IGitt Cache management
         Cache.use(django_cache.get, django_cache.set)
+        # Deduplicate identical requests made within a task
+        install_request_cache()
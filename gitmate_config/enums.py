@@ -36,3 +36,16 @@ class TaskQueue(Enum):
     SHORT = 'celery'  # Default queue - always there
     LONG = 'long'
     MEDIUM = 'medium'
+
+
+class TaskPriority(Enum):
+    """
+    The priority class of a responder, which decides how its invocations are
+    treated when the broker backs up.
+    """
+    # replies to commands typed by a human, e.g. ``@gitmate-bot rebase``
+    INTERACTIVE = 'interactive'
+    # checks and labels contributors wait for, e.g. commit statuses
+    STATUS_CRITICAL = 'status_critical'
+    # maintenance which may be deferred or dropped, e.g. stale labels
+    HOUSEKEEPING = 'housekeeping'
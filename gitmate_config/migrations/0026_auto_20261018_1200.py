@@ -0,0 +1,18 @@
+# Generated by Django 2.0.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gitmate_config', '0025_auto_20180606_2301'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='repository',
+            name='full_name',
+            field=models.CharField(db_index=True, default=None, max_length=255),
+        ),
+    ]
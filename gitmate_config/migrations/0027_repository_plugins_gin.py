@@ -0,0 +1,18 @@
+# Generated by Django 2.0.7 on 2026-10-18 18:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gitmate_config', '0026_auto_20261018_1200'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='repository',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['plugins'], name='repository_plugins_gin'),
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.apps import apps
 from django.conf import settings as django_settings
 from django.contrib.auth.models import User
 from django.contrib.postgres import fields as psql_fields
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.http import Http404
@@ -131,7 +132,7 @@ class Repository(models.Model):
     provider = models.CharField(default=None, max_length=32)
 
     # The full name of the repository along with username
-    full_name = models.CharField(default=None, max_length=255)
+    full_name = models.CharField(default=None, max_length=255, db_index=True)
 
     # The set of active plugins on the repository
     plugins = psql_fields.ArrayField(models.CharField(max_length=255),
@@ -248,13 +249,11 @@ class Repository(models.Model):
         if self.installation is not None:
             return self.installation.token
 
-        raw_token = self.user.social_auth.get(
-            provider=self.provider).access_token
+        social_auth = self.user.social_auth.get(provider=self.provider)
 
         return Providers(self.provider).get_token(
-            raw_token,
-            private_token='private_token' in self.user.social_auth.get(
-                provider=self.provider).extra_data
+            social_auth.access_token,
+            private_token='private_token' in social_auth.extra_data
         )
 
     @property
@@ -275,6 +274,9 @@ class Repository(models.Model):
     class Meta:
         unique_together = ('provider', 'identifier')
         verbose_name_plural = 'repositories'
+        # serves the ``plugins__contains`` lookups of scheduled responders
+        indexes = [GinIndex(fields=['plugins'],
+                            name='repository_plugins_gin')]
 
 
 class SettingsBase(models.Model):
@@ -249,7 +249,8 @@ class GitmateTestCase(RecordedTestCase):
     def simulate_scheduled_responder_call(self, event: str, repo: Repository):
         ResponderRegistrar.respond(event, repo.igitt_repo, repo=repo)
 
-    def simulate_github_webhook_call(self, event: str, data: dict):
+    def simulate_github_webhook_call(self, event: str, data: dict,
+                                     headers: dict = None):
         request = self.factory.post(
             reverse('webhooks:github'), data, format='json')
         hashed = hmac.new(
@@ -260,15 +261,18 @@ class GitmateTestCase(RecordedTestCase):
         request.META.update({
             'HTTP_X_HUB_SIGNATURE': signature,
             'HTTP_X_GITHUB_EVENT': event,
+            **(headers or {})
         })
 
         return github_webhook_receiver(request)
 
-    def simulate_gitlab_webhook_call(self, event: str, data: dict):
+    def simulate_gitlab_webhook_call(self, event: str, data: dict,
+                                     headers: dict = None):
         request = self.factory.post(
             reverse('webhooks:gitlab'), data, format='json')
         request.META.update({
             'HTTP_X_GITLAB_TOKEN': os.environ['WEBHOOK_SECRET'],
-            'HTTP_X_GITLAB_EVENT': event
+            'HTTP_X_GITLAB_EVENT': event,
+            **(headers or {})
         })
         return gitlab_webhook_receiver(request)
@@ -0,0 +1,66 @@
+from django.contrib import admin
+
+from gitmate.celery import app as celery
+from gitmate_hooks.models import HeldTask
+from gitmate_hooks.models import ResponderOutcome
+from gitmate_hooks.models import ResponderRuntime
+from gitmate_hooks.routing import get_observed_queue
+
+
+@admin.register(ResponderRuntime)
+class ResponderRuntimeAdmin(admin.ModelAdmin):
+    """
+    Shows the observed runtime distribution of every responder along with the
+    queue it is registered for and the one its runtimes suggest.
+    """
+    list_display = ('responder', 'sample_count', 'p50', 'p95', 'p99', 'max',
+                    'static_queue', 'observed_queue', 'updated_at')
+    search_fields = ('responder', )
+    readonly_fields = ('responder', 'samples', 'updated_at')
+
+    def sample_count(self, obj):
+        return len(obj.samples)
+
+    def p50(self, obj):
+        return obj.get_percentile(50)
+
+    def p95(self, obj):
+        return obj.get_percentile(95)
+
+    def p99(self, obj):
+        return obj.get_percentile(99)
+
+    def max(self, obj):
+        return obj.get_percentile(100)
+
+    def static_queue(self, obj):
+        task = celery.tasks.get(obj.responder)
+        return task.queue if task is not None else None
+
+    def observed_queue(self, obj):
+        queue = get_observed_queue(obj.samples)
+        return queue.value if queue is not None else None
+
+
+@admin.register(HeldTask)
+class HeldTaskAdmin(admin.ModelAdmin):
+    """
+    Shows the tasks held back for repositories with too many tasks in flight
+    or for objects with a task in flight.
+    """
+    list_display = ('task', 'repo', 'key', 'queue', 'priority', 'held_at')
+    list_filter = ('queue', )
+    search_fields = ('repo__full_name', 'task', 'key')
+    exclude = ('message', )
+
+
+@admin.register(ResponderOutcome)
+class ResponderOutcomeAdmin(admin.ModelAdmin):
+    """
+    Shows whether and how the responders ran for the events of an object.
+    """
+    list_display = ('responder', 'event', 'key', 'status', 'duration',
+                    'api_calls', 'error', 'finished_at')
+    list_filter = ('status', 'event')
+    search_fields = ('responder', 'key')
+    date_hierarchy = 'finished_at'
@@ -9,3 +9,4 @@ class GitmateHooksConfig(AppConfig):
     def ready(self):
         import gitmate_hooks.utils  # Ignore PyUnusedCodeBear
         import gitmate_hooks.responders
+        import gitmate_hooks.tasks
@@ -0,0 +1,465 @@
+"""
+This module contains a load test harness for the webhook receivers, which is
+driven by the ``benchmark_webhooks`` management command.
+
+Recorded deliveries are sent to ``github_webhook_receiver`` and
+``gitlab_webhook_receiver`` at a fixed rate. Celery is switched to an
+in-process memory broker with a worker thread consuming all queues, and every
+request to GitHub or GitLab is redirected to a local HTTP server which answers
+from the VCR cassettes of the test suite. The run is reported as receiver
+latency percentiles, tasks published per delivery, broker message bytes and
+responder completion latency.
+
+The benchmark uses the configured database, the repositories the deliveries
+belong to have to exist and be active there.
+"""
+from collections import Counter
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from enum import Enum
+from hashlib import sha1
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Condition
+from threading import Lock
+from threading import Thread
+from threading import local
+from time import monotonic
+from time import sleep
+from unittest.mock import patch
+from urllib.parse import parse_qsl
+from urllib.parse import urlsplit
+from uuid import uuid4
+import hmac
+import json
+import os
+
+from celery import Task
+from celery.contrib.testing.worker import start_worker
+from celery.signals import before_task_publish
+from celery.signals import task_postrun
+from celery.signals import task_prerun
+from django.conf import settings
+from django.test import RequestFactory
+from django.test import override_settings
+from django.urls import reverse
+from kombu.serialization import dumps
+from requests.adapters import HTTPAdapter
+import yaml
+
+from gitmate.celery import app as celery
+from gitmate.metrics import percentile
+from gitmate_config.enums import Providers
+from gitmate_config.enums import TaskQueue
+from gitmate_config.models import Repository
+from gitmate_hooks.models import WebhookEvent
+from gitmate_hooks.tasks import ingest_webhook
+from gitmate_hooks.utils import ResponderRegistrar
+from gitmate_hooks.views import github_webhook_receiver
+from gitmate_hooks.views import gitlab_webhook_receiver
+from gitmate_hooks.webhooks import WEBHOOK_EVENT_HEADERS
+
+
+DEFAULT_CASSETTES = os.path.join(settings.BASE_DIR, '*', 'tests', 'cassettes',
+                                 '*.yaml')
+
+# response headers which are recomputed when answering from a cassette
+_HOP_HEADERS = {'content-length', 'transfer-encoding', 'connection'}
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeHoster:
+    """
+    A local HTTP server standing in for GitHub and GitLab, which answers from
+    recorded VCR cassettes. Requests are matched by method, host and path,
+    preferring the interaction with the most matching query parameters.
+    Unknown requests are answered with ``404 Not Found``.
+    """
+
+    def __init__(self, cassettes: list):
+        self.interactions = defaultdict(list)
+        self.matched = 0
+        self.unmatched = Counter()
+        self._lock = Lock()
+        for path in cassettes:
+            with open(path) as cassette:
+                for interaction in yaml.safe_load(cassette)['interactions']:
+                    request = interaction['request']
+                    url = urlsplit(request['uri'])
+                    self.interactions[
+                        (request['method'], url.netloc, url.path)
+                    ].append((set(parse_qsl(url.query)),
+                              interaction['response']))
+        self._server = None
+
+    def lookup(self, method: str, url: str):
+        """
+        Returns the recorded response to the given request, if any.
+        """
+        parts = urlsplit(url)
+        query = set(parse_qsl(parts.query))
+        candidates = self.interactions.get(
+            (method, parts.netloc, parts.path), [])
+        best, overlap = None, -1
+        for recorded_query, response in candidates:
+            if len(recorded_query & query) > overlap:
+                best, overlap = response, len(recorded_query & query)
+
+        with self._lock:
+            if best is None:
+                self.unmatched[f'{method} {parts.netloc}{parts.path}'] += 1
+            else:
+                self.matched += 1
+        return best
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'{host}:{port}'
+
+    def _get_handler(self):
+        hoster = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self.rfile.read(length)
+                url = 'https:/' + self.path
+                response = hoster.lookup(self.command, url)
+                if response is None:
+                    body = b'{"message": "Not Found"}'
+                    self.send_response(404)
+                    self.send_header('Content-Type', 'application/json')
+                else:
+                    body = response['body']['string']
+                    if isinstance(body, str):
+                        body = body.encode('utf-8')
+                    self.send_response(response['status']['code'])
+                    for name, values in response['headers'].items():
+                        if name.lower() in _HOP_HEADERS:
+                            continue
+                        for value in values:
+                            self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @contextmanager
+    def serve(self):
+        """
+        Serves the recorded responses and redirects all requests made through
+        ``requests`` to the local server while the context is active.
+        """
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0),
+                                            self._get_handler())
+        Thread(target=self._server.serve_forever, daemon=True).start()
+
+        address = self.address
+        send = HTTPAdapter.send
+
+        def redirect(adapter, request, **kwargs):
+            parts = urlsplit(request.url)
+            if parts.netloc != address:
+                request.url = parts._replace(
+                    scheme='http', netloc=address,
+                    path=f'/{parts.netloc}{parts.path}').geturl()
+            kwargs['proxies'] = {}
+            return send(adapter, request, **kwargs)
+
+        try:
+            with patch.object(HTTPAdapter, 'send', redirect):
+                yield self
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class TaskRecorder:
+    """
+    Records the tasks published while it's connected, along with their
+    serialized size and the time from the delivery they originate from until
+    they finished.
+    """
+
+    def __init__(self):
+        self.published = Counter()
+        self.message_bytes = Counter()
+        self.completion = defaultdict(list)
+        self._origins = {}
+        self._finished = 0
+        self._context = local()
+        self._condition = Condition()
+
+    @property
+    def origin(self) -> float:
+        return getattr(self._context, 'origin', None)
+
+    @origin.setter
+    def origin(self, value: float):
+        self._context.origin = value
+
+    def _on_publish(self, sender=None, body=None, headers=None, **kwargs):
+        task = celery.tasks.get(sender)
+        serializer = getattr(task, 'serializer', celery.conf.task_serializer)
+        _, _, data = dumps(body, serializer=serializer)
+        with self._condition:
+            self.published[sender] += 1
+            self.message_bytes[sender] += len(data)
+            self._origins[headers['id']] = self.origin
+
+    def _on_prerun(self, task_id=None, **kwargs):
+        self.origin = self._origins.get(task_id)
+
+    def _on_postrun(self, sender=None, task_id=None, **kwargs):
+        with self._condition:
+            origin = self._origins.pop(task_id, None)
+            if origin is not None:
+                self.completion[sender.name].append(monotonic() - origin)
+            self._finished += 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def connect(self):
+        before_task_publish.connect(self._on_publish, weak=False)
+        task_prerun.connect(self._on_prerun, weak=False)
+        task_postrun.connect(self._on_postrun, weak=False)
+        try:
+            yield self
+        finally:
+            before_task_publish.disconnect(self._on_publish)
+            task_prerun.disconnect(self._on_prerun)
+            task_postrun.disconnect(self._on_postrun)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Waits until all published tasks finished, returns whether they did.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._finished >= sum(self.published.values()),
+                timeout)
+
+
+@contextmanager
+def memory_broker():
+    """
+    Switches celery to an in-memory broker. The connections celery opens
+    meanwhile are kept, so it's meant for one-off benchmark processes.
+    """
+    # the broker URL from the environment takes precedence over the config
+    with patch.dict(os.environ, {'CELERY_BROKER_URL': 'memory://'}):
+        celery.conf.update(broker_url='memory://',
+                           result_backend='cache+memory://',
+                           task_always_eager=False)
+        yield
+
+
+@contextmanager
+def in_process_celery():
+    """
+    Switches celery to an in-memory broker, which is consumed by a worker
+    thread listening on all queues.
+    """
+    # registers the ``celery.ping`` task required by the test worker
+    from celery.contrib.testing import tasks  # noqa: F401
+
+    with memory_broker(), start_worker(
+            celery,
+            perform_ping_check=False,
+            queues=[queue.value for queue in TaskQueue]):
+        yield
+
+
+def load_payloads(path: str = None, limit: int = 1000) -> list:
+    """
+    Loads the deliveries to send, either from a file with one JSON object
+    with ``provider``, ``event`` and ``webhook`` keys per line or from the
+    latest entries of the webhook event log.
+    """
+    if path is not None:
+        with open(path) as payloads:
+            return [(data['provider'], data['event'], data['webhook'])
+                    for data in map(json.loads, payloads) if data][:limit]
+
+    entries = WebhookEvent.objects.order_by('-received_at')[:limit]
+    return [(entry.provider, entry.event, entry.webhook)
+            for entry in reversed(entries)]
+
+
+class WebhookBenchmark:
+    """
+    Sends deliveries to the webhook receivers at a fixed rate.
+
+    Receiver latency is measured from the time a delivery was scheduled to be
+    sent, so that a backlog building up in the clients isn't hidden.
+    """
+    RECEIVERS = {
+        Providers.GITHUB.value: ('webhooks:github', github_webhook_receiver),
+        Providers.GITLAB.value: ('webhooks:gitlab', gitlab_webhook_receiver),
+    }
+
+    def __init__(self,
+                 payloads: list,
+                 rate: float,
+                 count: int,
+                 concurrency: int = 8):
+        self.payloads = payloads
+        self.rate = rate
+        self.count = count
+        self.concurrency = concurrency
+        self.latencies = []
+        self.statuses = Counter()
+        self.factory = RequestFactory()
+        self.recorder = TaskRecorder()
+
+    def _build_request(self, provider: str, event: str, webhook: dict):
+        path, _ = self.RECEIVERS[provider]
+        body = json.dumps(webhook).encode('utf-8')
+        headers = {WEBHOOK_EVENT_HEADERS[provider]: event}
+        if provider == Providers.GITHUB.value:
+            signature = hmac.new(
+                settings.WEBHOOK_SECRET.encode('utf-8'), body, sha1)
+            headers['HTTP_X_HUB_SIGNATURE'] = 'sha1=' + signature.hexdigest()
+            headers['HTTP_X_GITHUB_DELIVERY'] = str(uuid4())
+        else:
+            headers['HTTP_X_GITLAB_TOKEN'] = settings.WEBHOOK_SECRET
+        return self.factory.post(reverse(path), body,
+                                 content_type='application/json', **headers)
+
+    def _send(self, scheduled_at: float, payload: tuple):
+        provider = payload[0]
+        request = self._build_request(*payload)
+        self.recorder.origin = scheduled_at
+        try:
+            response = self.RECEIVERS[provider][1](request)
+            status = response.status_code
+        except Exception as exc:  # pragma: no cover
+            status = type(exc).__name__
+        self.latencies.append(monotonic() - scheduled_at)
+        self.statuses[status] += 1
+
+    def run(self, drain_timeout: float = 60) -> dict:
+        """
+        Sends the deliveries and waits for the tasks they caused to finish.
+
+        :return: The report of the run, see ``format_report``.
+        """
+        # every delivery is sent repeatedly, it mustn't be deduplicated
+        with override_settings(WEBHOOK_DEDUPE_TTL=0), \
+                self.recorder.connect(), \
+                ThreadPoolExecutor(self.concurrency) as executor:
+            started = monotonic()
+            for index in range(self.count):
+                scheduled_at = started + index / self.rate
+                sleep(max(scheduled_at - monotonic(), 0))
+                executor.submit(self._send, scheduled_at,
+                                self.payloads[index % len(self.payloads)])
+            executor.shutdown(wait=True)
+            sent = monotonic() - started
+            drained = self.recorder.wait(drain_timeout)
+
+        return {
+            'deliveries': self.count,
+            'duration': sent,
+            'statuses': dict(self.statuses),
+            'receiver_latency': self.latencies,
+            'published': dict(self.recorder.published),
+            'message_bytes': dict(self.recorder.message_bytes),
+            'completion': {name: latencies for name, latencies
+                           in self.recorder.completion.items()
+                           if name != ingest_webhook.name},
+            'drained': drained,
+        }
+
+
+def benchmark_dispatch(event: Enum,
+                       repo: Repository,
+                       iterations: int = 1000) -> dict:
+    """
+    Measures the time ``ResponderRegistrar.respond`` takes for the given
+    event on the repository, split into choosing the responders, the whole
+    dispatch without publishing and the whole dispatch publishing to an
+    in-memory broker.
+
+    :return: The mean time per dispatch in seconds by phase.
+    """
+    args = (repo.igitt_repo, )
+
+    def measure(function) -> float:
+        started = monotonic()
+        for _ in range(iterations):
+            function()
+        return (monotonic() - started) / iterations
+
+    def respond():
+        ResponderRegistrar.respond(event, *args, repo=repo)
+
+    # build the dispatch table and create missing settings beforehand
+    with patch.object(Task, 'apply_async'):
+        respond()
+        timings = {
+            'select': measure(
+                lambda: ResponderRegistrar._get_entries(event, repo=repo)),
+            'dispatch': measure(respond),
+        }
+    with memory_broker():
+        timings['publish'] = measure(respond)
+    timings['responders'] = len(
+        ResponderRegistrar._get_entries(event, repo=repo))
+    return timings
+
+
+def _format_latencies(values: list) -> str:
+    pcts = ', '.join(f'p{pct}={percentile(values, pct) * 1000:.1f}ms'
+                     for pct in (50, 90, 99))
+    return f'{pcts}, max={max(values) * 1000:.1f}ms'
+
+
+def format_report(report: dict, hoster: FakeHoster = None) -> str:
+    """
+    Renders a benchmark report as text.
+    """
+    deliveries = report['deliveries']
+    lines = [
+        f'deliveries: {deliveries} in {report["duration"]:.2f}s '
+        f'({deliveries / report["duration"]:.1f}/s)',
+        'statuses: ' + ', '.join(f'{status}={count}' for status, count
+                                 in sorted(report['statuses'].items(),
+                                           key=str)),
+        'receiver latency: ' + _format_latencies(report['receiver_latency']),
+        f'tasks per delivery: '
+        f'{sum(report["published"].values()) / deliveries:.2f}',
+        f'broker bytes per delivery: '
+        f'{sum(report["message_bytes"].values()) / deliveries:.0f}',
+    ]
+    for name, count in sorted(report['published'].items()):
+        lines.append(f'  {name}: {count} tasks, '
+                     f'{report["message_bytes"][name]} bytes')
+
+    completion = [value for values in report['completion'].values()
+                  for value in values]
+    if completion:
+        lines.append('responder completion: ' + _format_latencies(completion))
+        for name, values in sorted(report['completion'].items()):
+            lines.append(f'  {name}: ' + _format_latencies(values))
+    if not report['drained']:
+        lines.append('warning: not all tasks finished before the timeout')
+
+    if hoster is not None:
+        lines.append(f'hoster requests: {hoster.matched} recorded, '
+                     f'{sum(hoster.unmatched.values())} unknown')
+        for request, count in hoster.unmatched.most_common(10):
+            lines.append(f'  {request}: {count}')
+    return '\n'.join(lines)
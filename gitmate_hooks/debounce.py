@@ -0,0 +1,42 @@
+"""
+This module contains the debouncing of bursts of events for the same object,
+e.g. a series of ``MergeRequestActions.SYNCHRONIZED`` events caused by
+repeated force pushes.
+
+Responders for debounced events are delayed by the window configured in
+``RESPONDER_DEBOUNCE_WINDOWS`` and every event stamps the object with a new
+token. Once their countdown has passed, only the responders dispatched with
+the latest token run, the ones of earlier events are skipped.
+"""
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+# debounce tokens outlive their window to cover queueing delays, once they
+# are gone pending responders run regardless.
+DEBOUNCE_TOKEN_TIMEOUT = 24 * 60 * 60
+
+
+def _get_cache_key(key: str) -> str:
+    return 'debounce:' + key
+
+
+def stamp(key: str) -> str:
+    """
+    Marks the given key with a new token, superseding all earlier ones.
+
+    :param key: The key identifying the event type and object.
+    :return:    The new token.
+    """
+    token = uuid4().hex
+    cache.set(_get_cache_key(key), token, timeout=DEBOUNCE_TOKEN_TIMEOUT)
+    return token
+
+
+def is_current(key: str, token: str) -> bool:
+    """
+    Checks whether the given token is still the latest one for the key.
+    """
+    current = cache.get(_get_cache_key(key))
+    return current is None or current == token
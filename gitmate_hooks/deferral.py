@@ -0,0 +1,103 @@
+"""
+This module contains the deferral of responder tasks for failing hosters.
+
+While a circuit breaker of a hoster is open, see ``gitmate.breakers``, new
+responder tasks for its repositories aren't published, so that they don't
+tie up workers failing against the hoster while the ones for other hosters
+wait. They are held in the ``HeldTask`` backlog of the hoster instead. Once
+the breaker closed, the ``drain_held_tasks`` task releases them in batches
+doubling in size with every run, starting with a single task, so that a
+recovering hoster isn't flooded right away.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from gitmate import breakers
+from gitmate.celery import app as celery
+from gitmate.metrics import increment
+from gitmate.serialization import dumps
+from gitmate.serialization import loads
+from gitmate_hooks import shedding
+from gitmate_hooks.models import HeldTask
+
+
+# the prefix of the keys tasks deferred for a hoster are held with
+KEY_PREFIX = 'circuit:'
+
+# the largest number of tasks released for a hoster at once
+MAX_BATCH = 2 ** 10
+
+_PRIORITIES = {value: priority
+               for priority, value in shedding.MESSAGE_PRIORITIES.items()}
+
+
+def get_failing_hoster(repo) -> str:
+    """
+    Returns the hoster of the given repository if its tasks have to be
+    deferred, ``None`` otherwise.
+    """
+    hoster = breakers.get_hoster(repo.provider)
+    return hoster if breakers.is_open(hoster) else None
+
+
+def defer(repo, hoster: str, task, args: tuple, kwargs: dict,
+          countdown: float, priority: int, queue: str):
+    """
+    Adds the given task to the backlog of the hoster.
+    """
+    HeldTask.objects.create(repo=repo,
+                            key=KEY_PREFIX + hoster,
+                            task=task.name,
+                            message=dumps((args, kwargs)),
+                            queue=queue,
+                            priority=priority,
+                            countdown=countdown)
+    increment(f'circuits.{hoster}.deferred')
+
+
+def _get_released_key(hoster: str) -> str:
+    return 'circuit-released:' + hoster
+
+
+def _pop(key: str, count: int) -> list:
+    with transaction.atomic():
+        held = list(HeldTask.objects.select_for_update(skip_locked=True)
+                    .filter(key=key).order_by('held_at', 'id')[:count])
+        HeldTask.objects.filter(pk__in=[task.pk for task in held]).delete()
+    return held
+
+
+def drain():
+    """
+    Releases the next batch of deferred tasks of every hoster whose breakers
+    are closed.
+    """
+    # Don't move to module code, causes circular dependency!
+    from gitmate_hooks.utils import ResponderRegistrar
+
+    keys = HeldTask.objects.filter(key__startswith=KEY_PREFIX).order_by(
+        'key').values_list('key', flat=True).distinct()
+    for key in keys:
+        hoster = key[len(KEY_PREFIX):]
+        released_key = _get_released_key(hoster)
+        if breakers.is_open(hoster):
+            # start with a single task again once it closed
+            cache.delete(released_key)
+            continue
+
+        released = cache.get(released_key, 0)
+        batch = min(2 ** released, MAX_BATCH)
+        # incrementing would keep the default timeout of the database cache
+        cache.set(released_key, released + 1, timeout=breakers.TRIP_MEMORY)
+
+        for held in _pop(key, batch):
+            try:
+                args, kwargs = loads(bytes(held.message))
+            except Http404:
+                # the repository was deactivated in the meantime
+                continue
+            # the task may be held for its object or repository now
+            ResponderRegistrar._submit(
+                held.repo, celery.tasks[held.task], args, kwargs,
+                held.countdown, _PRIORITIES[held.priority], held.queue)
@@ -0,0 +1,178 @@
+"""
+This module contains the per repository fairness of responder dispatch.
+
+With ``TENANT_MAX_IN_FLIGHT`` set, every repository may only have that many
+responder tasks published but not yet finished. Further tasks are held back
+in the ``HeldTask`` backlog of the repository, so that a busy repository
+can't fill the queues all other repositories wait in. Whenever a task of a
+repository finishes, the oldest held task of that repository is published
+in its place. The ``drain_held_tasks`` task additionally drains all backlogs
+periodically, taking one task of each repository in turn.
+
+Every task in flight claims one of the ``TENANT_MAX_IN_FLIGHT`` slots of its
+repository, a key added to the django cache atomically, and carries it in its
+dispatch state until it finishes. The slots expire after
+``TENANT_IN_FLIGHT_TIMEOUT`` seconds on their own, so that tasks lost by a
+crashed worker don't block a repository forever.
+
+The ``tenants.<repo>.held`` gauge shows the backlog size of a repository,
+``tenants.<repo>.wait`` the time its last drained task was held for.
+"""
+from collections import deque
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from gitmate.celery import app as celery
+from gitmate.metrics import increment
+from gitmate.metrics import set_gauge
+from gitmate.serialization import dumps
+from gitmate.serialization import loads
+from gitmate_config.models import Repository
+from gitmate_hooks.models import HeldTask
+
+
+def get_tenant(repo) -> int:
+    """
+    Returns the tenant the tasks for the given repository are accounted to,
+    or ``None`` if they aren't limited.
+    """
+    if not settings.TENANT_MAX_IN_FLIGHT or not isinstance(repo, Repository):
+        return None
+    return repo.pk
+
+
+def _get_slot_key(tenant: int, slot: int) -> str:
+    return f'tenant-slot:{tenant}:{slot}'
+
+
+def _acquire(tenant: int) -> int:
+    keys = [_get_slot_key(tenant, slot)
+            for slot in range(settings.TENANT_MAX_IN_FLIGHT)]
+    taken = cache.get_many(keys)
+    for slot, key in enumerate(keys):
+        # adding fails if another process claimed the slot in the meantime
+        if key not in taken and cache.add(
+                key, True, timeout=settings.TENANT_IN_FLIGHT_TIMEOUT):
+            return slot
+    return None
+
+
+def _get_backlog(tenant: int):
+    # tasks held for their object key are handled by ``serial``
+    return HeldTask.objects.filter(repo_id=tenant, key=None)
+
+
+def _update_backlog_gauge(tenant: int):
+    set_gauge(f'tenants.{tenant}.held', _get_backlog(tenant).count())
+
+
+def admit(tenant: int) -> int:
+    """
+    Takes an in flight slot of the tenant for a task about to be published
+    and returns it. Returns ``None`` if all are taken or earlier tasks of the
+    tenant are still held, the task has to be held then.
+    """
+    if _get_backlog(tenant).exists():
+        return None
+    return _acquire(tenant)
+
+
+def occupy(kwargs: dict, tenant: int, slot: int) -> dict:
+    """
+    Returns the keyword arguments of a task with the slot it took added to
+    its dispatch state, so that it's freed once the task finished.
+    """
+    # Don't move to module code, causes circular dependency!
+    from gitmate_hooks.utils import DISPATCH_KWARG
+
+    return {**kwargs, DISPATCH_KWARG: {**kwargs.get(DISPATCH_KWARG, {}),
+                                       'tenant': (tenant, slot)}}
+
+
+def hold(tenant: int,
+         task,
+         args: tuple,
+         kwargs: dict,
+         countdown: float,
+         priority: int,
+         queue: str):
+    """
+    Adds the given task to the backlog of the tenant.
+    """
+    HeldTask.objects.create(repo_id=tenant,
+                            task=task.name,
+                            message=dumps((args, kwargs)),
+                            queue=queue,
+                            priority=priority,
+                            countdown=countdown)
+    increment('tenants.held')
+    _update_backlog_gauge(tenant)
+
+
+def _free(tenant: int, slot: int):
+    cache.delete(_get_slot_key(tenant, slot))
+
+
+def release(tenant: int, slot: int):
+    """
+    Frees the in flight slot a task of the tenant took and publishes the next
+    held task of the tenant, if any.
+    """
+    _free(tenant, slot)
+    drain([tenant])
+
+
+def _pop(tenant: int) -> HeldTask:
+    with transaction.atomic():
+        held = _get_backlog(tenant).select_for_update(
+            skip_locked=True).order_by('held_at', 'id').first()
+        if held is not None:
+            held.delete()
+    return held
+
+
+def drain(tenants: list = None):
+    """
+    Publishes held tasks while their tenants have free slots, taking one task
+    of each tenant in turn.
+
+    :param tenants: The tenants to drain the backlogs of, all by default.
+    """
+    if tenants is None:
+        tenants = HeldTask.objects.filter(key=None).order_by(
+            'repo_id').values_list('repo_id', flat=True).distinct()
+
+    pending = deque(tenants)
+    while pending:
+        tenant = pending.popleft()
+        if not _get_backlog(tenant).exists():
+            continue
+        slot = _acquire(tenant)
+        if slot is None:
+            continue
+
+        held = _pop(tenant)
+        if held is None:  # pragma: no cover, drained by someone else
+            _free(tenant, slot)
+            continue
+
+        set_gauge(f'tenants.{tenant}.wait',
+                  (timezone.now() - held.held_at).total_seconds())
+        _update_backlog_gauge(tenant)
+        try:
+            args, kwargs = loads(bytes(held.message))
+            celery.tasks[held.task].apply_async(
+                args, occupy(kwargs, tenant, slot), countdown=held.countdown,
+                queue=held.queue, priority=held.priority)
+        except Http404:
+            # the repository was deactivated in the meantime
+            _free(tenant, slot)
+        except Exception:  # pragma: no cover
+            logging.exception(f'Publishing held task {held.task} failed.')
+            _free(tenant, slot)
+        pending.append(tenant)
@@ -0,0 +1,110 @@
+"""
+This module contains the generations of merge requests, which let responder
+tasks working on an outdated head be cancelled.
+
+With ``RESPONDER_SUPERSEDING`` turned on, every ``SYNCHRONIZED`` event starts
+a new generation of its merge request. The tasks of responders to events
+working on the head, see ``HEAD_EVENTS``, carry the generation they were
+dispatched in. Queued tasks of an earlier generation are dropped before they
+start, and running ones can stop early by checking ``is_superseded`` between
+their steps, e.g.::
+
+    for commit in commits:
+        if is_superseded():
+            return
+        analyse(commit)
+
+Unlike debouncing, which only skips the responders of the same event type,
+this also cancels the ones dispatched for the ``OPENED`` event and the ones
+which started already.
+
+Generations are claimed with ``cache.add``, which is atomic on every django
+cache backend, unlike ``cache.incr``. A task is superseded once the generation
+after its own has been claimed.
+"""
+from contextlib import contextmanager
+from threading import local
+
+from django.conf import settings
+from django.core.cache import cache
+from IGitt.Interfaces.Actions import MergeRequestActions
+
+
+# the events whose responders work on the current head of a merge request
+HEAD_EVENTS = frozenset({MergeRequestActions.OPENED,
+                         MergeRequestActions.REOPENED,
+                         MergeRequestActions.SYNCHRONIZED})
+
+# generations outlive any queueing delay, once they are gone pending tasks
+# run regardless.
+GENERATION_TIMEOUT = 24 * 60 * 60
+
+_running = local()
+
+
+def _get_cache_key(key: str, generation: int = None) -> str:
+    if generation is None:
+        # the latest generation known, only a hint where to start looking
+        return 'generation:' + key
+    return f'generation:{key}:{generation}'
+
+
+def get_generation(event, key: str) -> int:
+    """
+    Returns the generation the responders for the given event on the object
+    are dispatched in, or ``None`` if they can't be superseded. Starts a new
+    generation for ``SYNCHRONIZED`` events.
+
+    :param event: The event the responders are dispatched for.
+    :param key:   The key of the merge request.
+    """
+    if not settings.RESPONDER_SUPERSEDING or event not in HEAD_EVENTS:
+        return None
+
+    generation = cache.get(_get_cache_key(key), 0)
+    if event is not MergeRequestActions.SYNCHRONIZED:
+        while not is_current(key, generation):
+            generation += 1
+        return generation
+
+    generation += 1
+    while not cache.add(_get_cache_key(key, generation), True,
+                        timeout=GENERATION_TIMEOUT):
+        # claimed by a concurrent push
+        generation += 1
+    cache.set(_get_cache_key(key), generation, timeout=GENERATION_TIMEOUT)
+    return generation
+
+
+def is_current(key: str, generation: int) -> bool:
+    """
+    Checks whether the given generation is still the latest one of the
+    object.
+    """
+    return cache.get(_get_cache_key(key, generation + 1)) is None
+
+
+@contextmanager
+def running(generation: tuple):
+    """
+    Makes ``is_superseded`` check the given generation while the block runs.
+
+    :param generation: The key of the object and the generation the running
+                       task was dispatched in, ``None`` if it can't be
+                       superseded.
+    """
+    outer = getattr(_running, 'generation', None)
+    _running.generation = generation
+    try:
+        yield
+    finally:
+        _running.generation = outer
+
+
+def is_superseded() -> bool:
+    """
+    Checks whether the responder running in the current thread works on an
+    outdated head and should stop without writing anything.
+    """
+    generation = getattr(_running, 'generation', None)
+    return generation is not None and not is_current(*generation)
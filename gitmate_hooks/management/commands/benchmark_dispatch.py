@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from gitmate_config.models import Repository
+from gitmate_hooks.benchmark import benchmark_dispatch
+from gitmate_hooks.utils import ResponderRegistrar
+
+
+class Command(BaseCommand):
+    help = ('Measures the overhead of dispatching an event to the responders '
+            'of a repository, compared to publishing their messages.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('repo', help='The full name of the repository.')
+        parser.add_argument('event',
+                            help='The event to dispatch, e.g. '
+                                 'MergeRequestActions.OPENED.')
+        parser.add_argument('--iterations', type=int, default=1000,
+                            help='The number of dispatches to measure.')
+
+    def handle(self, *args, **options):
+        repo = Repository.objects.filter(full_name=options['repo']).first()
+        if repo is None:
+            raise CommandError(f'Unknown repository {options["repo"]}.')
+
+        events = {str(event): event
+                  for event in ResponderRegistrar._get_dispatch_table()}
+        if options['event'] not in events:
+            raise CommandError(f'No responders registered for '
+                               f'{options["event"]}.')
+
+        timings = benchmark_dispatch(
+            events[options['event']], repo, options['iterations'])
+        self.stdout.write(f'responders: {timings["responders"]}')
+        for phase in ('select', 'dispatch', 'publish'):
+            self.stdout.write(f'{phase}: {timings[phase] * 10 ** 6:.1f}us')
@@ -0,0 +1,50 @@
+from glob import glob
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from gitmate_hooks.benchmark import DEFAULT_CASSETTES
+from gitmate_hooks.benchmark import FakeHoster
+from gitmate_hooks.benchmark import WebhookBenchmark
+from gitmate_hooks.benchmark import format_report
+from gitmate_hooks.benchmark import in_process_celery
+from gitmate_hooks.benchmark import load_payloads
+
+
+class Command(BaseCommand):
+    help = ('Sends recorded webhook deliveries to the receivers at a fixed '
+            'rate, against an in-process broker and a fake hoster, and '
+            'reports latencies, published tasks and broker message sizes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payloads',
+                            help='A file with one JSON object with provider, '
+                                 'event and webhook keys per line, defaults '
+                                 'to the webhook event log.')
+        parser.add_argument('--cassettes', nargs='+',
+                            help='The VCR cassettes the fake hoster answers '
+                                 'from, defaults to the ones of the tests.')
+        parser.add_argument('--rate', type=float, default=10,
+                            help='The deliveries sent per second.')
+        parser.add_argument('--count', type=int, default=100,
+                            help='The number of deliveries sent.')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='The number of concurrent clients.')
+        parser.add_argument('--drain-timeout', type=float, default=60,
+                            help='The seconds to wait for the tasks to '
+                                 'finish after the last delivery was sent.')
+
+    def handle(self, *args, **options):
+        payloads = load_payloads(options['payloads'])
+        if not payloads:
+            raise CommandError('There are no recorded deliveries to send.')
+
+        hoster = FakeHoster(options['cassettes'] or glob(DEFAULT_CASSETTES))
+        benchmark = WebhookBenchmark(payloads,
+                                     rate=options['rate'],
+                                     count=options['count'],
+                                     concurrency=options['concurrency'])
+        with hoster.serve(), in_process_celery():
+            report = benchmark.run(options['drain_timeout'])
+
+        self.stdout.write(format_report(report, hoster))
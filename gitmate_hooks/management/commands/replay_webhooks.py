@@ -0,0 +1,91 @@
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+from gitmate_hooks.models import WebhookEvent
+from gitmate_hooks.webhooks import WEBHOOK_HANDLERS
+
+
+def _replay(entry: WebhookEvent):
+    try:
+        WEBHOOK_HANDLERS[entry.provider](entry.event,
+                                         entry.webhook,
+                                         entry.received_at.timestamp(),
+                                         entry.delivery,
+                                         log=False)
+    except Http404:
+        # the repository was deactivated or removed in the meantime
+        pass
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Replays logged webhook deliveries through the handlers, e.g. to '
+            'recover from an outage or to exercise new responders.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=parse_datetime,
+                            help='Only replay deliveries received at or '
+                                 'after this ISO 8601 timestamp.')
+        parser.add_argument('--until', type=parse_datetime,
+                            help='Only replay deliveries received before '
+                                 'this ISO 8601 timestamp.')
+        parser.add_argument('--repo',
+                            help='Only replay deliveries of the repository '
+                                 'with this full name.')
+        parser.add_argument('--provider',
+                            help='Only replay deliveries from this provider.')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='The number of deliveries replayed at once.')
+
+    def handle(self, *args, **options):
+        entries = WebhookEvent.objects.order_by('received_at', 'pk')
+        if options['since']:
+            entries = entries.filter(received_at__gte=options['since'])
+        if options['until']:
+            entries = entries.filter(received_at__lt=options['until'])
+        if options['repo']:
+            entries = entries.filter(repo__full_name=options['repo'])
+        if options['provider']:
+            entries = entries.filter(provider=options['provider'])
+
+        concurrency = max(options['concurrency'], 1)
+        replayed = failed = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = {}
+            # deliveries are streamed from the database, so only submit a
+            # bounded number of them at once to keep memory usage flat
+            for entry in entries.iterator():
+                if len(pending) >= 2 * concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        failed += self._collect(future, pending.pop(future))
+                pending[executor.submit(_replay, entry)] = entry
+                replayed += 1
+
+            for future, entry in pending.items():
+                failed += self._collect(future, entry)
+
+        self.stdout.write(f'Replayed {replayed} webhook deliveries.')
+        if failed:
+            self.stderr.write(f'{failed} webhook deliveries failed.')
+
+    def _collect(self, future, entry: WebhookEvent) -> bool:
+        """
+        Logs the error of a failed delivery, so that it doesn't abort the
+        replay of the remaining ones. Returns whether it failed.
+        """
+        try:
+            future.result()
+        except Exception as exc:
+            self.stderr.write(f'Replaying {entry.provider} delivery '
+                              f'{entry.delivery or entry.pk} ({entry.event}) '
+                              f'failed: {exc!r}')
+            return True
+        return False
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from gitmate.metrics import get_metrics
+
+
+class Command(BaseCommand):
+    help = 'Prints the counters and gauges collected by GitMate.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('prefix', nargs='?', default='',
+                            help='Only show metrics starting with the prefix.')
+
+    def handle(self, *args, **options):
+        for name, value in get_metrics(options['prefix']).items():
+            self.stdout.write(f'{name}: {value}')
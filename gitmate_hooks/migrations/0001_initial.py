@@ -0,0 +1,32 @@
+# Generated by Django 2.0.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('gitmate_config', '0025_auto_20180606_2301'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=32)),
+                ('event', models.CharField(max_length=64)),
+                ('delivery', models.CharField(db_index=True, max_length=64, null=True)),
+                ('received_at', models.DateTimeField(db_index=True)),
+                ('payload', models.BinaryField()),
+                ('repo', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='webhook_events', to='gitmate_config.Repository')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='webhookevent',
+            index_together={('repo', 'received_at')},
+        ),
+    ]
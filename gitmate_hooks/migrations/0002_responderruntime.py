@@ -0,0 +1,23 @@
+# Generated by Django 2.0.7 on 2026-10-18 14:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gitmate_hooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponderRuntime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responder', models.CharField(max_length=255, unique=True)),
+                ('samples', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), default=list, size=None)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
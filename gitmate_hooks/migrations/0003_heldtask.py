@@ -0,0 +1,33 @@
+# Generated by Django 2.0.7 on 2026-10-18 15:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gitmate_config', '0026_auto_20261018_1200'),
+        ('gitmate_hooks', '0002_responderruntime'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeldTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=255)),
+                ('message', models.BinaryField()),
+                ('queue', models.CharField(max_length=64)),
+                ('priority', models.PositiveSmallIntegerField()),
+                ('countdown', models.FloatField(null=True)),
+                ('held_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('repo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='held_tasks', to='gitmate_config.Repository')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='heldtask',
+            index_together={('repo', 'held_at')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.0.7 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gitmate_hooks', '0003_heldtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='heldtask',
+            name='key',
+            field=models.CharField(db_index=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.0.7 on 2026-10-18 17:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gitmate_hooks', '0004_heldtask_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponderOutcome',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responder', models.CharField(max_length=255)),
+                ('event', models.CharField(max_length=64, null=True)),
+                ('key', models.CharField(max_length=255, null=True)),
+                ('status', models.CharField(choices=[('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped')], max_length=16)),
+                ('duration', models.FloatField()),
+                ('api_calls', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('finished_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='responderoutcome',
+            index_together={('key', 'finished_at'), ('responder', 'finished_at')},
+        ),
+    ]
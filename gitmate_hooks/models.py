@@ -0,0 +1,148 @@
+import json
+import zlib
+
+from django.contrib.postgres import fields as psql_fields
+from django.db import models
+from django.utils import timezone
+
+from gitmate.metrics import percentile
+from gitmate_config.models import Repository
+
+
+class WebhookEvent(models.Model):
+    """
+    An append-only log of the webhook deliveries accepted by GitMate, which
+    can be replayed with the ``replay_webhooks`` management command.
+    """
+    # the provider the delivery was received from
+    provider = models.CharField(max_length=32)
+
+    # the event header of the delivery
+    event = models.CharField(max_length=64)
+
+    # the delivery identifier, see ``gitmate_hooks.webhooks.get_delivery_id``
+    delivery = models.CharField(max_length=64, null=True, db_index=True)
+
+    # the repository the delivery belongs to, if any
+    repo = models.ForeignKey(Repository, models.SET_NULL, null=True,
+                             related_name='webhook_events')
+
+    received_at = models.DateTimeField(db_index=True)
+
+    # the zlib compressed JSON payload of the delivery
+    payload = models.BinaryField()
+
+    def __str__(self):  # pragma: no cover
+        return f'{self.provider}:{self.event}#{self.delivery}'
+
+    @property
+    def webhook(self) -> dict:
+        """
+        Returns the decompressed payload of the delivery.
+        """
+        return json.loads(zlib.decompress(bytes(self.payload)).decode('utf-8'))
+
+    @webhook.setter
+    def webhook(self, data: dict):
+        self.payload = zlib.compress(json.dumps(data).encode('utf-8'))
+
+    class Meta:
+        index_together = ('repo', 'received_at')
+
+
+class ResponderRuntime(models.Model):
+    """
+    The latest measured runtimes of a responder, which decide the queue it is
+    routed to, see ``gitmate_hooks.routing``.
+    """
+    # the name of the responder's celery task
+    responder = models.CharField(max_length=255, unique=True)
+
+    # the runtimes in seconds, oldest first
+    samples = psql_fields.ArrayField(models.FloatField(), default=list)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):  # pragma: no cover
+        return self.responder
+
+    def get_percentile(self, pct: float) -> float:
+        """
+        Returns the given percentile of the runtimes in seconds.
+        """
+        return percentile(self.samples, pct)
+
+
+class HeldTask(models.Model):
+    """
+    A responder task held back because its repository had too many tasks in
+    flight, see ``gitmate_hooks.fairness``, because another task for its
+    object was in flight, see ``gitmate_hooks.serial``, or because its hoster
+    was failing, see ``gitmate_hooks.deferral``.
+    """
+    repo = models.ForeignKey(Repository, models.CASCADE,
+                             related_name='held_tasks')
+
+    # the name of the celery task
+    task = models.CharField(max_length=255)
+
+    # the task arguments, serialized like task messages
+    message = models.BinaryField()
+
+    # the object key the task waits for, if it is held for its object rather
+    # than its repository, see ``gitmate_hooks.serial``, or the hoster it
+    # waits for, prefixed with ``circuit:``
+    key = models.CharField(max_length=255, null=True, db_index=True)
+
+    queue = models.CharField(max_length=64)
+    priority = models.PositiveSmallIntegerField()
+    countdown = models.FloatField(null=True)
+    held_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):  # pragma: no cover
+        return f'{self.task}@{self.repo_id}'
+
+    class Meta:
+        index_together = ('repo', 'held_at')
+
+
+class ResponderOutcome(models.Model):
+    """
+    The outcome of a responder task, recorded in batches when results are
+    ignored, see ``gitmate_hooks.outcomes``.
+    """
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+    STATUSES = ((SUCCEEDED, 'Succeeded'),
+                (FAILED, 'Failed'),
+                (SKIPPED, 'Skipped'))
+
+    # the name of the responder's celery task
+    responder = models.CharField(max_length=255)
+
+    # the event the responder was dispatched for, if any
+    event = models.CharField(max_length=64, null=True)
+
+    # the key of the object the responder worked on, if any
+    key = models.CharField(max_length=255, null=True)
+
+    status = models.CharField(max_length=16, choices=STATUSES)
+
+    # the runtime in seconds
+    duration = models.FloatField()
+
+    # the requests sent to the hoster, see ``gitmate.http_cache``
+    api_calls = models.PositiveIntegerField(default=0)
+
+    # the class name of the exception a failed responder raised
+    error = models.CharField(max_length=255, blank=True)
+
+    finished_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):  # pragma: no cover
+        return f'{self.responder}:{self.status}'
+
+    class Meta:
+        index_together = (('key', 'finished_at'),
+                          ('responder', 'finished_at'))
@@ -0,0 +1,94 @@
+"""
+This module contains the completion ledger of responder tasks.
+
+With ``RESPONDER_IGNORE_RESULTS`` turned on, responder tasks don't send their
+return values back through the result backend, as nobody waits for them.
+Instead, workers record the outcome of every responder task in
+``ResponderOutcome``: whether it succeeded, failed or was skipped, its
+runtime, the requests it sent to the hoster and the exception it raised, if
+any. This answers whether a responder ran for an event without a reply
+message per task.
+
+The outcomes are buffered per process and stored with a single query once
+``RESPONDER_OUTCOME_BATCH`` of them were collected or
+``RESPONDER_OUTCOME_INTERVAL`` seconds passed. ``prune_responder_outcomes``
+removes them after ``RESPONDER_OUTCOME_RETENTION`` days.
+"""
+from threading import Lock
+from time import monotonic
+import logging
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+
+from gitmate.utils import get_object_key
+from gitmate_hooks.models import ResponderOutcome
+
+
+# outcomes recorded by this process which weren't stored yet
+_buffer = []
+_buffer_lock = Lock()
+_flushed_at = monotonic()
+
+
+def record(responder: str,
+           dispatch: dict,
+           args: tuple,
+           status: str,
+           duration: float = 0.0,
+           api_calls: int = 0,
+           error: str = ''):
+    """
+    Records the outcome of a responder task.
+
+    :param responder: The name of the responder task.
+    :param dispatch:  The dispatch state the task was invoked with.
+    :param args:      The arguments the task was invoked with.
+    :param status:    One of the ``ResponderOutcome`` statuses.
+    :param duration:  The runtime in seconds.
+    :param api_calls: The number of requests sent to the hoster.
+    :param error:     The class name of the exception raised, if any.
+    """
+    if not settings.RESPONDER_IGNORE_RESULTS:
+        return
+
+    key = None
+    if args and hasattr(args[0], 'url'):
+        key = get_object_key(args[0])
+    outcome = ResponderOutcome(responder=responder,
+                               event=dispatch.get('event'),
+                               key=key,
+                               status=status,
+                               duration=duration,
+                               api_calls=api_calls,
+                               error=error)
+
+    with _buffer_lock:
+        _buffer.append(outcome)
+        if (len(_buffer) < settings.RESPONDER_OUTCOME_BATCH and
+                monotonic() - _flushed_at <
+                settings.RESPONDER_OUTCOME_INTERVAL):
+            return
+    flush()
+
+
+def flush():
+    """
+    Stores the outcomes recorded by this process.
+    """
+    global _flushed_at
+
+    with _buffer_lock:
+        outcomes = list(_buffer)
+        _buffer.clear()
+        _flushed_at = monotonic()
+
+    try:
+        ResponderOutcome.objects.bulk_create(outcomes)
+    except Exception:  # pragma: no cover, the responders themselves finished
+        logging.exception('Storing responder outcomes failed.')
+
+
+@worker_process_shutdown.connect
+def _flush_on_shutdown(**kwargs):  # pragma: no cover
+    flush()
@@ -0,0 +1,143 @@
+"""
+This module contains a per-process cache which resolves webhook deliveries to
+their repository and token, so that the receive path doesn't query the
+database in the steady state.
+
+The ``post_save`` and ``post_delete`` signals of the models involved bump a
+version stored in the django cache, and every process drops its entries once
+it sees a new version, so changes take effect everywhere with the next
+delivery. Entries additionally expire after ``WEBHOOK_RESOLUTION_CACHE_TTL``
+seconds, in case the version is evicted from the django cache. Deliveries for
+unknown repositories aren't cached, so repositories resolve as soon as they
+are activated.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.http import Http404
+from IGitt.Interfaces import Token as IGittToken
+from social_django.models import UserSocialAuth
+
+from gitmate.utils import ExpiringCache
+from gitmate_config.models import Installation
+from gitmate_config.models import Repository
+
+
+class ResolutionCache:
+    """
+    Maps a provider and repository identifier or full name to the repository
+    and its token, and a provider and installation identifier to the
+    installation token.
+    """
+    VERSION_KEY = 'webhook-resolution-version'
+
+    def __init__(self, max_entries: int, timeout: float):
+        self._repos = ExpiringCache(max_entries, timeout)
+        self._installations = ExpiringCache(max_entries, timeout)
+        self._fields = [field.attname for field in Repository._meta.fields]
+        self._version = None
+
+    def _sync(self):
+        """
+        Drops the local entries if another process invalidated them since.
+        """
+        version = cache.get(self.VERSION_KEY)
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def _load_repository(self, provider: str, lookup: dict):
+        repo = Repository.objects.filter(
+            active=True, provider=provider, **lookup).first()
+        if repo is None:
+            return None
+        return [getattr(repo, name) for name in self._fields], repo.token
+
+    def get_repository(self,
+                       provider: str,
+                       identifier: int = None,
+                       full_name: str = None,
+                       pk: int = None) -> (Repository, IGittToken):
+        """
+        Returns the active repository with the given primary key, identifier
+        or full name, in that order of preference, along with its token.
+
+        Every call returns a fresh ``Repository`` instance, so callers may
+        modify it without affecting other deliveries.
+
+        :raises Http404: If no such active repository exists.
+        """
+        if pk is not None:
+            key, lookup = (provider, 'pk', pk), {'pk': pk}
+        elif identifier is not None:
+            key, lookup = ((provider, 'identifier', identifier),
+                           {'identifier': identifier})
+        else:
+            key, lookup = ((provider, 'full_name', full_name),
+                           {'full_name': full_name})
+
+        self._sync()
+        entry = self._repos.get(key)
+        if entry is None:
+            entry = self._load_repository(provider, lookup)
+            if entry is None:
+                raise Http404
+            self._repos.set(key, entry)
+
+        values, token = entry
+        repo = Repository.from_db('default', self._fields, values)
+        repo.plugins = list(repo.plugins)
+        return repo, token
+
+    def get_installation_token(self,
+                               provider: str,
+                               identifier: int) -> IGittToken:
+        """
+        Returns the token of the installation with the given identifier,
+        creating the installation if it doesn't exist yet.
+        """
+        self._sync()
+        token = self._installations.get((provider, identifier))
+        if token is None:
+            installation, _ = Installation.objects.get_or_create(
+                provider=provider, identifier=identifier)
+            token = installation.token
+            self._installations.set((provider, identifier), token)
+        return token
+
+    def clear(self):
+        """
+        Drops the cached resolutions of this process.
+        """
+        self._repos.clear()
+        self._installations.clear()
+
+    def invalidate(self):
+        """
+        Drops the cached resolutions of all processes.
+        """
+        cache.set(self.VERSION_KEY, uuid4().hex, timeout=None)
+        self.clear()
+
+
+resolutions = ResolutionCache(settings.WEBHOOK_RESOLUTION_CACHE_MAX_ENTRIES,
+                              settings.WEBHOOK_RESOLUTION_CACHE_TTL)
+
+
+@receiver(post_save, sender=Repository)
+@receiver(post_delete, sender=Repository)
+@receiver(post_save, sender=Installation)
+@receiver(post_delete, sender=Installation)
+@receiver(post_save, sender=UserSocialAuth)
+@receiver(post_delete, sender=UserSocialAuth)
+def invalidate_resolutions(**kwargs):
+    """
+    Drops all cached resolutions when a repository, installation or user
+    token changes. Such changes are rare compared to webhook deliveries, so
+    there's no point in tracking the affected entries.
+    """
+    resolutions.invalidate()
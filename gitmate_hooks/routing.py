@@ -0,0 +1,129 @@
+"""
+This module contains the adaptive queue routing of responders.
+
+Workers measure the runtime of every task and keep the latest
+``RESPONDER_RUNTIME_SAMPLES`` runtimes of each in ``ResponderRuntime``. The
+queue a responder belongs on is derived from the 95th percentile of its
+runtimes: it is the first queue whose limit in ``RESPONDER_QUEUE_LIMITS``
+isn't exceeded, or the long queue. ``RESPONDER_ADAPTIVE_ROUTING`` decides what
+happens when that differs from the queue the responder was registered with:
+``'advise'`` logs a warning, ``'override'`` routes the responder to the
+observed queue and ``'off'`` neither measures nor routes.
+"""
+from collections import defaultdict
+from threading import Lock
+from time import monotonic
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from gitmate.metrics import increment
+from gitmate.metrics import percentile
+from gitmate.utils import ExpiringCache
+from gitmate_config.enums import TaskQueue
+from gitmate_hooks.models import ResponderRuntime
+
+
+ROUTING_PERCENTILE = 95
+
+# runtimes measured by this process which weren't stored yet
+_buffer = defaultdict(list)
+_buffer_lock = Lock()
+_flushed_at = monotonic()
+
+# the observed queue of each responder, reloaded periodically
+_routes = ExpiringCache(max_entries=1)
+_advised = set()
+
+
+def record_runtime(responder: str, seconds: float):
+    """
+    Records a runtime of the given responder task. The runtimes are stored
+    every ``RESPONDER_RUNTIME_INTERVAL`` seconds.
+    """
+    global _flushed_at
+
+    if settings.RESPONDER_ADAPTIVE_ROUTING == 'off':
+        return
+
+    with _buffer_lock:
+        _buffer[responder].append(seconds)
+        if monotonic() - _flushed_at < settings.RESPONDER_RUNTIME_INTERVAL:
+            return
+        runtimes = dict(_buffer)
+        _buffer.clear()
+        _flushed_at = monotonic()
+
+    try:
+        store_runtimes(runtimes)
+    except Exception:  # pragma: no cover, the responder itself succeeded
+        logging.exception('Storing responder runtimes failed.')
+
+
+def store_runtimes(runtimes: dict):
+    """
+    Appends the given runtimes to the stored ones of each responder, keeping
+    the latest ``RESPONDER_RUNTIME_SAMPLES``.
+
+    :param runtimes: The runtimes in seconds by responder task name.
+    """
+    for responder, samples in runtimes.items():
+        with transaction.atomic():
+            runtime, _ = ResponderRuntime.objects.select_for_update(
+                ).get_or_create(responder=responder)
+            runtime.samples = (runtime.samples + samples)[
+                -settings.RESPONDER_RUNTIME_SAMPLES:]
+            runtime.save()
+
+
+def get_observed_queue(samples: list) -> TaskQueue:
+    """
+    Returns the queue the given runtimes belong on, or ``None`` if there are
+    less than ``RESPONDER_RUNTIME_MIN_SAMPLES`` of them.
+    """
+    if len(samples) < settings.RESPONDER_RUNTIME_MIN_SAMPLES:
+        return None
+
+    runtime = percentile(samples, ROUTING_PERCENTILE)
+    for queue in (TaskQueue.SHORT, TaskQueue.MEDIUM):
+        limit = settings.RESPONDER_QUEUE_LIMITS.get(queue.value)
+        if limit is not None and runtime <= limit:
+            return queue
+    return TaskQueue.LONG
+
+
+def _get_observed_queues() -> dict:
+    queues = _routes.get('queues')
+    if queues is None:
+        queues = {}
+        for runtime in ResponderRuntime.objects.all():
+            queue = get_observed_queue(runtime.samples)
+            if queue is not None:
+                queues[runtime.responder] = queue.value
+        _routes.set('queues', queues,
+                    timeout=settings.RESPONDER_RUNTIME_INTERVAL)
+    return queues
+
+
+def get_queue(task) -> str:
+    """
+    Returns the queue to publish the given responder task to.
+    """
+    if settings.RESPONDER_ADAPTIVE_ROUTING == 'off':
+        return task.queue
+
+    observed = _get_observed_queues().get(task.name, task.queue)
+    if observed == task.queue:
+        return task.queue
+
+    if settings.RESPONDER_ADAPTIVE_ROUTING == 'override':
+        increment('responders.rerouted')
+        return observed
+
+    if task.name not in _advised:
+        _advised.add(task.name)
+        logging.warning(f'Responder {task.name} is registered for the '
+                        f'{task.queue} queue, but its runtimes suggest the '
+                        f'{observed} queue.')
+    return task.queue
@@ -0,0 +1,132 @@
+"""
+This module contains the keyed serial execution of responder tasks.
+
+With ``RESPONDER_SERIAL_KEYS`` turned on, the tasks for an issue, merge
+request or commit carry the key of that object and only one of them is in
+flight at a time. Further tasks for the same object are held in the
+``HeldTask`` backlog instead of being published, so that they don't occupy
+worker slots waiting for the lock the running task holds. When the running
+task finishes, the oldest held task for the object is published in its
+place. The ``drain_held_tasks`` task publishes held tasks whose object isn't
+taken anymore, e.g. because the key expired after ``SERIAL_KEY_TIMEOUT``
+seconds.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from gitmate.celery import app as celery
+from gitmate.metrics import increment
+from gitmate.serialization import dumps
+from gitmate.serialization import loads
+from gitmate.utils import get_object_key
+from gitmate_hooks import deferral
+from gitmate_hooks import fairness
+from gitmate_hooks.models import HeldTask
+
+
+def get_key(args: tuple) -> str:
+    """
+    Returns the key of the object a responder invoked with the given
+    arguments works on, or ``None`` if it isn't executed serially.
+    """
+    if not settings.RESPONDER_SERIAL_KEYS or not args:
+        return None
+    if not hasattr(args[0], 'url'):
+        # e.g. scheduled responders working on a repository
+        return None
+    return get_object_key(args[0])
+
+
+def _get_cache_key(key: str) -> str:
+    return 'serial-key:' + key
+
+
+def acquire(key: str) -> bool:
+    """
+    Takes the key for a task about to be published. Fails if another task
+    for the key is in flight or held, the task has to be held then.
+    """
+    if HeldTask.objects.filter(key=key).exists():
+        return False
+    return cache.add(_get_cache_key(key), True,
+                     timeout=settings.SERIAL_KEY_TIMEOUT)
+
+
+def hold(repo, key: str, task, args: tuple, kwargs: dict, countdown: float,
+         priority: int, queue: str):
+    """
+    Adds the given task to the backlog of the key.
+    """
+    HeldTask.objects.create(repo=repo,
+                            key=key,
+                            task=task.name,
+                            message=dumps((args, kwargs)),
+                            queue=queue,
+                            priority=priority,
+                            countdown=countdown)
+    increment('responders.serialized')
+
+
+def _pop(key: str) -> HeldTask:
+    with transaction.atomic():
+        held = HeldTask.objects.select_for_update(skip_locked=True).filter(
+            key=key).order_by('held_at', 'id').first()
+        if held is not None:
+            held.delete()
+    return held
+
+
+def release(key: str):
+    """
+    Publishes the next held task for the key, which takes the key over, or
+    frees the key if there is none.
+    """
+    held = _pop(key)
+    if held is None:
+        cache.delete(_get_cache_key(key))
+        return
+
+    cache.set(_get_cache_key(key), True, timeout=settings.SERIAL_KEY_TIMEOUT)
+    try:
+        args, kwargs = loads(bytes(held.message))
+    except Http404:
+        # the repository was deactivated in the meantime
+        release(key)
+        return
+
+    task = celery.tasks[held.task]
+    tenant = fairness.get_tenant(held.repo)
+    if tenant is not None:
+        # the task didn't take a slot of its repository while it was held
+        slot = fairness.admit(tenant)
+        if slot is None:
+            fairness.hold(tenant, task, args, kwargs, held.countdown,
+                          held.priority, held.queue)
+            return
+        kwargs = fairness.occupy(kwargs, tenant, slot)
+
+    try:
+        task.apply_async(args, kwargs, countdown=held.countdown,
+                         queue=held.queue, priority=held.priority)
+    except Exception:  # pragma: no cover
+        logging.exception(f'Publishing held task {held.task} failed.')
+        if tenant is not None:
+            fairness.release(tenant, slot)
+        release(key)
+
+
+def drain():
+    """
+    Publishes the oldest held task of every key which isn't taken.
+    """
+    keys = HeldTask.objects.exclude(key=None).exclude(
+        key__startswith=deferral.KEY_PREFIX).order_by('key').values_list(
+        'key', flat=True).distinct()
+    for key in keys:
+        if cache.add(_get_cache_key(key), True,
+                     timeout=settings.SERIAL_KEY_TIMEOUT):
+            release(key)
@@ -0,0 +1,96 @@
+"""
+This module contains the load shedding of housekeeping responders.
+
+Before a housekeeping responder is dispatched, the depth of its queue is
+looked up. Beyond ``HOUSEKEEPING_DEFER_DEPTH`` waiting messages the responder
+is delayed by ``HOUSEKEEPING_DEFER_DELAY`` seconds and beyond
+``HOUSEKEEPING_SHED_DEPTH`` it is dropped. Housekeeping responders which
+waited longer than ``HOUSEKEEPING_MAX_AGE`` seconds to be run are dropped by
+the worker as well. Every threshold is disabled when set to ``0``.
+"""
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from gitmate.celery import app as celery
+from gitmate.metrics import increment
+from gitmate.metrics import set_gauge
+from gitmate_config.enums import TaskPriority
+
+
+# message priorities of the priority classes, brokers which support them
+# deliver higher ones first
+MESSAGE_PRIORITIES = {
+    TaskPriority.INTERACTIVE: 9,
+    TaskPriority.STATUS_CRITICAL: 5,
+    TaskPriority.HOUSEKEEPING: 0,
+}
+
+
+def get_queue_depth(queue: str) -> int:
+    """
+    Returns the number of messages waiting in the given queue. The depth is
+    probed at most every ``QUEUE_DEPTH_PROBE_INTERVAL`` seconds and is
+    always ``0`` when tasks are run eagerly.
+    """
+    if celery.conf.task_always_eager:
+        return 0
+
+    key = 'queue-depth:' + queue
+    depth = cache.get(key)
+    if depth is None:
+        try:
+            with celery.connection_or_acquire() as conn:
+                depth = conn.default_channel.queue_declare(
+                    queue=queue, passive=True).message_count
+        except Exception:  # pragma: no cover, broker unreachable
+            depth = 0
+        cache.set(key, depth, timeout=settings.QUEUE_DEPTH_PROBE_INTERVAL)
+        set_gauge(f'queues.{queue}.depth', depth)
+    return depth
+
+
+def admit_housekeeping(queue: str) -> (bool, float):
+    """
+    Decides whether a housekeeping responder may be dispatched to the given
+    queue right now. Updates the ``responders.shed`` and
+    ``responders.deferred`` counters accordingly.
+
+    :return: Whether the responder may be dispatched and the countdown to
+             dispatch it with, if any.
+    """
+    shed_depth = settings.HOUSEKEEPING_SHED_DEPTH
+    defer_depth = settings.HOUSEKEEPING_DEFER_DEPTH
+    if not (shed_depth or defer_depth):
+        return True, None
+
+    depth = get_queue_depth(queue)
+    if shed_depth and depth >= shed_depth:
+        increment('responders.shed')
+        return False, None
+    if defer_depth and depth >= defer_depth:
+        increment('responders.deferred')
+        return True, settings.HOUSEKEEPING_DEFER_DELAY
+    return True, None
+
+
+def get_deadline(countdown: float = None) -> float:
+    """
+    Returns the time after which a housekeeping responder dispatched now with
+    the given countdown is dropped, or ``None`` if it never is.
+    """
+    if not settings.HOUSEKEEPING_MAX_AGE:
+        return None
+    return time() + (countdown or 0) + settings.HOUSEKEEPING_MAX_AGE
+
+
+def is_expired(deadline: float) -> bool:
+    """
+    Checks whether a housekeeping responder with the given deadline is to be
+    dropped and updates the ``responders.shed`` counter accordingly.
+    """
+    if time() <= deadline:
+        return False
+    increment('responders.shed')
+    return True
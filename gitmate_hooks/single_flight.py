@@ -0,0 +1,122 @@
+"""
+This module contains the single-flight deduplication of identical work.
+
+With ``RESPONDER_SINGLE_FLIGHT`` turned on, a responder task for an issue,
+merge request or commit is only dispatched if no identical task is in flight,
+i.e. one for the same responder, arguments and options, which was dispatched
+for the same state of the object, debounce token and head generation.
+Otherwise the dispatch is coalesced into the one in flight, e.g. when two
+deliveries arrive for the same merge request at once. The state is told by the
+``updated_at`` time of the payload the object was built from, objects without
+one aren't coalesced. Work on the head of a merge request, see
+``generations.HEAD_EVENTS``, is only coalesced within a generation, as a new
+head couldn't be told apart otherwise. A task counts as in flight until it
+finishes or ``RESPONDER_SINGLE_FLIGHT_TIMEOUT`` seconds passed, in case it got
+lost.
+
+``fill`` does the same for filling a cache shared by processes, e.g. with the
+results of an expensive analysis: only one process computes the value while
+the others wait for it and read it from the cache.
+"""
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+from django_pglocks import advisory_lock
+
+from gitmate.metrics import increment
+from gitmate.utils import get_object_key
+from gitmate_hooks.generations import HEAD_EVENTS
+
+
+def _get_identity(arg) -> str:
+    if hasattr(arg, 'url'):
+        return get_object_key(arg)
+    return repr(arg)
+
+
+def _get_version(obj):
+    # look at the data the object holds already, fetching it defeats the point
+    data = vars(obj).get('_data')
+    if data is None or 'updated_at' not in data:
+        return None
+    return data['updated_at']
+
+
+def get_key(task, event, args: tuple, options: dict, dispatch: dict) -> str:
+    """
+    Returns the key identifying the work the task does when invoked with the
+    given arguments, or ``None`` if it isn't deduplicated.
+
+    :param task:     The responder task.
+    :param event:    The event the task is dispatched for.
+    :param args:     The arguments of the event.
+    :param options:  The options the responder is invoked with.
+    :param dispatch: The dispatch state of the event.
+    """
+    if not settings.RESPONDER_SINGLE_FLIGHT or not args:
+        return None
+    if not hasattr(args[0], 'url'):
+        # e.g. scheduled responders working on a repository
+        return None
+    if event in HEAD_EVENTS and 'generation' not in dispatch:
+        # the task in flight may work on an older head
+        return None
+    version = _get_version(args[0])
+    if version is None:
+        # the task in flight may work on an older state of the object
+        return None
+
+    identity = (task.name,
+                [_get_identity(arg) for arg in args],
+                version,
+                sorted(options.items()),
+                dispatch.get('debounce'),
+                dispatch.get('generation'))
+    return sha1(repr(identity).encode()).hexdigest()
+
+
+def _get_cache_key(key: str) -> str:
+    return 'single-flight:' + key
+
+
+def join(key: str) -> bool:
+    """
+    Marks the work as in flight. Fails if it's in flight already, the task
+    mustn't be dispatched then.
+    """
+    if cache.add(_get_cache_key(key), True,
+                 timeout=settings.RESPONDER_SINGLE_FLIGHT_TIMEOUT):
+        return True
+    increment('responders.coalesced')
+    return False
+
+
+def leave(key: str):
+    """
+    Marks the work as done, identical work is dispatched again afterwards.
+    """
+    cache.delete(_get_cache_key(key))
+
+
+def fill(key: str, lookup, compute):
+    """
+    Returns the cached value, computing it if it isn't cached yet. Processes
+    filling the same key at the same time wait for the first one instead of
+    computing the value as well.
+
+    :param key:     The key of the value.
+    :param lookup:  Returns the cached value or ``None`` if it isn't cached.
+    :param compute: Computes the value and caches it.
+    """
+    value = lookup()
+    if value is not None:
+        return value
+
+    with advisory_lock('single-flight:' + key):
+        # the value may have been filled while waiting for the lock
+        value = lookup()
+        if value is not None:
+            increment('single_flight.joined')
+            return value
+        return compute()
@@ -0,0 +1,85 @@
+from datetime import timedelta
+import json
+
+from celery.schedules import crontab
+from django.conf import settings
+from django.http import Http404
+from django.utils import timezone
+
+from gitmate.celery import app as celery
+from gitmate_config.enums import TaskQueue
+from gitmate_hooks import deferral
+from gitmate_hooks import fairness
+from gitmate_hooks import serial
+from gitmate_hooks.models import ResponderOutcome
+from gitmate_hooks.models import WebhookEvent
+from gitmate_hooks.utils import ExceptionLoggerTask
+from gitmate_hooks.utils import ResponderRegistrar
+from gitmate_hooks.webhooks import WEBHOOK_EVENT_HEADERS
+from gitmate_hooks.webhooks import WEBHOOK_HANDLERS
+from gitmate_hooks.webhooks import get_delivery_id
+
+
+@celery.task(base=ExceptionLoggerTask,
+             queue=TaskQueue.SHORT.value,
+             ignore_result=True)
+def ingest_webhook(provider: str,
+                   headers: dict,
+                   body: str,
+                   received_at: float = None):
+    """
+    Processes a webhook delivery which was accepted by the receivers without
+    being handled, i.e. resolves the repository, builds the IGitt objects and
+    invokes the responders.
+
+    :param provider:    The provider the delivery was received from.
+    :param headers:     The ``X-*`` request headers of the delivery.
+    :param body:        The raw request body of the delivery.
+    :param received_at: The time the delivery was received.
+    """
+    event = headers[WEBHOOK_EVENT_HEADERS[provider]]
+    delivery = get_delivery_id(provider, headers, body.encode('utf-8'))
+    try:
+        WEBHOOK_HANDLERS[provider](
+            event, json.loads(body), received_at, delivery)
+    except Http404:
+        # the repository was deactivated or removed in the meantime
+        pass
+
+
+@ResponderRegistrar.scheduler(crontab(minute='30', hour='3'))
+def prune_webhook_events():
+    """
+    Removes the deliveries older than ``WEBHOOK_EVENT_LOG_RETENTION`` days
+    from the webhook event log.
+    """
+    prune_before = timezone.now() - timedelta(
+        days=settings.WEBHOOK_EVENT_LOG_RETENTION)
+    WebhookEvent.objects.filter(received_at__lt=prune_before).delete()
+
+
+@ResponderRegistrar.scheduler(crontab(minute='45', hour='3'))
+def prune_responder_outcomes():
+    """
+    Removes the responder outcomes older than ``RESPONDER_OUTCOME_RETENTION``
+    days from the completion ledger.
+    """
+    prune_before = timezone.now() - timedelta(
+        days=settings.RESPONDER_OUTCOME_RETENTION)
+    ResponderOutcome.objects.filter(finished_at__lt=prune_before).delete()
+
+
+@ResponderRegistrar.scheduler(settings.TENANT_DRAIN_INTERVAL)
+def drain_held_tasks():
+    """
+    Publishes the tasks held back for repositories with free slots or objects
+    without a task in flight again, in case a slot or key was freed by
+    expiring rather than by a task finishing. Releases the tasks deferred for
+    hosters which recovered.
+    """
+    if settings.CIRCUIT_BREAKERS:
+        deferral.drain()
+    if settings.RESPONDER_SERIAL_KEYS:
+        serial.drain()
+    if settings.TENANT_MAX_IN_FLIGHT:
+        fairness.drain()
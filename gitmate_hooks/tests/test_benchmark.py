@@ -0,0 +1,54 @@
+from glob import glob
+from os import path
+
+from django.test import TransactionTestCase
+import requests
+
+from gitmate_hooks.benchmark import FakeHoster
+from gitmate_hooks.benchmark import format_report
+from gitmate_hooks.benchmark import percentile
+
+
+class TestWebhookBenchmark(TransactionTestCase):
+
+    def test_percentile(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 99), 5)
+        self.assertEqual(percentile(values, 0), 1)
+
+    def test_fake_hoster(self):
+        cassette = path.join(path.dirname(__file__), 'cassettes',
+                             'TestResponderRegistrar.test_remove_non_'
+                             'existant_repos.yaml')
+        hoster = FakeHoster(glob(cassette))
+
+        with hoster.serve():
+            response = requests.get('https://api.github.com/user/repos',
+                                    params={'per_page': 100})
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(response.json(), list)
+
+            response = requests.get('https://api.github.com/unknown')
+            self.assertEqual(response.status_code, 404)
+
+        self.assertEqual(hoster.matched, 1)
+        self.assertEqual(hoster.unmatched['GET api.github.com/unknown'], 1)
+
+        report = {
+            'deliveries': 2,
+            'duration': 1,
+            'statuses': {200: 2},
+            'receiver_latency': [0.01, 0.02],
+            'published': {'responder': 2},
+            'message_bytes': {'responder': 300},
+            'completion': {'responder': [0.1, 0.2]},
+            'drained': False,
+        }
+        output = format_report(report, hoster)
+        self.assertIn('tasks per delivery: 1.00', output)
+        self.assertIn('broker bytes per delivery: 150', output)
+        self.assertIn('responder: p50=100.0ms', output)
+        self.assertIn('not all tasks finished', output)
+        self.assertIn('GET api.github.com/unknown: 1', output)
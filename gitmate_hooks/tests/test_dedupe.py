@@ -0,0 +1,99 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+
+from gitmate.metrics import get_metrics
+from gitmate.utils import ExpiringCache
+from gitmate_config.models import Installation
+from gitmate_config.tests.test_base import GitmateTestCase
+from gitmate_hooks.webhooks import ResponderRegistrar
+
+
+@override_settings(WEBHOOK_DEDUPE_TTL=60)
+class TestDeliveryDeduplication(GitmateTestCase):
+
+    def test_expiring_cache(self):
+        cache = ExpiringCache(max_entries=2, timeout=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('expired', 3, timeout=0)
+        self.assertNotIn('a', cache)
+        self.assertNotIn('expired', cache)
+        self.assertEqual(cache.get('b'), 2)
+        self.assertEqual(len(cache), 1)
+
+        cache.delete('b')
+        self.assertIsNone(cache.get('b'))
+        cache.set('c', 3)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_github_redelivery(self):
+        Installation.objects.create(identifier=14, provider='github')
+        data = {
+            'action': 'deleted',
+            'installation': {'id': 14},
+            'sender': {'login': self.repo.user.username, 'id': 1}
+        }
+        headers = {'HTTP_X_GITHUB_DELIVERY': 'e2b1f9b0-dedupe-test'}
+        before = get_metrics('webhooks.')
+
+        response = self.simulate_github_webhook_call(
+            'installation', data, headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # the installation is gone by now, so the redelivery would fail if it
+        # were processed again.
+        with patch.object(ResponderRegistrar, 'respond') as m_respond:
+            response = self.simulate_github_webhook_call(
+                'installation', data, headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            m_respond.assert_not_called()
+
+        after = get_metrics('webhooks.')
+        self.assertEqual(after['webhooks.unique'],
+                         before.get('webhooks.unique', 0) + 1)
+        self.assertEqual(after['webhooks.duplicate'],
+                         before.get('webhooks.duplicate', 0) + 1)
+
+        output = StringIO()
+        call_command('show_metrics', 'webhooks.', stdout=output)
+        self.assertIn('webhooks.duplicate', output.getvalue())
+
+    def test_gitlab_redelivery(self):
+        data = {
+            'object_attributes': {
+                'target': {'path_with_namespace': self.gl_repo.full_name},
+                'action': 'close',
+                'iid': 1234
+            },
+            'test': 'test_gitlab_redelivery'
+        }
+
+        with patch('gitmate_hooks.views.handle_gitlab_webhook') as m_handle:
+            self.simulate_gitlab_webhook_call('Merge Request Hook', data)
+            self.simulate_gitlab_webhook_call('Merge Request Hook', data)
+        m_handle.assert_called_once()
+        self.assertEqual(m_handle.call_args[0], ('Merge Request Hook', data))
+
+    def test_failed_delivery_is_redelivered(self):
+        data = {
+            'object_attributes': {
+                'target': {'path_with_namespace': self.gl_repo.full_name},
+                'action': 'close',
+                'iid': 1234
+            },
+            'test': 'test_failed_delivery_is_redelivered'
+        }
+
+        with patch('gitmate_hooks.views.handle_gitlab_webhook',
+                   side_effect=[RuntimeError, None]) as m_handle:
+            with self.assertRaises(RuntimeError):
+                self.simulate_gitlab_webhook_call('Merge Request Hook', data)
+            # the claim was released, so the redelivery is handled
+            self.simulate_gitlab_webhook_call('Merge Request Hook', data)
+            self.simulate_gitlab_webhook_call('Merge Request Hook', data)
+        self.assertEqual(m_handle.call_count, 2)
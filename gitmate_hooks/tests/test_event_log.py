@@ -0,0 +1,98 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from IGitt.GitLab.GitLab import GitLab
+
+from gitmate_config.tests.test_base import GitmateTestCase
+from gitmate_hooks.models import WebhookEvent
+from gitmate_hooks.tasks import prune_webhook_events
+
+
+class TestWebhookEventLog(GitmateTestCase):
+
+    def setUp(self):
+        super().setUpWithPlugin('testplugin')
+        self.data = {
+            'object_attributes': {
+                'target': {'path_with_namespace': self.gl_repo.full_name},
+                'action': 'close',
+                'iid': 1234
+            },
+            'test': 'test_webhook_event_log'
+        }
+
+    @override_settings(WEBHOOK_EVENT_LOG=True)
+    @patch.object(GitLab, 'handle_webhook', return_value=[])
+    def test_deliveries_are_logged(self, m_handle):
+        self.simulate_gitlab_webhook_call('Merge Request Hook', self.data)
+
+        entry = WebhookEvent.objects.get()
+        self.assertEqual(entry.provider, 'gitlab')
+        self.assertEqual(entry.event, 'Merge Request Hook')
+        self.assertEqual(entry.repo, self.gl_repo)
+        self.assertEqual(entry.webhook, self.data)
+        self.assertIsNotNone(entry.delivery)
+
+    @override_settings(WEBHOOK_EVENT_LOG=False)
+    @patch.object(GitLab, 'handle_webhook', return_value=[])
+    def test_disabled_log(self, m_handle):
+        self.simulate_gitlab_webhook_call('Merge Request Hook', self.data)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    @override_settings(WEBHOOK_EVENT_LOG=True)
+    @patch.object(GitLab, 'handle_webhook', return_value=[])
+    def test_replay(self, m_handle):
+        self.simulate_gitlab_webhook_call('Merge Request Hook', self.data)
+        m_handle.reset_mock()
+
+        output = StringIO()
+        call_command('replay_webhooks', '--provider', 'gitlab',
+                     '--repo', self.gl_repo.full_name,
+                     '--since', '2000-01-01T00:00:00Z',
+                     '--until', '2100-01-01T00:00:00Z',
+                     stdout=output)
+        m_handle.assert_called_once_with('Merge Request Hook', self.data)
+        self.assertIn('Replayed 1 webhook deliveries.', output.getvalue())
+
+        # replaying doesn't append to the log again
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+        # deliveries of deactivated repositories are skipped
+        self.gl_repo.active = False
+        self.gl_repo.save()
+        m_handle.reset_mock()
+        call_command('replay_webhooks', '--concurrency', '2', stdout=output)
+        m_handle.assert_not_called()
+
+    @override_settings(WEBHOOK_EVENT_LOG=True)
+    @patch.object(GitLab, 'handle_webhook', return_value=[])
+    def test_replay_failures(self, m_handle):
+        self.simulate_gitlab_webhook_call('Merge Request Hook', self.data)
+        self.data['object_attributes']['iid'] = 1235
+        self.simulate_gitlab_webhook_call('Merge Request Hook', self.data)
+
+        output, errors = StringIO(), StringIO()
+        m_handle.reset_mock()
+        m_handle.side_effect = RuntimeError('boom')
+        call_command('replay_webhooks', stdout=output, stderr=errors)
+
+        # a failed delivery doesn't stop the others from being replayed
+        self.assertEqual(m_handle.call_count, 2)
+        self.assertIn('Replayed 2 webhook deliveries.', output.getvalue())
+        self.assertIn('2 webhook deliveries failed.', errors.getvalue())
+
+    def test_prune(self):
+        for days in (1, 30):
+            entry = WebhookEvent(
+                provider='gitlab', event='Merge Request Hook',
+                repo=self.gl_repo,
+                received_at=timezone.now() - timedelta(days=days))
+            entry.webhook = self.data
+            entry.save()
+
+        prune_webhook_events()
+        self.assertEqual(WebhookEvent.objects.count(), 1)
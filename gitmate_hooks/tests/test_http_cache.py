@@ -0,0 +1,138 @@
+from datetime import timedelta
+from glob import glob
+from os import path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test import override_settings
+from django.utils import timezone
+import requests
+
+from gitmate import breakers
+from gitmate.http_cache import invalidate_request_scope
+from gitmate.http_cache import request_scope
+from gitmate.metrics import get_metrics
+from gitmate.rate_limits import budget_scope
+from gitmate.rate_limits import get_status
+from gitmate_hooks.benchmark import FakeHoster
+
+
+class TestRequestScopedCache(TransactionTestCase):
+
+    def setUp(self):
+        cassette = path.join(path.dirname(__file__), 'cassettes',
+                             'TestResponderRegistrar.test_remove_non_'
+                             'existant_repos.yaml')
+        self.hoster = FakeHoster(glob(cassette))
+
+    def get_repos(self):
+        response = requests.get('https://api.github.com/user/repos',
+                                params={'per_page': 100})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_identical_requests(self):
+        cached = get_metrics('http.').get('http.cached', 0)
+        with self.hoster.serve():
+            with request_scope():
+                repos = self.get_repos()
+                with request_scope():
+                    self.assertEqual(self.get_repos(), repos)
+                self.assertEqual(self.hoster.matched, 1)
+
+                # other requests may change the cached resources
+                requests.post('https://api.github.com/user/repos')
+                self.get_repos()
+                self.assertEqual(self.hoster.matched, 2)
+
+                invalidate_request_scope()
+                self.get_repos()
+                self.assertEqual(self.hoster.matched, 3)
+
+            # requests outside of a scope are always sent
+            self.get_repos()
+            self.get_repos()
+            self.assertEqual(self.hoster.matched, 5)
+
+        self.assertEqual(get_metrics('http.')['http.cached'], cached + 1)
+
+    @override_settings(HTTP_REQUEST_CACHE_TTL=0)
+    def test_disabled(self):
+        with self.hoster.serve(), request_scope():
+            self.get_repos()
+            self.get_repos()
+        self.assertEqual(self.hoster.matched, 2)
+
+    def test_rate_limit_budget(self):
+        with self.hoster.serve(), request_scope():
+            with budget_scope('installation:0'):
+                self.get_repos()
+                with budget_scope(None):
+                    # the budget of the outer scope stays in effect
+                    self.get_repos()
+        self.assertEqual(get_status('installation:0')['limit'], 5000)
+
+        # responses outside of a budget scope aren't accounted
+        with self.hoster.serve(), request_scope():
+            self.get_repos()
+        self.assertIsNone(get_status('installation:1'))
+
+    @override_settings(CIRCUIT_BREAKERS=True, CIRCUIT_BREAKER_MIN_REQUESTS=4)
+    def test_circuit_breaker(self):
+        self.addCleanup(breakers.reset, 'github')
+        self.assertEqual(
+            breakers.get_endpoint('https://api.github.com/repos/a/b/pulls/1'),
+            ('github', 'pulls'))
+        self.assertEqual(
+            breakers.get_endpoint(
+                'https://gitlab.com/api/v4/projects/a%2Fb/merge_requests/1'),
+            ('gitlab', 'merge_requests'))
+
+        url = 'https://api.github.com/user/repos'
+        for _ in range(3):
+            breakers.record(url, 0.1, failed=False)
+        breakers.record(url, 0.1, failed=True)
+        self.assertFalse(breakers.is_open('github'))
+
+        # slow requests count as failures
+        breakers.record(url, 20, failed=False)
+        breakers.record(url, 20, failed=False)
+        self.assertTrue(breakers.is_open('github'))
+        self.assertFalse(breakers.is_open('gitlab'))
+
+        # requests to the endpoint fail without being sent
+        with self.hoster.serve(), request_scope():
+            with self.assertRaises(breakers.CircuitOpenError):
+                requests.get(url)
+            requests.get('https://api.github.com/repos/a/b/pulls/1')
+        self.assertEqual(self.hoster.matched + sum(
+            self.hoster.unmatched.values()), 1)
+
+        breakers.reset('github')
+        self.assertFalse(breakers.is_open('github'))
+
+    @override_settings(
+        CIRCUIT_BREAKERS=True,
+        CIRCUIT_BREAKER_MIN_REQUESTS=1,
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'test_breaker_cache',
+            'TIMEOUT': 60 * 60 * 24 * 7 * 4}})
+    def test_circuit_breaker_trips_expire(self):
+        call_command('createcachetable')
+        self.addCleanup(breakers.reset, 'github')
+        url = 'https://api.github.com/user/repos'
+        breakers.record(url, 0.1, failed=True)
+        breakers.record(url, 0.1, failed=True)
+        self.assertEqual(cache.get('circuit-trips:github'), 2)
+
+        # the trips are forgotten after an hour, not the cache default
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT expires FROM test_breaker_cache '
+                           'WHERE cache_key = %s',
+                           [cache.make_key('circuit-trips:github')])
+            expires, = cursor.fetchone()
+        self.assertLessEqual(
+            expires, timezone.now() + timedelta(seconds=breakers.TRIP_MEMORY))
@@ -0,0 +1,74 @@
+from time import time
+from unittest.mock import MagicMock
+from unittest.mock import PropertyMock
+
+from gitmate.labels import add_labels
+from gitmate.labels import get_labels
+from gitmate.labels import label_transaction
+from gitmate.labels import remove_labels
+from gitmate.labels import retain_labels
+from gitmate_config.tests.test_base import GitmateTestCase
+
+
+class TestLabelTransactions(GitmateTestCase):
+
+    def setUp(self):
+        self.pr = MagicMock(url=f'https://example.com/pull/{time()}')
+        self.labels = PropertyMock(return_value={'bug', 'size/S'})
+        type(self.pr).labels = self.labels
+
+    def get_writes(self):
+        return [args[0] for args, _ in self.labels.call_args_list if args]
+
+    def test_single_write(self):
+        with label_transaction():
+            add_labels(self.pr, 'size/M')
+            remove_labels(self.pr, 'size/S')
+            with label_transaction():
+                add_labels(self.pr, 'review')
+            self.assertEqual(get_labels(self.pr),
+                             {'bug', 'size/M', 'review'})
+            self.assertEqual(self.get_writes(), [])
+
+        self.assertEqual(self.get_writes(), [{'bug', 'size/M', 'review'}])
+        self.pr.refresh.assert_called_once_with()
+
+    def test_later_declaration_wins(self):
+        with label_transaction():
+            add_labels(self.pr, 'WIP')
+            remove_labels(self.pr, 'bug')
+            remove_labels(self.pr, 'WIP')
+            add_labels(self.pr, 'bug')
+        self.assertEqual(self.get_writes(), [])
+
+        with label_transaction():
+            remove_labels(self.pr, 'bug')
+            add_labels(self.pr, 'bug', 'WIP')
+        self.assertEqual(self.get_writes(), [{'bug', 'size/S', 'WIP'}])
+
+    def test_failing_responder(self):
+        with label_transaction():
+            add_labels(self.pr, 'review')
+            with self.assertRaises(RuntimeError):
+                with label_transaction():
+                    remove_labels(self.pr, 'review', 'bug')
+                    raise RuntimeError
+        self.assertEqual(self.get_writes(), [{'bug', 'size/S', 'review'}])
+
+        with self.assertRaises(RuntimeError):
+            with label_transaction():
+                add_labels(self.pr, 'WIP')
+                raise RuntimeError
+        self.assertEqual(len(self.get_writes()), 1)
+
+    def test_retain_current_labels(self):
+        with label_transaction():
+            add_labels(self.pr, 'size/M')
+            retain_labels(self.pr, lambda label: label.startswith('size/'))
+            # a human labels the merge request before the write
+            self.labels.return_value = {'bug', 'size/S', 'security'}
+        self.assertEqual(self.get_writes(), [{'size/S', 'size/M'}])
+
+    def test_outside_of_transaction(self):
+        remove_labels(self.pr, 'bug')
+        self.assertEqual(self.get_writes(), [{'size/S'}])
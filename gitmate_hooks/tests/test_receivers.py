@@ -1,15 +1,20 @@
 from hashlib import sha1
 import hmac
+import json
 from os import environ
 from unittest.mock import patch
 
 from django.conf import settings
+from django.test import override_settings
+from IGitt.GitHub.GitHub import GitHub
 from IGitt.GitHub.GitHubRepository import GitHubRepository
+from IGitt.GitLab.GitLab import GitLab
 from rest_framework import status
 from rest_framework.response import Response
 
 from gitmate_config.models import Installation
 from gitmate_config.tests.test_base import GitmateTestCase
+from gitmate_hooks.tasks import ingest_webhook
 from gitmate_hooks.views import github_webhook_receiver
 from gitmate_hooks.decorators import signature_check
 
@@ -149,3 +154,100 @@ class TestWebhookReceivers(GitmateTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         with self.assertRaises(Installation.DoesNotExist):
             db_inst.refresh_from_db()
+
+    @override_settings(WEBHOOK_ASYNC_INGEST=True)
+    @patch.object(ingest_webhook, 'delay')
+    def test_github_webhook_receiver_async_ingest(self, m_delay):
+        data = {
+            'repository': {'full_name': environ['GITHUB_TEST_REPO'],
+                           'id': 49558751},
+            'pull_request': {'number': 0},
+            'action': 'opened'
+        }
+        response = self.simulate_github_webhook_call('pull_request', data)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        provider, headers, body = m_delay.call_args[0]
+        self.assertEqual(provider, 'github')
+        self.assertEqual(headers, {'HTTP_X_GITHUB_EVENT': 'pull_request'})
+        self.assertEqual(json.loads(body), data)
+
+    @override_settings(WEBHOOK_ASYNC_INGEST=True)
+    @patch.object(ingest_webhook, 'delay')
+    def test_gitlab_webhook_receiver_async_ingest(self, m_delay):
+        data = {
+            'object_attributes': {
+                'target': {
+                    'path_with_namespace': environ['GITLAB_TEST_REPO']
+                },
+                'action': 'open',
+                'iid': 2
+            }
+        }
+        response = self.simulate_gitlab_webhook_call(
+            'Merge Request Hook', data)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        provider, headers, _ = m_delay.call_args[0]
+        self.assertEqual(provider, 'gitlab')
+        self.assertNotIn('HTTP_X_GITLAB_TOKEN', headers)
+        self.assertEqual(headers['HTTP_X_GITLAB_EVENT'], 'Merge Request Hook')
+
+    def test_ingest_webhook(self):
+        db_inst = Installation.objects.create(identifier=13, provider='github')
+        data = {
+            'action': 'deleted',
+            'installation': {'id': 13},
+            'sender': {'login': self.repo.user.username, 'id': 1}
+        }
+        ingest_webhook('github',
+                       {'HTTP_X_GITHUB_EVENT': 'installation'},
+                       json.dumps(data))
+        with self.assertRaises(Installation.DoesNotExist):
+            db_inst.refresh_from_db()
+
+        # deliveries for unknown repositories are dropped silently
+        data = {'repository': {'id': 1}, 'action': 'opened'}
+        ingest_webhook('github',
+                       {'HTTP_X_GITHUB_EVENT': 'pull_request'},
+                       json.dumps(data))
+
+    @patch.object(GitHub, 'handle_webhook')
+    def test_github_webhook_without_responders(self, m_handle_webhook):
+        # no plugin responds to pushes
+        data = {
+            'repository': {'full_name': environ['GITHUB_TEST_REPO'],
+                           'id': 49558751},
+            'ref': 'refs/heads/master'
+        }
+        response = self.simulate_github_webhook_call('push', data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # no plugin is active on the repository
+        data = {
+            'repository': {'full_name': environ['GITHUB_TEST_REPO'],
+                           'id': 49558751},
+            'pull_request': {'number': 0},
+            'action': 'synchronize'
+        }
+        response = self.simulate_github_webhook_call('pull_request', data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        m_handle_webhook.assert_not_called()
+
+    @override_settings(WEBHOOK_ASYNC_INGEST=True)
+    @patch.object(ingest_webhook, 'delay')
+    def test_github_webhook_without_responders_async_ingest(self, m_delay):
+        data = {'repository': {'id': 49558751}, 'ref': 'refs/heads/master'}
+        response = self.simulate_github_webhook_call('push', data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        m_delay.assert_not_called()
+
+    @patch.object(GitLab, 'handle_webhook')
+    def test_gitlab_webhook_without_responders(self, m_handle_webhook):
+        data = {
+            'project': {'path_with_namespace': environ['GITLAB_TEST_REPO']},
+            'ref': 'refs/heads/master'
+        }
+        response = self.simulate_gitlab_webhook_call('Push Hook', data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        m_handle_webhook.assert_not_called()
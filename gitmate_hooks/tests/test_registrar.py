@@ -1,13 +1,49 @@
+from datetime import timedelta
+from time import time
+from types import SimpleNamespace
 from unittest.mock import patch
 from unittest.mock import PropertyMock
 
+from celery import Task
 from IGitt.GitHub.GitHubComment import GitHubComment
+from IGitt.GitHub.GitHubIssue import GitHubIssue
 from IGitt.GitHub.GitHubMergeRequest import GitHubMergeRequest
 from IGitt.Interfaces.Comment import CommentType
+from IGitt.Interfaces.Actions import IssueActions
 from IGitt.Interfaces.Actions import MergeRequestActions
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from requests import Response
+
+from gitmate import breakers
+from gitmate.metrics import get_metrics
+from gitmate.rate_limits import budget_scope
+from gitmate.rate_limits import get_budget
+from gitmate.rate_limits import observe
+from gitmate.serialization import UnresolvedObject
+from gitmate_config.enums import TaskPriority
+from gitmate_config.enums import TaskQueue
 from gitmate_config.tests.test_base import GitmateTestCase
+from gitmate_hooks import debounce
+from gitmate_hooks import deferral
+from gitmate_hooks import fairness
+from gitmate_hooks import generations
+from gitmate_hooks import routing
+from gitmate_hooks import serial
+from gitmate_hooks import shedding
+from gitmate_hooks import single_flight
+from gitmate_hooks.models import HeldTask
+from gitmate_hooks.models import ResponderOutcome
+from gitmate_hooks.models import ResponderRuntime
+from gitmate_hooks.utils import DISPATCH_KWARG
 from gitmate_hooks.utils import run_plugin_for_all_repos
+from gitmate_hooks.utils import run_plugin_for_repo_range
 from gitmate_hooks.utils import ResponderRegistrar
 
 
@@ -82,6 +118,46 @@ class TestResponderRegistrar(GitmateTestCase):
                                  True)
         self.assertEqual(m_respond.call_count, 2)
 
+    @override_settings(SCHEDULED_FANOUT_CHUNK_SIZE=1,
+                       SCHEDULED_FANOUT_PARALLELISM=1)
+    @patch.object(ResponderRegistrar, 'respond', return_value=None)
+    def test_run_plugin_for_all_repos_chunked(self, m_respond):
+        with patch.object(run_plugin_for_repo_range,
+                          'apply_async') as m_apply_async:
+            run_plugin_for_all_repos(self.plugin,
+                                     'testplugin.scheduled_responder_function',
+                                     True)
+
+            # every repository gets a chunk, but only one is in flight
+            self.assertEqual(m_apply_async.call_count, 1)
+            self.assertEqual(m_respond.call_count, 0)
+            args, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(len(kwargs['ranges']), 1)
+
+            # a finished chunk publishes the next one of its lane
+            run_plugin_for_repo_range(*args, **kwargs)
+            self.assertEqual(m_respond.call_count, 1)
+            self.assertEqual(m_apply_async.call_count, 2)
+            args, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(kwargs['ranges'], [])
+
+            run_plugin_for_repo_range(*args, **kwargs)
+            self.assertEqual(m_respond.call_count, 2)
+            self.assertEqual(m_apply_async.call_count, 2)
+        self.assertNotEqual(m_respond.call_args_list[0][1]['repo'],
+                            m_respond.call_args_list[1][1]['repo'])
+
+        # with more lanes, the chunks are in flight side by side
+        with override_settings(SCHEDULED_FANOUT_PARALLELISM=8), \
+                patch.object(run_plugin_for_repo_range,
+                             'apply_async') as m_apply_async:
+            run_plugin_for_all_repos(self.plugin,
+                                     'testplugin.scheduled_responder_function',
+                                     True)
+        self.assertEqual(m_apply_async.call_count, 2)
+        self.assertEqual([call[0][1]['ranges']
+                          for call in m_apply_async.call_args_list], [[], []])
+
     def test_inactive_plugin(self):
         # Clearing all plugins!
         self.repo.plugins = []
@@ -92,3 +168,536 @@ class TestResponderRegistrar(GitmateTestCase):
                 MergeRequestActions.OPENED, self.plugin, repo=self.repo)],
             []
         )
+
+    def test_has_responders(self):
+        self.assertTrue(ResponderRegistrar.has_responders(
+            {MergeRequestActions.OPENED, MergeRequestActions.CLOSED},
+            repo=self.repo))
+
+        # the responder belongs to a plugin which isn't active
+        self.repo.plugins = []
+        self.assertFalse(ResponderRegistrar.has_responders(
+            {MergeRequestActions.OPENED}, repo=self.repo))
+        self.assertTrue(ResponderRegistrar.has_responders(
+            {MergeRequestActions.OPENED}))
+
+        self.assertFalse(ResponderRegistrar.has_responders(set()))
+
+    @override_settings(
+        RESPONDER_DEBOUNCE_WINDOWS={'MergeRequestActions.OPENED': 5})
+    def test_debounced_responder(self):
+        pr = SimpleNamespace(url='https://example.com/test/pull/1')
+        self.assertEqual(
+            [result.get() for result in ResponderRegistrar.respond(
+                MergeRequestActions.OPENED, pr, repo=self.repo)],
+            [True]
+        )
+
+        # responders dispatched for a superseded event are skipped
+        key = f'{MergeRequestActions.OPENED}:{pr.url}'
+        token = debounce.stamp(key)
+        self.assertTrue(debounce.is_current(key, token))
+        debounce.stamp(key)
+        self.assertFalse(debounce.is_current(key, token))
+
+        responder = ResponderRegistrar._get_responders(
+            MergeRequestActions.OPENED, repo=self.repo)[0]
+        self.assertIsNone(
+            responder(pr, **{DISPATCH_KWARG: {'debounce': (key, token)}}))
+
+    @override_settings(HOUSEKEEPING_DEFER_DEPTH=10,
+                       HOUSEKEEPING_SHED_DEPTH=100,
+                       HOUSEKEEPING_MAX_AGE=60)
+    def test_housekeeping_shedding(self):
+        @ResponderRegistrar.responder(self.plugin,
+                                      MergeRequestActions.CLOSED,
+                                      priority=TaskPriority.HOUSEKEEPING)
+        def housekeeping_responder(_):
+            return 'housekeeping'
+
+        def respond(depth):
+            with patch('gitmate_hooks.shedding.get_queue_depth',
+                       return_value=depth):
+                return [result.get() for result in ResponderRegistrar.respond(
+                    MergeRequestActions.CLOSED, None, repo=self.repo)]
+
+        before = get_metrics('responders.')
+        self.assertEqual(respond(0), ['housekeeping'])
+        self.assertEqual(respond(10), ['housekeeping'])
+        self.assertEqual(respond(100), [])
+
+        # housekeeping which waited too long in the queue is dropped
+        responder = ResponderRegistrar._get_responders(
+            MergeRequestActions.CLOSED, repo=self.repo)[0]
+        self.assertIsNone(
+            responder(None, **{DISPATCH_KWARG: {'deadline': time() - 1}}))
+
+        after = get_metrics('responders.')
+        self.assertEqual(after['responders.deferred'],
+                         before.get('responders.deferred', 0) + 1)
+        self.assertEqual(after['responders.shed'],
+                         before.get('responders.shed', 0) + 2)
+
+    def test_priority_queues(self):
+        # message priorities only take effect on queues declared with them
+        queues = {queue.name: queue for queue in settings.CELERY_TASK_QUEUES}
+        self.assertEqual(set(queues), {queue.value for queue in TaskQueue})
+        for queue in queues.values():
+            self.assertGreaterEqual(
+                queue.queue_arguments['x-max-priority'],
+                max(shedding.MESSAGE_PRIORITIES.values()))
+
+    def test_settings_snapshot(self):
+        @ResponderRegistrar.responder(self.plugin,
+                                      MergeRequestActions.REOPENED)
+        def char_responder(_, example_char_setting: str = 'description'):
+            return example_char_setting
+
+        @ResponderRegistrar.responder(self.plugin,
+                                      MergeRequestActions.REOPENED)
+        def bool_responder(_, example_bool_setting: bool = True):
+            return example_bool_setting
+
+        def respond():
+            return [result.get() for result in ResponderRegistrar.respond(
+                MergeRequestActions.REOPENED, None, repo=self.repo)]
+
+        # the first dispatch creates the missing settings
+        self.assertEqual(respond(), ['example', True])
+
+        # the settings of all responders are loaded in a single query
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(respond(), ['example', True])
+        self.assertEqual(len([query for query in queries
+                              if '_settings' in query['sql']]), 1)
+
+    def test_dispatch_table(self):
+        table = ResponderRegistrar._get_dispatch_table()
+        self.assertIs(ResponderRegistrar._get_dispatch_table(), table)
+        with self.assertRaises(TypeError):
+            table[MergeRequestActions.OPENED] = {}
+
+        entry = ResponderRegistrar._get_entries(
+            MergeRequestActions.OPENED, repo=self.repo)[0]
+        self.assertEqual(entry.options, {'example_bool_setting'})
+        self.assertEqual(entry.config.plugin_name, self.plugin)
+
+        # registering a responder rebuilds the table
+        @ResponderRegistrar.responder('inexistent',
+                                      MergeRequestActions.OPENED)
+        def unknown_plugin_responder(_):
+            pass  # pragma: no cover
+
+        table = ResponderRegistrar._get_dispatch_table()
+        self.assertIsNone(table[MergeRequestActions.OPENED]['inexistent'][0]
+                          .config)
+        self.assertEqual(ResponderRegistrar._get_entries(
+            MergeRequestActions.OPENED, repo=self.repo,
+            plugin_name='inexistent'), [])
+
+    @override_settings(RESPONDER_FUSED_DISPATCH=True)
+    def test_fused_dispatch(self):
+        @ResponderRegistrar.responder(self.plugin, MergeRequestActions.MERGED)
+        def fused_responder(_, example_char_setting: str = 'description'):
+            return example_char_setting
+
+        @ResponderRegistrar.responder(self.plugin, MergeRequestActions.MERGED)
+        def failing_fused_responder(_):
+            raise RuntimeError('isolated from the other responders')
+
+        @ResponderRegistrar.responder(self.plugin, MergeRequestActions.MERGED,
+                                      queue=TaskQueue.LONG)
+        def separate_responder(_):
+            return 'separate'
+
+        before = get_metrics('responders.')
+        results = [result.get() for result in ResponderRegistrar.respond(
+            MergeRequestActions.MERGED, None, repo=self.repo)]
+
+        # the short queue responders ran in one task, the other one separately
+        self.assertEqual(results, ['separate', ['example', None]])
+        after = get_metrics('responders.')
+        self.assertEqual(after['responders.failed'],
+                         before.get('responders.failed', 0) + 1)
+
+    @override_settings(RESPONDER_ADAPTIVE_ROUTING='override',
+                       RESPONDER_RUNTIME_MIN_SAMPLES=3,
+                       RESPONDER_RUNTIME_INTERVAL=0)
+    def test_adaptive_routing(self):
+        @ResponderRegistrar.responder(self.plugin,
+                                      MergeRequestActions.SYNCHRONIZED)
+        def slow_responder(_):
+            return 'slow'
+
+        task, = ResponderRegistrar._get_responders(
+            MergeRequestActions.SYNCHRONIZED, repo=self.repo)
+        routing._routes.clear()
+
+        # the runtimes are measured by the worker
+        for _ in range(3):
+            ResponderRegistrar.respond(
+                MergeRequestActions.SYNCHRONIZED, None, repo=self.repo)
+        runtime = ResponderRuntime.objects.get(responder=task.name)
+        self.assertEqual(len(runtime.samples), 3)
+        self.assertEqual(routing.get_queue(task), TaskQueue.SHORT.value)
+
+        routing.store_runtimes({task.name: [30, 40, 50]})
+        self.assertEqual(routing.get_queue(task), TaskQueue.MEDIUM.value)
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            ResponderRegistrar.respond(
+                MergeRequestActions.SYNCHRONIZED, None, repo=self.repo)
+        self.assertEqual(m_apply_async.call_args[1]['queue'],
+                         TaskQueue.MEDIUM.value)
+
+        with override_settings(RESPONDER_ADAPTIVE_ROUTING='advise'):
+            self.assertEqual(routing.get_queue(task), TaskQueue.SHORT.value)
+
+    @override_settings(TENANT_MAX_IN_FLIGHT=1)
+    def test_tenant_fairness(self):
+        @ResponderRegistrar.responder(self.plugin,
+                                      MergeRequestActions.ATTRIBUTES_CHANGED)
+        def fair_responder(_, example_char_setting: str = 'description'):
+            return example_char_setting
+
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            for _ in range(3):
+                ResponderRegistrar.respond(
+                    MergeRequestActions.ATTRIBUTES_CHANGED, None,
+                    repo=self.repo)
+
+            # only the first task was published, the others wait in order
+            self.assertEqual(m_apply_async.call_count, 1)
+            self.assertEqual(HeldTask.objects.filter(repo=self.repo).count(),
+                             2)
+            _, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(kwargs[DISPATCH_KWARG]['tenant'],
+                             (self.repo.pk, 0))
+            self.assertEqual(
+                get_metrics(f'tenants.{self.repo.pk}.')[
+                    f'tenants.{self.repo.pk}.held'], 2)
+
+            # finishing a task publishes the next held one in its place
+            fairness.release(self.repo.pk, 0)
+            self.assertEqual(m_apply_async.call_count, 2)
+            self.assertEqual(HeldTask.objects.filter(repo=self.repo).count(),
+                             1)
+            args, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(args, (None, ))
+            self.assertEqual(kwargs['example_char_setting'], 'example')
+            self.assertEqual(kwargs[DISPATCH_KWARG]['tenant'],
+                             (self.repo.pk, 0))
+
+            # the periodic drain doesn't exceed the limit
+            fairness.drain()
+            self.assertEqual(m_apply_async.call_count, 2)
+
+    @override_settings(
+        TENANT_MAX_IN_FLIGHT=2,
+        TENANT_IN_FLIGHT_TIMEOUT=60,
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'test_tenant_cache',
+            'TIMEOUT': 60 * 60 * 24 * 7 * 4}})
+    def test_tenant_slots_database_cache(self):
+        call_command('createcachetable')
+        tenant = self.repo.pk
+
+        # the slots are claimed one by one up to the limit
+        self.assertEqual(fairness.admit(tenant), 0)
+        self.assertEqual(fairness.admit(tenant), 1)
+        self.assertIsNone(fairness.admit(tenant))
+
+        # the slots keep their own expiry rather than the cache default
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT expires FROM test_tenant_cache')
+            expiries = [row[0] for row in cursor.fetchall()]
+        self.assertEqual(len(expiries), 2)
+        latest = timezone.now() + timedelta(seconds=60)
+        for expires in expiries:
+            self.assertLessEqual(expires, latest)
+
+        # a freed slot is claimed again
+        fairness.release(tenant, 1)
+        self.assertEqual(fairness.admit(tenant), 1)
+        self.assertIsNone(fairness.admit(tenant))
+
+    @override_settings(RESPONDER_SERIAL_KEYS=True)
+    def test_serial_keys(self):
+        @ResponderRegistrar.responder(self.plugin, MergeRequestActions.LABELED)
+        def serial_responder(mr, example_char_setting: str = 'description'):
+            return example_char_setting
+
+        mr = GitHubMergeRequest(self.repo.token, self.repo.full_name, 7)
+        other_mr = GitHubMergeRequest(self.repo.token, self.repo.full_name, 8)
+        key = serial.get_key((mr, ))
+
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            for _ in range(3):
+                ResponderRegistrar.respond(MergeRequestActions.LABELED, mr,
+                                           repo=self.repo)
+
+            # only one task per object is in flight, the others wait in order
+            self.assertEqual(m_apply_async.call_count, 1)
+            self.assertEqual(HeldTask.objects.filter(key=key).count(), 2)
+            _, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(kwargs[DISPATCH_KWARG]['serial'], key)
+
+            # other objects aren't held back
+            ResponderRegistrar.respond(MergeRequestActions.LABELED, other_mr,
+                                       repo=self.repo)
+            self.assertEqual(m_apply_async.call_count, 2)
+
+            # finishing a task hands the key over to the next held one
+            serial.release(key)
+            self.assertEqual(m_apply_async.call_count, 3)
+            self.assertEqual(HeldTask.objects.filter(key=key).count(), 1)
+            args, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(args[0].url, mr.url)
+            self.assertEqual(kwargs['example_char_setting'], 'example')
+
+            # the periodic drain leaves keys in flight alone
+            serial.drain()
+            self.assertEqual(m_apply_async.call_count, 3)
+
+    @override_settings(RESPONDER_SUPERSEDING=True)
+    def test_superseded_responder(self):
+        checks = []
+
+        @ResponderRegistrar.responder(self.plugin,
+                                      MergeRequestActions.REOPENED)
+        def head_responder(mr):
+            checks.append(generations.is_superseded())
+            return mr.number
+
+        mr = GitHubMergeRequest(self.repo.token, self.repo.full_name, 9)
+        key = mr.url
+
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            ResponderRegistrar.respond(MergeRequestActions.REOPENED, mr,
+                                       repo=self.repo)
+            args, kwargs = m_apply_async.call_args[0]
+        self.assertEqual(kwargs[DISPATCH_KWARG]['generation'][0], key)
+
+        # the task runs as long as the head is the same
+        self.assertEqual(head_responder(*args, **kwargs), 9)
+        self.assertEqual(checks, [False])
+
+        # a push supersedes the queued task, which is dropped
+        generations.get_generation(MergeRequestActions.SYNCHRONIZED, key)
+        self.assertIsNone(head_responder(*args, **kwargs))
+        self.assertEqual(checks, [False])
+        self.assertGreaterEqual(
+            get_metrics('responders.')['responders.superseded'], 1)
+
+        # running tasks see the push as well
+        generation = kwargs[DISPATCH_KWARG]['generation']
+        with generations.running(generation):
+            self.assertTrue(generations.is_superseded())
+        self.assertFalse(generations.is_superseded())
+
+    @override_settings(RESPONDER_SUPERSEDING=True)
+    def test_concurrent_generations(self):
+        key = f'https://example.com/pull/{time()}'
+        first = generations.get_generation(
+            MergeRequestActions.SYNCHRONIZED, key)
+
+        # a concurrent push didn't see the first one yet
+        cache.delete('generation:' + key)
+        second = generations.get_generation(
+            MergeRequestActions.SYNCHRONIZED, key)
+        self.assertEqual(second, first + 1)
+        self.assertFalse(generations.is_current(key, first))
+        self.assertTrue(generations.is_current(key, second))
+        self.assertEqual(generations.get_generation(
+            MergeRequestActions.OPENED, key), second)
+
+    @override_settings(RESPONDER_SINGLE_FLIGHT=True)
+    def test_single_flight(self):
+        @ResponderRegistrar.responder(self.plugin,
+                                      MergeRequestActions.UNLABELED)
+        def single_responder(mr, example_char_setting: str = 'description'):
+            return example_char_setting
+
+        data = {'updated_at': '2018-10-18T12:00:00Z'}
+        mr = GitHubMergeRequest.from_data(
+            data, self.repo.token, self.repo.full_name, 10)
+        other_mr = GitHubMergeRequest.from_data(
+            data, self.repo.token, self.repo.full_name, 11)
+
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            for _ in range(2):
+                ResponderRegistrar.respond(MergeRequestActions.UNLABELED, mr,
+                                           repo=self.repo)
+            ResponderRegistrar.respond(MergeRequestActions.UNLABELED,
+                                       other_mr, repo=self.repo)
+
+            # the duplicate was coalesced into the task in flight
+            self.assertEqual(m_apply_async.call_count, 2)
+            args, kwargs = m_apply_async.call_args_list[0][0]
+            self.assertIn('single_flight', kwargs[DISPATCH_KWARG])
+
+        # once the task finished, identical work is dispatched again
+        self.assertEqual(single_responder(*args, **kwargs), 'example')
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            ResponderRegistrar.respond(MergeRequestActions.UNLABELED, mr,
+                                       repo=self.repo)
+            self.assertEqual(m_apply_async.call_count, 1)
+
+    @override_settings(RESPONDER_SINGLE_FLIGHT=True)
+    def test_single_flight_new_head(self):
+        task = SimpleNamespace(name='head_responder')
+        mr = GitHubMergeRequest.from_data(
+            {'updated_at': '2018-10-18T12:00:00Z'},
+            self.repo.token, self.repo.full_name, 12)
+        event = MergeRequestActions.SYNCHRONIZED
+
+        # without generations, pushes can't be told apart and all run
+        self.assertIsNone(single_flight.get_key(task, event, (mr, ), {}, {}))
+
+        # with them, each push is deduplicated on its own
+        first = single_flight.get_key(task, event, (mr, ), {},
+                                      {'generation': (mr.url, 1)})
+        second = single_flight.get_key(task, event, (mr, ), {},
+                                       {'generation': (mr.url, 2)})
+        self.assertIsNotNone(first)
+        self.assertNotEqual(first, second)
+
+        # work not on the head is deduplicated regardless
+        self.assertIsNotNone(single_flight.get_key(
+            task, MergeRequestActions.LABELED, (mr, ), {}, {}))
+
+    @override_settings(RESPONDER_SINGLE_FLIGHT=True)
+    def test_single_flight_new_state(self):
+        task = SimpleNamespace(name='title_responder')
+        event = MergeRequestActions.ATTRIBUTES_CHANGED
+        edited = GitHubMergeRequest.from_data(
+            {'title': 'Add a feature', 'updated_at': '2018-10-18T12:00:00Z'},
+            self.repo.token, self.repo.full_name, 13)
+        reedited = GitHubMergeRequest.from_data(
+            {'title': 'Add features', 'updated_at': '2018-10-18T12:01:00Z'},
+            self.repo.token, self.repo.full_name, 13)
+
+        # a later edit isn't coalesced into the task for the earlier one
+        self.assertNotEqual(
+            single_flight.get_key(task, event, (edited, ), {}, {}),
+            single_flight.get_key(task, event, (reedited, ), {}, {}))
+
+        # objects whose state isn't known aren't coalesced at all
+        unknown = GitHubMergeRequest(self.repo.token, self.repo.full_name, 13)
+        self.assertIsNone(
+            single_flight.get_key(task, event, (unknown, ), {}, {}))
+
+    def test_unresolved_arguments(self):
+        @ResponderRegistrar.responder(self.plugin, IssueActions.UNLABELED)
+        def unresolved_responder(issue):
+            return issue.number
+
+        responder = ResponderRegistrar._get_responders(
+            IssueActions.UNLABELED, repo=self.repo)[-1]
+        issue = UnresolvedObject('GitHubIssue', (self.repo.full_name, 15))
+        self.assertIsNone(responder(issue))
+        self.assertGreaterEqual(
+            get_metrics('responders.')['responders.unresolved'], 1)
+
+    def test_single_flight_fill(self):
+        computed = []
+
+        def compute():
+            computed.append(True)
+            return 'value'
+
+        self.assertEqual(single_flight.fill('key', lambda: None, compute),
+                         'value')
+        self.assertEqual(single_flight.fill('key', lambda: 'cached', compute),
+                         'cached')
+        self.assertEqual(len(computed), 1)
+
+    @override_settings(RESPONDER_IGNORE_RESULTS=True,
+                       RESPONDER_OUTCOME_BATCH=1)
+    def test_outcome_ledger(self):
+        @ResponderRegistrar.responder(self.plugin, IssueActions.REOPENED)
+        def succeeding_responder(issue):
+            return issue.number
+
+        @ResponderRegistrar.responder(self.plugin, IssueActions.REOPENED)
+        def failing_responder(issue):
+            raise ValueError(issue.number)
+
+        issue = GitHubIssue(self.repo.token, self.repo.full_name, 12)
+        ResponderRegistrar.respond(IssueActions.REOPENED, issue,
+                                   repo=self.repo)
+
+        outcomes = {outcome.status: outcome
+                    for outcome in ResponderOutcome.objects.filter(
+                        event=str(IssueActions.REOPENED), key=issue.url)}
+        self.assertEqual(set(outcomes), {ResponderOutcome.SUCCEEDED,
+                                         ResponderOutcome.FAILED})
+        self.assertIn('succeeding_responder',
+                      outcomes[ResponderOutcome.SUCCEEDED].responder)
+        self.assertEqual(outcomes[ResponderOutcome.SUCCEEDED].error, '')
+        self.assertEqual(outcomes[ResponderOutcome.FAILED].error,
+                         'ValueError')
+
+    @override_settings(RATE_LIMIT_BUDGETS=True)
+    def test_rate_limit_delay(self):
+        @ResponderRegistrar.responder(self.plugin, IssueActions.CLOSED)
+        def budget_responder(issue):
+            return issue.number
+
+        issue = GitHubIssue(self.repo.token, self.repo.full_name, 13)
+        budget = get_budget(self.repo)
+        response = Response()
+        response.headers.update({'X-RateLimit-Limit': '5000',
+                                 'X-RateLimit-Remaining': '4000',
+                                 'X-RateLimit-Reset': str(int(time()) + 600)})
+
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            with budget_scope(budget):
+                observe(response)
+            ResponderRegistrar.respond(IssueActions.CLOSED, issue,
+                                       repo=self.repo)
+            _, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(kwargs[DISPATCH_KWARG]['budget'], budget)
+            self.assertIsNone(m_apply_async.call_args[1]['countdown'])
+
+            # an exhausted budget delays the tasks until it resets
+            response.headers['X-RateLimit-Remaining'] = '3'
+            with budget_scope(budget):
+                observe(response)
+            ResponderRegistrar.respond(IssueActions.CLOSED, issue,
+                                       repo=self.repo)
+            self.assertGreater(m_apply_async.call_args[1]['countdown'], 590)
+
+    @override_settings(CIRCUIT_BREAKERS=True, CIRCUIT_BREAKER_MIN_REQUESTS=1)
+    def test_circuit_deferral(self):
+        self.addCleanup(breakers.reset, 'github')
+
+        @ResponderRegistrar.responder(self.plugin, IssueActions.LABELED)
+        def deferred_responder(issue):
+            return issue.number
+
+        issue = GitHubIssue(self.repo.token, self.repo.full_name, 14)
+        breakers.record('https://api.github.com/repos/a/b/issues', 0.1,
+                        failed=True)
+        self.assertTrue(breakers.is_open('github'))
+
+        with patch.object(Task, 'apply_async') as m_apply_async:
+            for _ in range(3):
+                ResponderRegistrar.respond(IssueActions.LABELED, issue,
+                                           repo=self.repo)
+
+            # the tasks wait for the hoster to recover
+            self.assertEqual(m_apply_async.call_count, 0)
+            self.assertEqual(HeldTask.objects.filter(
+                key=deferral.KEY_PREFIX + 'github').count(), 3)
+            deferral.drain()
+            self.assertEqual(m_apply_async.call_count, 0)
+
+            # and are released in growing batches afterwards
+            breakers.reset('github')
+            deferral.drain()
+            self.assertEqual(m_apply_async.call_count, 1)
+            deferral.drain()
+            self.assertEqual(m_apply_async.call_count, 3)
+            args, kwargs = m_apply_async.call_args[0]
+            self.assertEqual(args[0].number, 14)
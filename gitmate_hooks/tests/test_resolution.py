@@ -0,0 +1,112 @@
+from unittest.mock import patch
+
+from django.http import Http404
+from django.test import override_settings
+from IGitt.GitLab.GitLab import GitLab
+
+from gitmate_config.enums import Providers
+from gitmate_config.tests.test_base import GitmateTestCase
+from gitmate_hooks.models import WebhookEvent
+from gitmate_config.models import Repository
+from gitmate_hooks.resolution import ResolutionCache
+from gitmate_hooks.resolution import resolutions
+
+
+class TestResolutionCache(GitmateTestCase):
+    active = True
+
+    def test_repository_resolution(self):
+        repo, token = resolutions.get_repository(
+            Providers.GITHUB.value, identifier=self.repo.identifier)
+        self.assertEqual(repo.pk, self.repo.pk)
+
+        # steady state resolutions don't touch the database
+        with self.assertNumQueries(0):
+            repo, cached_token = resolutions.get_repository(
+                Providers.GITHUB.value, identifier=self.repo.identifier)
+            gl_repo, _ = resolutions.get_repository(
+                Providers.GITLAB.value, full_name=self.gl_repo.full_name)
+        self.assertIs(cached_token, token)
+        self.assertEqual(gl_repo.pk, self.gl_repo.pk)
+
+        # callers get independent instances
+        repo.plugins.append('testplugin')
+        repo, _ = resolutions.get_repository(
+            Providers.GITHUB.value, identifier=self.repo.identifier)
+        self.assertEqual(repo.plugins, [])
+
+        # saving the repository invalidates the cache
+        self.repo.plugins = ['testplugin']
+        self.repo.save()
+        repo, _ = resolutions.get_repository(
+            Providers.GITHUB.value, identifier=self.repo.identifier)
+        self.assertEqual(repo.plugins, ['testplugin'])
+
+        self.repo.active = False
+        self.repo.save()
+        with self.assertRaises(Http404):
+            resolutions.get_repository(
+                Providers.GITHUB.value, identifier=self.repo.identifier)
+
+    def test_unknown_repository(self):
+        Repository.objects.filter(pk=self.repo.pk).update(active=False)
+        with self.assertRaises(Http404):
+            resolutions.get_repository(
+                Providers.GITHUB.value, identifier=self.repo.identifier)
+
+        # misses aren't cached, so the repository resolves once it's active
+        Repository.objects.filter(pk=self.repo.pk).update(active=True)
+        repo, _ = resolutions.get_repository(
+            Providers.GITHUB.value, identifier=self.repo.identifier)
+        self.assertEqual(repo.pk, self.repo.pk)
+
+    def test_invalidation_across_processes(self):
+        other = ResolutionCache(10, 60)
+        for process in (resolutions, other):
+            process.get_repository(
+                Providers.GITHUB.value, identifier=self.repo.identifier)
+
+        # changes made by another process reach this one as well
+        Repository.objects.filter(pk=self.repo.pk).update(
+            plugins=['testplugin'])
+        other.invalidate()
+        repo, _ = resolutions.get_repository(
+            Providers.GITHUB.value, identifier=self.repo.identifier)
+        self.assertEqual(repo.plugins, ['testplugin'])
+
+    def test_installation_resolution(self):
+        token = resolutions.get_installation_token(Providers.GITHUB.value, 42)
+        with self.assertNumQueries(0):
+            self.assertIs(resolutions.get_installation_token(
+                Providers.GITHUB.value, 42), token)
+
+        # removing the installation invalidates the cache
+        self.gh_inst.delete()
+        self.assertIsNot(resolutions.get_installation_token(
+            Providers.GITHUB.value, 42), token)
+
+    @override_settings(WEBHOOK_EVENT_LOG=True)
+    @patch.object(GitLab, 'handle_webhook', return_value=[])
+    def test_gitlab_resolution_by_project_id(self, m_handle):
+        # the repository was renamed since the delivery was sent
+        old_name = self.gl_repo.full_name
+        self.gl_repo.full_name = old_name + '-renamed'
+        self.gl_repo.save()
+
+        data = {
+            'project': {'id': self.gl_repo.identifier,
+                        'path_with_namespace': old_name},
+            'object_attributes': {'action': 'close', 'iid': 1234},
+        }
+        self.simulate_gitlab_webhook_call('Merge Request Hook', data)
+        self.assertEqual(WebhookEvent.objects.get().repo, self.gl_repo)
+
+        # build hooks carry the project id at the top level
+        data = {
+            'project_id': self.gl_repo.identifier,
+            'repository': {'git_ssh_url': f'git@gitlab.com:{old_name}.git'},
+            'test': 'test_gitlab_resolution_by_project_id',
+        }
+        self.simulate_gitlab_webhook_call('Build Hook', data)
+        self.assertEqual(
+            WebhookEvent.objects.filter(repo=self.gl_repo).count(), 2)
@@ -0,0 +1,96 @@
+import pickle
+
+from django.http import Http404
+from django.test import override_settings
+from IGitt.GitHub.GitHubMergeRequest import GitHubMergeRequest
+from IGitt.GitLab.GitLabIssue import GitLabIssue
+
+from gitmate.serialization import UnresolvedObject
+from gitmate.serialization import dumps
+from gitmate.serialization import loads
+from gitmate.serialization import reference_scope
+from gitmate.utils import seed_snapshot
+from gitmate_config.tests.test_base import GitmateTestCase
+
+
+class TestTaskSerialization(GitmateTestCase):
+    active = True
+
+    def test_references(self):
+        pr = GitHubMergeRequest.from_data(
+            {'title': 'Add a feature', 'body': 'x' * 1000},
+            self.repo.token, self.repo.full_name, 101)
+        with reference_scope(self.repo.pk, 'event'):
+            data = dumps(((pr, self.gl_repo.igitt_repo),
+                          {'label': 'size/L'}))
+
+        # neither the token nor the data are part of the message
+        self.assertLess(len(data), len(pickle.dumps(pr)) / 10)
+        self.assertNotIn(b'xxxx', data)
+
+        (loaded_pr, loaded_repo), kwargs = loads(data)
+        self.assertIsInstance(loaded_pr, GitHubMergeRequest)
+        self.assertEqual(loaded_pr.url, pr.url)
+        self.assertEqual(loaded_repo.url, self.gl_repo.igitt_repo.url)
+        self.assertEqual(kwargs, {'label': 'size/L'})
+
+        # tasks for the same object share the instance
+        self.assertIs(loads(data)[0][0], loaded_pr)
+
+    @override_settings(TASK_IGITT_SNAPSHOTS=True)
+    def test_snapshots(self):
+        issue = GitLabIssue.from_data(
+            {'title': 'Crash on startup'},
+            self.gl_repo.token, self.gl_repo.full_name, 102)
+        seed_snapshot(issue, 1)
+
+        with reference_scope(self.gl_repo.pk, 'event'):
+            loaded = loads(dumps(issue))
+            self.assertEqual(loaded.data['title'], 'Crash on startup')
+
+            # newer snapshots replace the data of the shared instance
+            issue.data = {'title': 'Crash on shutdown'}
+            seed_snapshot(issue, 2)
+            self.assertIs(loads(dumps(issue)), loaded)
+        self.assertEqual(loaded.data['title'], 'Crash on shutdown')
+
+    def test_consecutive_events(self):
+        pr = GitHubMergeRequest(self.repo.token, self.repo.full_name, 103)
+
+        with reference_scope(self.repo.pk, 'first'):
+            message = dumps(pr)
+        loaded = loads(message)
+        loaded.data = {'title': 'Add a feature'}
+
+        # the tasks of an event share the data fetched by the first one
+        self.assertIs(loads(message), loaded)
+        self.assertEqual(loaded.data['title'], 'Add a feature')
+
+        # the tasks of the next event don't see it
+        with reference_scope(self.repo.pk, 'second'):
+            message = dumps(pr)
+        self.assertIsNot(loads(message), loaded)
+
+        # rehydrated objects keep their event when sent on, e.g. when held
+        self.assertIs(loads(dumps(loaded)), loaded)
+
+    def test_repository_changes(self):
+        pr = GitHubMergeRequest(self.repo.token, self.repo.full_name, 104)
+        with reference_scope(self.repo.pk, 'event'):
+            message = dumps(pr)
+
+        # the repository is found by its primary key after a rename
+        self.repo.full_name = self.repo.full_name.upper()
+        self.repo.save()
+        self.assertEqual(loads(message).url, pr.url)
+
+        # the objects of deactivated repositories are skipped by workers
+        self.repo.active = False
+        self.repo.save()
+        with reference_scope(self.repo.pk, 'other event'):
+            message = dumps(pr)
+        with self.assertRaises(Http404):
+            loads(message)
+        unresolved = loads(message, strict=False)
+        self.assertIsInstance(unresolved, UnresolvedObject)
+        self.assertEqual(unresolved.args, (pr._repository, 104))
@@ -0,0 +1,31 @@
+from time import time
+from unittest.mock import MagicMock
+
+from gitmate.utils import get_snapshot_time
+from gitmate.utils import lock_igitt_object
+from gitmate.utils import seed_snapshot
+from gitmate_config.tests.test_base import GitmateTestCase
+
+
+class TestPayloadSnapshots(GitmateTestCase):
+
+    def setUp(self):
+        self.pr = MagicMock(url=f'https://example.com/pull/{time()}')
+
+    def test_seeded_object(self):
+        self.assertIsNone(get_snapshot_time(self.pr))
+        seed_snapshot(self.pr, 1)
+        self.assertEqual(get_snapshot_time(self.pr), 1)
+
+    def test_writes_refresh(self):
+        # read-modify-write callers mustn't act on the payload data
+        seed_snapshot(self.pr, 1)
+        with lock_igitt_object('label mr', self.pr):
+            pass
+        self.pr.refresh.assert_called_once_with()
+        self.assertGreater(get_snapshot_time(self.pr), 1)
+
+    def test_refresh_not_needed(self):
+        with lock_igitt_object('assign issue', self.pr, refresh_needed=False):
+            pass
+        self.pr.refresh.assert_not_called()
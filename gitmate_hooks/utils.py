@@ -2,22 +2,56 @@ from collections import defaultdict
 from enum import Enum
 from inspect import Parameter
 from inspect import signature
+from itertools import islice
+from time import monotonic
+from types import MappingProxyType
 from typing import Callable
+from typing import NamedTuple
+from typing import Optional
+from uuid import uuid4
 import logging
 
 from billiard.einfo import ExceptionInfo
 from celery import Task
 from celery.schedules import crontab
 from celery.utils.log import get_logger
-from django.apps import apps
+from django.conf import settings
 
 from gitmate.apps import get_all_plugins
+from gitmate.apps import get_settings_snapshot
+from gitmate.breakers import CircuitOpenError
 from gitmate.celery import app as celery
+from gitmate.http_cache import get_request_count
+from gitmate.http_cache import request_scope
+from gitmate.labels import label_transaction
+from gitmate.metrics import increment
+from gitmate.rate_limits import budget_scope
+from gitmate.rate_limits import get_budget
+from gitmate.rate_limits import get_delay
+from gitmate.serialization import UnresolvedObject
+from gitmate.serialization import reference_scope
 from gitmate.utils import GitmatePluginConfig
+from gitmate.utils import get_object_key
 from gitmate_config.enums import GitmateActions
+from gitmate_config.enums import TaskPriority
 from gitmate_config.enums import TaskQueue
 from gitmate_config.models import Repository
+from gitmate_hooks import debounce
+from gitmate_hooks import deferral
+from gitmate_hooks import fairness
+from gitmate_hooks import generations
+from gitmate_hooks import outcomes
+from gitmate_hooks import routing
+from gitmate_hooks import serial
+from gitmate_hooks import shedding
+from gitmate_hooks import single_flight
 from gitmate_hooks.decorators import block_comment
+from gitmate_hooks.models import ResponderOutcome
+
+
+# Keyword argument carrying the dispatch metadata of a responder invocation.
+# It is consumed by ``ExceptionLoggerTask`` before the responder runs.
+DISPATCH_KWARG = '_dispatch'
 
 
 def run_plugin_for_all_repos(plugin_name: str,
@@ -31,10 +65,42 @@ def run_plugin_for_all_repos(plugin_name: str,
     :param event_name:  A string or enum for the type of event.
                         e.g. MergeRequestActions.COMMENTED
     :param is_active:   A boolean value for active state of plugin.
+
+    With ``SCHEDULED_FANOUT_CHUNK_SIZE`` set, the repositories are split into
+    chunks of consecutive ids, which are handled by separate
+    ``run_plugin_for_repo_range`` tasks. The chunks are dealt to
+    ``SCHEDULED_FANOUT_PARALLELISM`` lanes, of which only the first chunks are
+    published right away. Every chunk publishes the next one of its lane once
+    it finished, so no more chunks than lanes are ever in flight.
+    """
+    chunk_size = settings.SCHEDULED_FANOUT_CHUNK_SIZE
+    if not chunk_size:
+        run_plugin_for_repo_range(plugin_name, event_name, is_active)
+        return
+
+    ids = Repository.objects.filter(
+        active=is_active, plugins__contains=[plugin_name]).order_by(
+        'id').values_list('id', flat=True).iterator()
+    ranges = [(chunk[0], chunk[-1])
+              for chunk in iter(lambda: list(islice(ids, chunk_size)), [])]
+    lanes = settings.SCHEDULED_FANOUT_PARALLELISM
+    for lane in range(min(lanes, len(ranges))):
+        _publish_repo_ranges(plugin_name, event_name, is_active,
+                             ranges[lane::lanes])
+
+
+def _publish_repo_ranges(plugin_name: str,
+                         event_name: (str, Enum),
+                         is_active: bool,
+                         ranges: list):
     """
-    for repo in Repository.objects.filter(
-            active=is_active, plugins__contains=[plugin_name]):
-        ResponderRegistrar.respond(event_name, repo.igitt_repo, repo=repo)
+    Publishes the task for the first of the given ranges of repository ids,
+    which publishes the one for the next range when it finished.
+    """
+    (first_id, last_id), *remaining = ranges
+    run_plugin_for_repo_range.apply_async(
+        (plugin_name, event_name, is_active, first_id, last_id),
+        {'ranges': remaining})
 
 
 class ExceptionLoggerTask(Task):
@@ -45,6 +111,79 @@ class ExceptionLoggerTask(Task):
     http://docs.celeryproject.org/en/latest/userguide/tasks.html#task-inheritance
     """
 
+    def __call__(self, *args, **kwargs):
+        dispatch = kwargs.pop(DISPATCH_KWARG, None) or {}
+        try:
+            return self._call_responder(dispatch, *args, **kwargs)
+        finally:
+            if 'single_flight' in dispatch:
+                # identical work may be dispatched again now
+                single_flight.leave(dispatch['single_flight'])
+            if 'serial' in dispatch:
+                # the next task for the object may be published now
+                serial.release(dispatch['serial'])
+            if 'tenant' in dispatch:
+                # the repository may have its next task published now
+                fairness.release(*dispatch['tenant'])
+
+    def _call_responder(self, dispatch: dict, *args, **kwargs):
+        if self._is_skipped(dispatch, args):
+            outcomes.record(self.name, dispatch, args,
+                            ResponderOutcome.SKIPPED)
+            return None
+
+        generation = dispatch.get('generation')
+        status, error, api_calls = ResponderOutcome.FAILED, '', 0
+        started = monotonic()
+        try:
+            with request_scope(), budget_scope(dispatch.get('budget')):
+                sent = get_request_count()
+                try:
+                    with label_transaction(), generations.running(generation):
+                        retval = super().__call__(*args, **kwargs)
+                finally:
+                    api_calls = get_request_count() - sent
+            status = ResponderOutcome.SUCCEEDED
+            return retval
+        except Exception as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            duration = monotonic() - started
+            routing.record_runtime(self.name, duration)
+            outcomes.record(self.name, dispatch, args, status, duration,
+                            api_calls, error)
+
+    def _is_skipped(self, dispatch: dict, args: tuple) -> bool:
+        for arg in args:
+            if isinstance(arg, UnresolvedObject):
+                # the repository was deactivated since the task was published
+                get_logger('celery.worker').warning(
+                    f'Skipping {self.name}, the repository of {arg!r} is '
+                    f'not active anymore.')
+                increment('responders.unresolved')
+                return True
+
+        if 'debounce' in dispatch and not debounce.is_current(
+                *dispatch['debounce']):
+            # a later event for the same object superseded this one
+            increment('responders.debounced')
+            return True
+
+        if 'deadline' in dispatch and shedding.is_expired(
+                dispatch['deadline']):
+            # housekeeping which waited too long in the queue
+            return True
+
+        generation = dispatch.get('generation')
+        if generation is not None and not generations.is_current(
+                *generation):
+            # the merge request got a new head since
+            increment('responders.superseded')
+            return True
+
+        return False
+
     def on_failure(self,
                    exc: Exception,
                    task_id: int,
@@ -52,6 +191,12 @@ class ExceptionLoggerTask(Task):
                    kwargs: dict,
                    einfo: ExceptionInfo):  # pragma: no cover
         logger = get_logger('celery.worker')
+        if isinstance(exc, CircuitOpenError):
+            # the hoster is failing, the traceback wouldn't tell anything new
+            logger.warning(f'Task {self.name}[{task_id}] failed: {exc}')
+            super().on_failure(exc, task_id, args, kwargs, einfo)
+            return
+
         warning = ('Task {task}[{t_id}] had unexpected failure:\n'
                    '\nargs: {args}\n\nkwargs: {kwargs}\n'
                    '\n{einfo}').format(task=self.name,
@@ -63,6 +208,84 @@ class ExceptionLoggerTask(Task):
         super().on_failure(exc, task_id, args, kwargs, einfo)
 
 
+@celery.task(base=ExceptionLoggerTask,
+             queue=TaskQueue.SHORT.value,
+             ignore_result=True)
+def run_plugin_for_repo_range(plugin_name: str,
+                              event_name: (str, Enum),
+                              is_active: bool = True,
+                              first_id: int = None,
+                              last_id: int = None,
+                              ranges: list = ()):
+    """
+    Triggers the responders registered with `event_name` for the repositories
+    with ids in the given range, based on the active state of a plugin, see
+    ``run_plugin_for_all_repos``.
+
+    :param first_id: The id of the first repository, unbounded by default.
+    :param last_id:  The id of the last repository, unbounded by default.
+    :param ranges:   The ranges of ids handled after this one in its lane.
+    """
+    repos = Repository.objects.filter(
+        active=is_active, plugins__contains=[plugin_name])
+    if first_id is not None:
+        repos = repos.filter(id__gte=first_id)
+    if last_id is not None:
+        repos = repos.filter(id__lte=last_id)
+    try:
+        for repo in repos.order_by('id').iterator():
+            ResponderRegistrar.respond(event_name, repo.igitt_repo, repo=repo)
+    finally:
+        if ranges:
+            # a failing chunk mustn't stop the rest of its lane
+            _publish_repo_ranges(plugin_name, event_name, is_active, ranges)
+
+
+@celery.task(base=ExceptionLoggerTask, queue=TaskQueue.SHORT.value,
+             ignore_result=settings.RESPONDER_IGNORE_RESULTS)
+def run_fused_responders(*args, calls: list = ()):
+    """
+    Runs several responders for the same event in one worker, see
+    ``RESPONDER_FUSED_DISPATCH``. All of them share the deserialized
+    arguments, so IGitt objects fetched by one responder are reused by the
+    others. A failing responder doesn't affect the remaining ones.
+
+    :param args:  The arguments passed to every responder.
+    :param calls: The name and keyword arguments of each responder.
+    :return:      The return value of each responder, ``None`` for failed
+                  ones.
+    """
+    logger = get_logger('celery.worker')
+    retvals = []
+    for name, kwargs in calls:
+        started = monotonic()
+        try:
+            retvals.append(celery.tasks[name](*args, **kwargs))
+        except CircuitOpenError as exc:
+            increment('responders.failed')
+            logger.warning(f'Fused responder {name} failed: {exc}')
+            retvals.append(None)
+        except Exception:
+            increment('responders.failed')
+            logger.exception(f'Fused responder {name} failed.')
+            retvals.append(None)
+        logger.info(f'Fused responder {name} took '
+                    f'{monotonic() - started:.3f}s.')
+    return retvals
+
+
+class DispatchEntry(NamedTuple):
+    """
+    A responder as it is dispatched by ``ResponderRegistrar.respond``.
+    """
+    task: ExceptionLoggerTask
+    # the names of the plugin settings the responder accepts
+    options: frozenset
+    # the configuration of the plugin, if it's installed
+    config: Optional[GitmatePluginConfig]
+    priority: Enum
+
+
 class ResponderRegistrar:
     """
     This class provides ability to register responders and invoke them.
@@ -97,8 +320,12 @@ class ResponderRegistrar:
     """
 
     _responders = defaultdict(list)
-    _options = defaultdict(list)
     _plugins = {}
+    _priorities = {}
+
+    # maps every event to the dispatch entries of each plugin, built on first
+    # use and dropped whenever a responder is registered
+    _dispatch_table = None
 
     @classmethod
     def scheduler(cls,
@@ -130,6 +357,7 @@ class ResponderRegistrar:
                             plugin: str,
                             interval: (crontab, float),
                             queue: Enum = TaskQueue.SHORT,
+                            priority: Enum = TaskPriority.STATUS_CRITICAL,
                             **kwargs):
         """
         Registers the decorated function as responder and register
@@ -141,6 +369,7 @@ class ResponderRegistrar:
                 object specifying task trigger time.
                 See http://docs.celeryproject.org/en/latest/reference/celery.schedules.html#celery.schedules.crontab
         :param queue: Queue to use for the scheduled_responder's tasks.
+        :param priority: Priority class of the responder, see ``responder``.
         :param kwargs: Keyword arguments to pass to `run_plugin_for_all_repos`.
 
         >>> from gitmate_hooks.utils import ResponderRegistrar
@@ -155,7 +384,8 @@ class ResponderRegistrar:
         def _wrapper(function: Callable):
             action = '{}.{}'.format(plugin, function.__name__)
             periodic_task_args = (plugin, action)
-            function = cls.responder(plugin, action)(function)
+            function = cls.responder(
+                plugin, action, priority=priority)(function)
             task = celery.task(run_plugin_for_all_repos,
                                base=ExceptionLoggerTask,
                                queue=queue.value)
@@ -166,37 +396,111 @@ class ResponderRegistrar:
 
     @classmethod
     def responder(cls, plugin_name: str, *actions: [Enum],
-                  queue: Enum = TaskQueue.SHORT):
+                  queue: Enum = TaskQueue.SHORT,
+                  priority: Enum = TaskPriority.STATUS_CRITICAL):
         """
         Registers the decorated function as a responder to the actions
         provided. Specifying description as defaults on option specific args
         is mandatory.
+
+        The priority class decides how the responder is treated when the
+        broker backs up: interactive responders are delivered first and
+        housekeeping responders may be deferred or dropped, see
+        ``gitmate_hooks.shedding``.
         """
         def _wrapper(function):
             task = celery.task(function,
                                base=ExceptionLoggerTask,
-                               queue=queue.value)
+                               queue=queue.value,
+                               ignore_result=settings.RESPONDER_IGNORE_RESULTS)
             for action in actions:
                 cls._responders[action].append(task)
             cls._plugins[task] = plugin_name
-            params = signature(function).parameters.values()
-            cls._options[task] = [param.name for param in params
-                                  if param.default is not Parameter.empty]
+            cls._priorities[task] = priority
+            cls._dispatch_table = None
             return function
         return _wrapper
 
+    @classmethod
+    def _freeze(cls) -> MappingProxyType:
+        """
+        Builds the immutable dispatch table, which maps every event to the
+        dispatch entries of each plugin in registration order.
+        """
+        configs = {config.plugin_name: config for config in get_all_plugins()}
+        table = {}
+        for event, tasks in cls._responders.items():
+            entries = defaultdict(list)
+            for task in tasks:
+                plugin = cls._plugins[task]
+                params = signature(task.run).parameters.values()
+                entries[plugin].append(DispatchEntry(
+                    task=task,
+                    options=frozenset(param.name for param in params
+                                      if param.default is not Parameter.empty),
+                    config=configs.get(plugin),
+                    priority=cls._priorities[task]))
+            table[event] = MappingProxyType(
+                {plugin: tuple(items) for plugin, items in entries.items()})
+        return MappingProxyType(table)
+
+    @classmethod
+    def _get_dispatch_table(cls) -> MappingProxyType:
+        table = cls._dispatch_table
+        if table is None:
+            table = cls._dispatch_table = cls._freeze()
+        return table
+
+    @classmethod
+    def has_responders(cls,
+                       actions: [Enum],
+                       repo: Repository = None) -> bool:
+        """
+        Checks whether a responder is registered for any of the given actions.
+        Only the plugins active on the repository are considered, if ``repo``
+        is specified.
+        """
+        table = cls._get_dispatch_table()
+        plugins = set().union(*(table.get(action, {}).keys()
+                                for action in actions))
+        if repo is not None:
+            plugins.intersection_update(repo.plugins)
+        return bool(plugins)
+
     @classmethod
     def _filter_matching_options(cls,
-                                 responder: ExceptionLoggerTask,
-                                 plugin: GitmatePluginConfig,
-                                 repo: Repository) -> dict:
+                                 entry: DispatchEntry,
+                                 options: dict) -> dict:
         """
         Filters the matching options for the given responder out of all the
-        settings registered for the given plugin.
+        settings registered for its plugin.
+        """
+        return {key: options[key] for key in entry.options & options.keys()}
+
+    @classmethod
+    def _get_entries(cls,
+                     event: Enum,
+                     repo: Repository = None,
+                     plugin_name: str = None) -> [DispatchEntry]:
+        """
+        Retrieves the dispatch entries of the responders for the specified
+        event. Filters only the ones within a plugin, if ``plugin name`` is
+        specified. Filters only for responders active on a repository, if
+        ``repo`` is specified.
         """
-        options = plugin.get_settings(repo)
-        keys = set(cls._options[responder]) & set(options.keys())
-        return dict(zip(keys, [options[k] for k in keys]))
+        entries = cls._get_dispatch_table().get(event)
+        if not entries:
+            return []
+
+        plugins = entries.keys()
+        if repo is not None and isinstance(repo, Repository):
+            plugins &= set(repo.plugins)
+        if plugin_name:
+            plugins &= {plugin_name}
+
+        return [entry
+                for plugin, items in entries.items() if plugin in plugins
+                for entry in items]
 
     @classmethod
     def _get_responders(cls,
@@ -204,23 +508,91 @@ class ResponderRegistrar:
                         repo: Repository = None,
                         plugin_name: str = None) -> [ExceptionLoggerTask]:
         """
-        Retrieves the list of responders for the specified event. Filters only
-        the ones within a plugin, if ``plugin name`` is specified. Filters only
-        for responders active on a repository, if ``repo`` is specified.
+        Retrieves the list of responders for the specified event, filtered
+        like ``_get_entries``.
         """
-        responders = cls._responders.get(event, [])
-
-        def plugin_filter(r): return plugin_name == cls._plugins[r]
-
-        def repo_filter(r): return cls._plugins[r] in repo.plugins
+        return [entry.task
+                for entry in cls._get_entries(event, repo, plugin_name)]
 
-        if repo is not None and isinstance(repo, Repository):
-            responders = list(filter(repo_filter, responders))
-
-        if plugin_name:
-            responders = list(filter(plugin_filter, responders))
+    @classmethod
+    def _publish(cls,
+                 task: ExceptionLoggerTask,
+                 args: tuple,
+                 kwargs: dict,
+                 countdown: float,
+                 priority: Enum,
+                 queue: str = None):
+        try:
+            return task.apply_async(
+                args, kwargs, countdown=countdown, queue=queue or task.queue,
+                priority=shedding.MESSAGE_PRIORITIES[priority])
+        except BaseException:  # pragma: no cover
+            logging.exception(f'ERROR: A responder failed.\n'
+                              f'Responder:   {repr(task)}\n'
+                              f'Args:        {repr(args)}\n'
+                              f'Options:     {repr(kwargs)}')
 
-        return responders
+    @classmethod
+    def _submit(cls,
+                repo: Repository,
+                task: ExceptionLoggerTask,
+                args: tuple,
+                kwargs: dict,
+                countdown: float,
+                priority: Enum,
+                queue: str = None):
+        """
+        Publishes the task, unless another task for the same object or too
+        many tasks of the repository are in flight already and the task is
+        held back, see ``gitmate_hooks.serial`` and
+        ``gitmate_hooks.fairness``. Tasks of repositories whose rate limit
+        budget is exhausted are delayed until it resets, see
+        ``gitmate.rate_limits``, and the ones for failing hosters are
+        deferred, see ``gitmate_hooks.deferral``.
+        """
+        budget = get_budget(repo) if isinstance(repo, Repository) else None
+        if budget is not None:
+            kwargs = {**kwargs, DISPATCH_KWARG: {
+                **kwargs.get(DISPATCH_KWARG, {}), 'budget': budget}}
+            delay = get_delay(budget)
+            if delay:
+                countdown = max(countdown or 0, delay)
+
+        hoster = (deferral.get_failing_hoster(repo)
+                  if isinstance(repo, Repository) else None)
+        if hoster is not None:
+            deferral.defer(repo, hoster, task, args, kwargs, countdown,
+                           shedding.MESSAGE_PRIORITIES[priority],
+                           queue or task.queue)
+            return None
+
+        key = serial.get_key(args) if isinstance(repo, Repository) else None
+        if key is not None:
+            kwargs = {**kwargs, DISPATCH_KWARG: {
+                **kwargs.get(DISPATCH_KWARG, {}), 'serial': key}}
+            if not serial.acquire(key):
+                serial.hold(repo, key, task, args, kwargs, countdown,
+                            shedding.MESSAGE_PRIORITIES[priority],
+                            queue or task.queue)
+                return None
+
+        tenant = fairness.get_tenant(repo)
+        if tenant is not None:
+            slot = fairness.admit(tenant)
+            if slot is None:
+                fairness.hold(tenant, task, args, kwargs, countdown,
+                              shedding.MESSAGE_PRIORITIES[priority],
+                              queue or task.queue)
+                return None
+            kwargs = fairness.occupy(kwargs, tenant, slot)
+
+        result = cls._publish(task, args, kwargs, countdown, priority, queue)
+        if result is None:  # pragma: no cover
+            if tenant is not None:
+                fairness.release(tenant, slot)
+            if key is not None:
+                serial.release(key)
+        return result
 
     @classmethod
     @block_comment
@@ -232,31 +604,102 @@ class ResponderRegistrar:
         """
         Invoke all responders for the given event. If a plugin name is
         specified, invokes responders only within that plugin.
+
+        With ``RESPONDER_FUSED_DISPATCH`` turned on, the responders on the
+        short queue are run together by a single ``run_fused_responders``
+        task, the ones on other queues are still dispatched separately.
+
+        The queue of each responder is chosen by ``routing.get_queue``. With
+        ``RESPONDER_SINGLE_FLIGHT`` turned on, responders with an identical
+        task in flight are skipped, see ``gitmate_hooks.single_flight``.
         """
         retvals = []
-        options_specified = {}
+        dispatch, countdown = {}, None
         if isinstance(event, GitmateActions):
-            responders = cls._get_responders(event, plugin_name=plugin_name)
+            entries = cls._get_entries(event, plugin_name=plugin_name)
         else:
-            responders = cls._get_responders(event, repo=repo)
-
-        for responder in responders:
-            # filter options for responder from options of plugin it is
-            # registered in, to avoid naming conflicts when two plugins have
-            # the same model field. e.g. `stale_label`
-            plugin = cls._plugins[responder]
-            registered_plugins = [conf.plugin_name
-                                  for conf in get_all_plugins()]
-            if plugin in registered_plugins:
-                config = apps.get_app_config(f'gitmate_{plugin}')
-                options_specified = cls._filter_matching_options(
-                    responder, config, repo)
-            try:
-                retvals.append(responder.delay(*args, **options_specified))
-            except BaseException:  # pragma: no cover
-                logging.exception(f'ERROR: A responder failed.\n'
-                                  f'Responder:   {repr(responder)}\n'
-                                  f'Args:        {repr(args)}\n'
-                                  f'Options:     {repr(options_specified)}')
-
-        return retvals
+            entries = cls._get_entries(event, repo=repo)
+
+        if settings.RESPONDER_IGNORE_RESULTS:
+            # the outcomes are recorded per event instead
+            dispatch['event'] = str(event)
+
+        window = settings.RESPONDER_DEBOUNCE_WINDOWS.get(str(event))
+        if window and entries and args and hasattr(args[0], 'url'):
+            key = f'{event}:{get_object_key(args[0])}'
+            dispatch['debounce'] = (key, debounce.stamp(key))
+            countdown = window
+
+        if entries and args and hasattr(args[0], 'url'):
+            key = get_object_key(args[0])
+            generation = generations.get_generation(event, key)
+            if generation is not None:
+                dispatch['generation'] = (key, generation)
+
+        # the settings of all involved plugins are loaded at once, the options
+        # of each responder are filtered from the settings of its own plugin
+        # to avoid naming conflicts when two plugins have the same model
+        # field, e.g. `stale_label`
+        snapshot = {}
+        if isinstance(repo, Repository):
+            configs = {entry.config.plugin_name: entry.config
+                       for entry in entries if entry.config is not None}
+            snapshot = get_settings_snapshot(repo, list(configs.values()))
+
+        # the tasks of this event share the IGitt objects they rehydrate, the
+        # ones of other events don't
+        pk = repo.pk if isinstance(repo, Repository) else None
+        with reference_scope(pk, uuid4().hex):
+            fused = []
+            for entry in entries:
+                responder = entry.task
+                queue = routing.get_queue(responder)
+                task_dispatch, task_countdown = dispatch, countdown
+                if entry.priority is TaskPriority.HOUSEKEEPING:
+                    admitted, defer_for = shedding.admit_housekeeping(queue)
+                    if not admitted:
+                        continue
+                    if defer_for:
+                        task_countdown = (countdown or 0) + defer_for
+                    deadline = shedding.get_deadline(task_countdown)
+                    if deadline is not None:
+                        task_dispatch = {**dispatch, 'deadline': deadline}
+
+                options_specified = {}
+                if entry.config is not None:
+                    options_specified = cls._filter_matching_options(
+                        entry, snapshot.get(entry.config.plugin_name, {}))
+
+                flight = single_flight.get_key(responder, event, args,
+                                               options_specified, dispatch)
+                if flight is not None:
+                    if not single_flight.join(flight):
+                        # an identical task is in flight already
+                        continue
+                    task_dispatch = {**task_dispatch, 'single_flight': flight}
+                kwargs = {**options_specified, DISPATCH_KWARG: task_dispatch}
+
+                if (settings.RESPONDER_FUSED_DISPATCH and
+                        queue == TaskQueue.SHORT.value and
+                        task_countdown == countdown):
+                    fused.append((entry, kwargs))
+                    continue
+
+                retvals.append(cls._submit(
+                    repo, responder, args, kwargs, task_countdown,
+                    entry.priority, queue))
+
+            if len(fused) == 1:
+                entry, kwargs = fused[0]
+                retvals.append(cls._submit(
+                    repo, entry.task, args, kwargs, countdown, entry.priority,
+                    TaskQueue.SHORT.value))
+            elif fused:
+                priority = max((entry.priority for entry, _ in fused),
+                               key=shedding.MESSAGE_PRIORITIES.get)
+                calls = [(entry.task.name, kwargs) for entry, kwargs in fused]
+                retvals.append(cls._submit(repo, run_fused_responders, args,
+                                           {'calls': calls}, countdown,
+                                           priority))
+
+        return [retval for retval in retvals if retval is not None]
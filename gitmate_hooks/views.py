@@ -1,19 +1,37 @@
+from time import time
 import json
 
 from django.conf import settings
-from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 from rest_framework.decorators import api_view
+from rest_framework.request import Request
 from rest_framework.response import Response
-from IGitt.GitHub.GitHub import GitHub
-from IGitt.GitLab.GitLab import GitLab
 
 from gitmate_config.enums import Providers
-from gitmate_config.models import Repository
-from gitmate_config.models import Installation
-from gitmate_hooks.utils import ResponderRegistrar
 from gitmate_hooks.decorators import signature_check
+from gitmate_hooks.tasks import ingest_webhook
+from gitmate_hooks.webhooks import deliveries
+from gitmate_hooks.webhooks import get_delivery_id
+from gitmate_hooks.webhooks import get_webhook_headers
+from gitmate_hooks.webhooks import handle_github_webhook
+from gitmate_hooks.webhooks import handle_gitlab_webhook
+from gitmate_hooks.webhooks import may_respond
+
+
+def _enqueue_webhook(provider: str, event: str, request: Request):
+    """
+    Stores the raw delivery on the broker for the ingest task and accepts it.
+    Deliveries for events no plugin responds to are acknowledged right away.
+    """
+    if not may_respond(provider, event):
+        return Response(status=status.HTTP_200_OK)
+
+    ingest_webhook.delay(provider,
+                         get_webhook_headers(request.META),
+                         request.body.decode('utf-8'),
+                         received_at=time())
+    return Response(status=status.HTTP_202_ACCEPTED)
 
 
 @csrf_exempt
@@ -25,36 +43,22 @@ def github_webhook_receiver(request):
     """
     Receives webhooks from GitHub and carries out the approriate action.
     """
-    webhook = json.loads(request.body.decode('utf-8'))
-    event = request.META['HTTP_X_GITHUB_EVENT']
-    repo_obj, token = None, None
-
-    # responding to regular webhook calls for registered events
-    if 'repository' in webhook:
-        repository = webhook['repository']
-        repo_obj = get_object_or_404(Repository,
-                                     identifier=repository['id'],
-                                     active=True,
-                                     provider=Providers.GITHUB.value)
-        token = repo_obj.token
-
-    # webhook was received from an installation
-    if 'installation' in webhook:
-        installation_obj, _ = Installation.objects.get_or_create(
-            provider=Providers.GITHUB.value,
-            identifier=webhook['installation']['id'])
-        token = installation_obj.token
-
-    # if the webhook is irrelevant, e.g. events like `ping`, `zen` etc.
-    if token is None:  # pragma: no cover
+    delivery = get_delivery_id(
+        Providers.GITHUB.value, request.META, request.body)
+    if deliveries.is_duplicate(Providers.GITHUB.value, delivery):
         return Response(status=status.HTTP_200_OK)
 
     try:
-        for action, objs in GitHub(token).handle_webhook(event, webhook):
-            ResponderRegistrar.respond(action, *objs, repo=repo_obj)
-    except NotImplementedError:  # pragma: no cover
-        pass
-
+        event = request.META['HTTP_X_GITHUB_EVENT']
+        if settings.WEBHOOK_ASYNC_INGEST:
+            return _enqueue_webhook(Providers.GITHUB.value, event, request)
+
+        webhook = json.loads(request.body.decode('utf-8'))
+        handle_github_webhook(event, webhook, delivery=delivery)
+    except Exception:
+        # the redelivery of a failed delivery has to be handled again
+        deliveries.forget(Providers.GITHUB.value, delivery)
+        raise
     return Response(status=status.HTTP_200_OK)
 
 
@@ -67,36 +71,20 @@ def gitlab_webhook_receiver(request):
     """
     Receives webhooks from GitLab and carries out the appropriate action.
     """
-    webhook = json.loads(request.body.decode('utf-8'))
-    event = request.META['HTTP_X_GITLAB_EVENT']
-
-    def _get_repo_name(data: dict):
-        # Push, Tag, Issue, Note, Wiki Page and Pipeline Hooks
-        if 'project' in data.keys():
-            return data['project']['path_with_namespace']
-
-        # Merge Request Hook
-        if 'object_attributes' in data.keys():
-            return data['object_attributes']['target']['path_with_namespace']
-
-        # Build Hook
-        if 'repository' in data.keys():
-            ssh_url = data['repository']['git_ssh_url']
-            return ssh_url[ssh_url.find(':') + 1: ssh_url.rfind('.git')]
-
-    repository = _get_repo_name(webhook)
-
-    repo_obj = get_object_or_404(Repository,
-                                 active=True,
-                                 full_name=repository,
-                                 provider=Providers.GITLAB.value)
-
-    try:
-        for action, objs in GitLab(repo_obj.token).handle_webhook(
-                event, webhook):
-            ResponderRegistrar.respond(action, *objs, repo=repo_obj)
-    except NotImplementedError:  # pragma: no cover
-        # IGitt can't handle it yet, upstream issue, no plugin needs it yet
+    delivery = get_delivery_id(
+        Providers.GITLAB.value, request.META, request.body)
+    if deliveries.is_duplicate(Providers.GITLAB.value, delivery):
         return Response(status=status.HTTP_200_OK)
 
+    try:
+        event = request.META['HTTP_X_GITLAB_EVENT']
+        if settings.WEBHOOK_ASYNC_INGEST:
+            return _enqueue_webhook(Providers.GITLAB.value, event, request)
+
+        webhook = json.loads(request.body.decode('utf-8'))
+        handle_gitlab_webhook(event, webhook, delivery=delivery)
+    except Exception:
+        # the redelivery of a failed delivery has to be handled again
+        deliveries.forget(Providers.GITLAB.value, delivery)
+        raise
     return Response(status=status.HTTP_200_OK)
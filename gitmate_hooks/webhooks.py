@@ -0,0 +1,369 @@
+"""
+This module contains the processing of incoming webhook deliveries. It is
+shared by the webhook receivers and the ingest task, which handles deliveries
+accepted in the ``WEBHOOK_ASYNC_INGEST`` mode.
+"""
+from datetime import datetime
+from datetime import timezone
+from hashlib import sha256
+from time import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from IGitt.GitHub.GitHub import GitHub
+from IGitt.GitLab.GitLab import GitLab
+from IGitt.Interfaces.Actions import InstallationActions
+from IGitt.Interfaces.Actions import IssueActions
+from IGitt.Interfaces.Actions import MergeRequestActions
+from IGitt.Interfaces.Actions import PipelineActions
+
+from gitmate.metrics import increment
+from gitmate.utils import ExpiringCache
+from gitmate.utils import seed_snapshot
+from gitmate_config.enums import Providers
+from gitmate_config.models import Repository
+from gitmate_hooks.models import WebhookEvent
+from gitmate_hooks.resolution import resolutions
+from gitmate_hooks.utils import ResponderRegistrar
+
+
+# request headers holding the event name of a delivery for each provider
+WEBHOOK_EVENT_HEADERS = {
+    Providers.GITHUB.value: 'HTTP_X_GITHUB_EVENT',
+    Providers.GITLAB.value: 'HTTP_X_GITLAB_EVENT',
+}
+
+# request headers which carry secrets and must never be stored
+WEBHOOK_SECRET_HEADERS = {'HTTP_X_HUB_SIGNATURE', 'HTTP_X_GITLAB_TOKEN'}
+
+
+_GITHUB = Providers.GITHUB.value
+_GITLAB = Providers.GITLAB.value
+_ALL_ISSUE_ACTIONS = frozenset(IssueActions)
+_ALL_MR_ACTIONS = frozenset(MergeRequestActions)
+_COMMENT_ACTIONS = frozenset({IssueActions.COMMENTED,
+                              MergeRequestActions.COMMENTED})
+_PIPELINE_ACTIONS = frozenset({PipelineActions.UPDATED})
+_NO_ACTIONS = frozenset()
+
+# The IGitt actions a delivery can result in, keyed by the provider, the event
+# header and the action given in the payload, where ``None`` stands for any
+# payload action. Deliveries which aren't listed are always processed.
+WEBHOOK_EVENT_ACTIONS = {
+    (_GITHUB, 'issues', None): _ALL_ISSUE_ACTIONS,
+    (_GITHUB, 'issues', 'opened'): frozenset({IssueActions.OPENED}),
+    (_GITHUB, 'issues', 'reopened'): frozenset({IssueActions.REOPENED}),
+    (_GITHUB, 'issues', 'labeled'): frozenset({IssueActions.LABELED}),
+    (_GITHUB, 'issues', 'unlabeled'): frozenset({IssueActions.UNLABELED}),
+    (_GITHUB, 'pull_request', None): _ALL_MR_ACTIONS,
+    (_GITHUB, 'pull_request', 'opened'): frozenset({
+        MergeRequestActions.OPENED}),
+    (_GITHUB, 'pull_request', 'reopened'): frozenset({
+        MergeRequestActions.REOPENED}),
+    (_GITHUB, 'pull_request', 'closed'): frozenset({
+        MergeRequestActions.CLOSED, MergeRequestActions.MERGED}),
+    (_GITHUB, 'pull_request', 'synchronize'): frozenset({
+        MergeRequestActions.SYNCHRONIZED}),
+    (_GITHUB, 'pull_request', 'labeled'): frozenset({
+        MergeRequestActions.LABELED}),
+    (_GITHUB, 'pull_request', 'unlabeled'): frozenset({
+        MergeRequestActions.UNLABELED}),
+    (_GITHUB, 'issue_comment', None): _COMMENT_ACTIONS,
+    (_GITHUB, 'pull_request_review_comment', None): frozenset({
+        MergeRequestActions.COMMENTED}),
+    (_GITHUB, 'status', None): _PIPELINE_ACTIONS,
+    (_GITHUB, 'installation', None): frozenset(InstallationActions),
+    (_GITHUB, 'installation_repositories', None): frozenset(
+        InstallationActions),
+    **{(_GITHUB, event, None): _NO_ACTIONS
+       for event in ('check_run', 'check_suite', 'create', 'delete',
+                     'deployment', 'deployment_status', 'fork', 'gollum',
+                     'label', 'member', 'milestone', 'page_build', 'ping',
+                     'public', 'push', 'release', 'watch')},
+    (_GITLAB, 'Issue Hook', None): _ALL_ISSUE_ACTIONS,
+    (_GITLAB, 'Issue Hook', 'open'): frozenset({IssueActions.OPENED}),
+    (_GITLAB, 'Issue Hook', 'reopen'): frozenset({IssueActions.REOPENED}),
+    (_GITLAB, 'Merge Request Hook', None): _ALL_MR_ACTIONS,
+    (_GITLAB, 'Merge Request Hook', 'open'): frozenset({
+        MergeRequestActions.OPENED}),
+    (_GITLAB, 'Merge Request Hook', 'reopen'): frozenset({
+        MergeRequestActions.REOPENED}),
+    (_GITLAB, 'Merge Request Hook', 'close'): frozenset({
+        MergeRequestActions.CLOSED}),
+    (_GITLAB, 'Merge Request Hook', 'merge'): frozenset({
+        MergeRequestActions.MERGED}),
+    (_GITLAB, 'Note Hook', None): _COMMENT_ACTIONS,
+    (_GITLAB, 'Pipeline Hook', None): _PIPELINE_ACTIONS,
+    (_GITLAB, 'Build Hook', None): _PIPELINE_ACTIONS,
+    (_GITLAB, 'Job Hook', None): _PIPELINE_ACTIONS,
+    (_GITLAB, 'Push Hook', None): _NO_ACTIONS,
+    (_GITLAB, 'Tag Push Hook', None): _NO_ACTIONS,
+    (_GITLAB, 'Wiki Page Hook', None): _NO_ACTIONS,
+}
+
+
+def get_webhook_action(provider: str, webhook: dict) -> Optional[str]:
+    """
+    Returns the action given in the payload of a delivery, if any.
+    """
+    if provider == Providers.GITLAB.value:
+        webhook = webhook.get('object_attributes') or {}
+    action = webhook.get('action')
+    return action if isinstance(action, str) else None
+
+
+def may_respond(provider: str,
+                event: str,
+                action: Optional[str] = None,
+                repo: Repository = None) -> bool:
+    """
+    Checks whether any responder could fire for a delivery, without building
+    any IGitt objects. If ``repo`` is specified, only the plugins active on it
+    are considered. Deliveries which won't be responded to are counted as
+    ``webhooks.dropped``.
+
+    :param provider: The provider the delivery was received from.
+    :param event:    The event header of the delivery.
+    :param action:   The action given in the payload, if known.
+    :param repo:     The repository the delivery belongs to, if known.
+    """
+    actions = WEBHOOK_EVENT_ACTIONS.get(
+        (provider, event, action),
+        WEBHOOK_EVENT_ACTIONS.get((provider, event, None)))
+    if actions is None or ResponderRegistrar.has_responders(actions, repo):
+        return True
+
+    increment('webhooks.dropped')
+    return False
+
+
+def get_webhook_headers(meta: dict) -> dict:
+    """
+    Extracts the hoster specific ``X-*`` headers from the request metadata, so
+    that they can be stored along with the raw delivery.
+    """
+    return {key: value for key, value in meta.items()
+            if key.startswith('HTTP_X_') and
+            key not in WEBHOOK_SECRET_HEADERS}
+
+
+def get_delivery_id(provider: str, meta: dict, body: bytes) -> Optional[str]:
+    """
+    Returns an identifier for the delivery, which stays the same when a
+    delivery is sent again. GitHub sends one along with every delivery, for
+    GitLab the digest of the payload is used.
+    """
+    if provider == Providers.GITHUB.value:
+        return meta.get('HTTP_X_GITHUB_DELIVERY')
+    return sha256(body).hexdigest()
+
+
+class DeliveryDeduplicator:
+    """
+    Remembers the webhook deliveries seen within the last
+    ``WEBHOOK_DEDUPE_TTL`` seconds. Deliveries are looked up in a bounded
+    in-process store first and are then claimed in the django cache, so that
+    redeliveries reaching another process are caught as well.
+    """
+
+    def __init__(self, max_entries: int):
+        self._seen = ExpiringCache(max_entries)
+
+    def is_duplicate(self, provider: str, delivery: Optional[str]) -> bool:
+        """
+        Checks whether the delivery was seen before and remembers it
+        otherwise. Updates the ``webhooks.duplicate`` and ``webhooks.unique``
+        counters accordingly.
+        """
+        timeout = settings.WEBHOOK_DEDUPE_TTL
+        if not timeout or delivery is None:
+            return False
+
+        key = f'webhook-delivery:{provider}:{delivery}'
+        if key in self._seen or not cache.add(key, True, timeout=timeout):
+            increment('webhooks.duplicate')
+            return True
+
+        self._seen.set(key, True, timeout=timeout)
+        increment('webhooks.unique')
+        return False
+
+    def forget(self, provider: str, delivery: Optional[str]):
+        """
+        Forgets a delivery which couldn't be handled, so that its redelivery
+        isn't dropped as a duplicate.
+        """
+        if delivery is None:
+            return
+        key = f'webhook-delivery:{provider}:{delivery}'
+        self._seen.delete(key)
+        cache.delete(key)
+
+
+deliveries = DeliveryDeduplicator(settings.WEBHOOK_DEDUPE_MAX_ENTRIES)
+
+
+def log_webhook(provider: str,
+                event: str,
+                webhook: dict,
+                repo: Repository = None,
+                delivery: str = None,
+                received_at: float = None) -> Optional[WebhookEvent]:
+    """
+    Appends an accepted delivery to the webhook event log, if
+    ``WEBHOOK_EVENT_LOG`` is turned on.
+    """
+    if not settings.WEBHOOK_EVENT_LOG:
+        return None
+
+    received_at = time() if received_at is None else received_at
+    entry = WebhookEvent(
+        provider=provider,
+        event=event,
+        delivery=delivery,
+        repo_id=repo.pk if repo is not None else None,
+        received_at=datetime.fromtimestamp(received_at, timezone.utc))
+    entry.webhook = webhook
+    entry.save()
+    return entry
+
+
+def _seed_snapshots(objs: list, received_at: float):
+    """
+    Marks the IGitt objects built from a delivery as snapshots of the time the
+    delivery was received.
+    """
+    for obj in objs:
+        if hasattr(obj, 'refresh'):
+            seed_snapshot(obj, received_at)
+
+
+def handle_github_webhook(event: str,
+                          webhook: dict,
+                          received_at: float = None,
+                          delivery: str = None,
+                          log: bool = True):
+    """
+    Resolves the repository and token for a GitHub delivery and invokes the
+    responders for every action contained in it.
+
+    :param event:       The event header of the delivery.
+    :param webhook:     The payload of the delivery.
+    :param received_at: The time the delivery was received, defaults to now.
+    :param delivery:    The identifier of the delivery.
+    :param log:         Whether to append the delivery to the event log.
+    """
+    received_at = time() if received_at is None else received_at
+    repo_obj, token = None, None
+
+    # responding to regular webhook calls for registered events
+    if 'repository' in webhook:
+        repo_obj, token = resolutions.get_repository(
+            Providers.GITHUB.value, identifier=webhook['repository']['id'])
+
+    # webhook was received from an installation
+    if 'installation' in webhook:
+        token = resolutions.get_installation_token(
+            Providers.GITHUB.value, webhook['installation']['id'])
+
+    # if the webhook is irrelevant, e.g. events like `ping`, `zen` etc.
+    if token is None:  # pragma: no cover
+        return
+
+    if log:
+        log_webhook(Providers.GITHUB.value, event, webhook,
+                    repo_obj, delivery, received_at)
+
+    action = get_webhook_action(Providers.GITHUB.value, webhook)
+    if not may_respond(Providers.GITHUB.value, event, action, repo_obj):
+        return
+
+    try:
+        for action, objs in GitHub(token).handle_webhook(event, webhook):
+            _seed_snapshots(objs, received_at)
+            ResponderRegistrar.respond(action, *objs, repo=repo_obj)
+    except NotImplementedError:  # pragma: no cover
+        pass
+
+
+def handle_gitlab_webhook(event: str,
+                          webhook: dict,
+                          received_at: float = None,
+                          delivery: str = None,
+                          log: bool = True):
+    """
+    Resolves the repository for a GitLab delivery and invokes the responders
+    for every action contained in it.
+
+    :param event:       The event header of the delivery.
+    :param webhook:     The payload of the delivery.
+    :param received_at: The time the delivery was received, defaults to now.
+    :param delivery:    The identifier of the delivery.
+    :param log:         Whether to append the delivery to the event log.
+    """
+    received_at = time() if received_at is None else received_at
+
+    def _get_repo_name(data: dict):
+        # Push, Tag, Issue, Note, Wiki Page and Pipeline Hooks
+        if 'project' in data.keys():
+            return data['project']['path_with_namespace']
+
+        # Merge Request Hook
+        if 'object_attributes' in data.keys():
+            return data['object_attributes']['target']['path_with_namespace']
+
+        # Build Hook
+        if 'repository' in data.keys():
+            ssh_url = data['repository']['git_ssh_url']
+            return ssh_url[ssh_url.find(':') + 1: ssh_url.rfind('.git')]
+
+    def _get_project_id(data: dict):
+        # Push, Tag, Issue, Note, Merge Request, Wiki Page and Pipeline Hooks
+        if 'id' in data.get('project', {}):
+            return data['project']['id']
+
+        # Build Hook
+        if 'project_id' in data:
+            return data['project_id']
+
+        # Merge Request Hook, sent by older GitLab versions
+        return data.get('object_attributes', {}).get('target_project_id')
+
+    # the project id survives renames and is covered by the unique index on
+    # provider and identifier, the name is only looked up for repositories
+    # which were added without it
+    repo_obj, project_id = None, _get_project_id(webhook)
+    if project_id is not None:
+        try:
+            repo_obj, token = resolutions.get_repository(
+                Providers.GITLAB.value, identifier=project_id)
+        except Http404:
+            pass
+
+    if repo_obj is None:
+        repo_obj, token = resolutions.get_repository(
+            Providers.GITLAB.value, full_name=_get_repo_name(webhook))
+
+    if log:
+        log_webhook(Providers.GITLAB.value, event, webhook,
+                    repo_obj, delivery, received_at)
+
+    action = get_webhook_action(Providers.GITLAB.value, webhook)
+    if not may_respond(Providers.GITLAB.value, event, action, repo_obj):
+        return
+
+    try:
+        for action, objs in GitLab(token).handle_webhook(event, webhook):
+            _seed_snapshots(objs, received_at)
+            ResponderRegistrar.respond(action, *objs, repo=repo_obj)
+    except NotImplementedError:  # pragma: no cover
+        # IGitt can't handle it yet, upstream issue, no plugin needs it yet
+        pass
+
+
+WEBHOOK_HANDLERS = {
+    Providers.GITHUB.value: handle_github_webhook,
+    Providers.GITLAB.value: handle_gitlab_webhook,
+}
@@ -10,7 +10,9 @@ from IGitt.Interfaces.CommitStatus import Status
 from IGitt.Interfaces.Comment import Comment
 from IGitt.Interfaces.MergeRequest import MergeRequest
 
+from gitmate_config.enums import TaskPriority
 from gitmate_config.models import Repository
+from gitmate_hooks.generations import is_superseded
 from gitmate_hooks.utils import ResponderRegistrar
 from .models import MergeRequestModel
 
@@ -95,7 +97,8 @@ def map_comment_parts_to_keywords(ack_strs, unack_strs, body):
 
 @ResponderRegistrar.responder(
     'ack',
-    MergeRequestActions.COMMENTED
+    MergeRequestActions.COMMENTED,
+    priority=TaskPriority.INTERACTIVE
 )
 def gitmate_ack(pr: MergeRequest,
                 comment: Comment,
@@ -166,6 +169,14 @@ def add_review_status(pr: MergeRequest):
 
     hashes = []
     for commit in pr.commits:
+        if is_superseded():
+            # the statuses are set for the new head instead, the outdated one
+            # mustn't stay pending
+            head.set_status(CommitStatus(
+                Status.SUCCESS, 'Outdated. Check the new head instead.',
+                'review/gitmate/manual/pr', 'https://gitmate.io'))
+            return
+
         commit_hash = _get_commit_hash(commit)
         hashes.append(commit_hash)
 
@@ -1,7 +1,8 @@
 from IGitt.Interfaces.Actions import MergeRequestActions
 from IGitt.Interfaces.MergeRequest import MergeRequest
 
-from gitmate.utils import lock_igitt_object
+from gitmate.labels import add_labels
+from gitmate.labels import remove_labels
 from gitmate_hooks.utils import ResponderRegistrar
 
 
@@ -20,17 +21,13 @@ def mark_pending_review_or_wip_accordingly(
     progress on every changed PR accordingly. But retains work in progress
     label, if title of the pull request begins with "wip".
     """
-    with lock_igitt_object('label mr', pr):
-        labels = pr.labels
-        # Allows [wip] and WIP:
-        if not 'wip' in pr.title.lower()[:4]:
-            labels.add(pending_review_label)
-            labels.discard(wip_label)
-        else:
-            labels.add(wip_label)
-            labels.discard(pending_review_label)
-
-        pr.labels = labels
+    # Allows [wip] and WIP:
+    if not 'wip' in pr.title.lower()[:4]:
+        add_labels(pr, pending_review_label)
+        remove_labels(pr, wip_label)
+    else:
+        add_labels(pr, wip_label)
+        remove_labels(pr, pending_review_label)
 
 
 @ResponderRegistrar.responder(
@@ -54,19 +51,15 @@ def check_keywords_in_commit_messages(
     """
     if not enable_fixes_vs_closes:
         return
-    with lock_igitt_object('label mr', pr):
-        labels = pr.labels
-        for issue in pr.will_fix_issues:
-            if bug_label not in issue.labels:
-                labels.add(wip_label)
-                labels.discard(pending_review_label)
-                pr.add_comment(no_bug_label_message)
-                break
-        for issue in pr.will_close_issues:
-            if bug_label in issue.labels:
-                labels.add(wip_label)
-                labels.discard(pending_review_label)
-                pr.add_comment(bug_label_message)
-                break
-
-        pr.labels = labels
+    for issue in pr.will_fix_issues:
+        if bug_label not in issue.labels:
+            add_labels(pr, wip_label)
+            remove_labels(pr, pending_review_label)
+            pr.add_comment(no_bug_label_message)
+            break
+    for issue in pr.will_close_issues:
+        if bug_label in issue.labels:
+            add_labels(pr, wip_label)
+            remove_labels(pr, pending_review_label)
+            pr.add_comment(bug_label_message)
+            break
@@ -5,7 +5,7 @@ from IGitt.Interfaces.MergeRequest import MergeRequest
 
 import bugspots3
 
-from gitmate.utils import lock_igitt_object
+from gitmate.labels import add_labels
 from gitmate_hooks.utils import ResponderRegistrar
 
 
@@ -32,5 +32,4 @@ def label_hotspots(
     hotspot_label: str = 'Label to be added if hotspot found',
 ):
     if len(get_hotspot_files(pattern, pr).intersection(pr.affected_files)):
-        with lock_igitt_object('label mr', pr):
-            pr.labels |= {hotspot_label}
+        add_labels(pr, hotspot_label)
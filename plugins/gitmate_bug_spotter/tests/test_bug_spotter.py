@@ -60,7 +60,6 @@ class TestBugSpotter(GitmateTestCase):
     def test_risky_github(self, m_aff_files, m_clone, m_labels):
         m_aff_files.return_value = {'file1', 'file2'}
         m_clone.return_value = None, '/path/doesnt/exist/nowhere'
-        m_labels.return_value.__ior__ = MagicMock()
 
         bugspots3.Bugspots = generate_fake_bugspots({'file1'})
 
@@ -71,7 +70,7 @@ class TestBugSpotter(GitmateTestCase):
         m_labels.assert_called()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        m_labels().__ior__.assert_called_with({'review carefully!'})
+        m_labels.assert_called_with({'review carefully!'})
 
     @patch.object(GitHubIssue, 'labels', new_callable=PropertyMock)
     @patch.object(GitHubRepository, 'get_clone', autospec=True)
@@ -100,7 +99,6 @@ class TestBugSpotter(GitmateTestCase):
     def test_risky_gitlab(self, m_aff_files, m_clone, m_labels):
         m_aff_files.return_value = {'file1', 'file2'}
         m_clone.return_value = None, '/path/doesnt/exist/nowhere'
-        m_labels.return_value.__ior__ = MagicMock()
 
         bugspots3.Bugspots = generate_fake_bugspots({'file1'})
 
@@ -111,7 +109,7 @@ class TestBugSpotter(GitmateTestCase):
         m_labels.assert_called()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        m_labels().__ior__.assert_called_with({'review carefully!'})
+        m_labels.assert_called_with({'review carefully!'})
 
     @patch.object(GitLabIssue, 'labels', new_callable=PropertyMock)
     @patch.object(GitLabRepository, 'get_clone', autospec=True)
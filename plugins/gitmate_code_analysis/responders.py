@@ -10,12 +10,13 @@ from IGitt.Interfaces.Commit import Commit
 from IGitt.Interfaces.Commit import CommitStatus
 from IGitt.Interfaces.Commit import Status
 from IGitt.Interfaces.MergeRequest import MergeRequest
-from django_pglocks import advisory_lock
-
 
+from gitmate.labels import add_labels
+from gitmate.labels import remove_labels
 from gitmate.utils import run_in_container
-from gitmate.utils import lock_igitt_object
 from gitmate_config.models import Repository
+from gitmate_hooks import single_flight
+from gitmate_hooks.generations import is_superseded
 from gitmate_hooks.utils import ResponderRegistrar
 from gitmate.apps import get_settings
 from .models import AnalysisResults
@@ -27,11 +28,31 @@ def _set_status(commit: Commit, status: Status, context: str):
         Status.RUNNING: 'GitMate-2 analysis in progress...',
         Status.FAILED: 'This {} has issues!'.format(pr_or_commit),
         Status.SUCCESS: 'This {} has no issues. :)'.format(pr_or_commit),
-        Status.ERROR: 'Oops.. GitMate broke down. :('
+        Status.ERROR: 'Oops.. GitMate broke down. :(',
+        Status.CANCELED: 'Outdated, a newer push is analysed instead.'
     }.get(status), context, 'http://gitmate.io')
     commit.set_status(commit_status)
 
 
+def _finish_statuses(head: Commit, commits: set, pr_based_analysis: bool,
+                     status: Status):
+    """
+    Sets the given status for the commits which weren't analysed and the
+    head, so that they don't stay in progress.
+    """
+    if pr_based_analysis is False:
+        for commit in commits:
+            try:
+                _set_status(commit, status, 'review/gitmate/commit')
+            except RuntimeError:
+                pass
+
+    try:
+        _set_status(head, status, 'review/gitmate/pr')
+    except RuntimeError:
+        pass
+
+
 def analyse(repo, sha, clone_url, ref, coafile_location):
     """
     Spawns a docker container to run code analysis on a specified directory.
@@ -43,24 +64,28 @@ def analyse(repo, sha, clone_url, ref, coafile_location):
         coafile_location.replace('..', '').lstrip('/')
     )
 
-    with advisory_lock('{}:{}'.format(repo, sha), shared=True):
+    def lookup():
+        # Cached result available
+        result = AnalysisResults.objects.filter(
+            repo=repo, sha=sha, coafile_location=coafile_location).first()
+        return result.results if result is not None else None
+
+    def compute():
+        output = run_in_container(settings.COALA_RESULTS_IMAGE,
+                                  'python3', 'run.py', sha, clone_url, ref,
+                                  coafile_location)
         try:
-            # Cached result available
-            return AnalysisResults.objects.get(
-                repo=repo, sha=sha, coafile_location=coafile_location).results
-        except AnalysisResults.DoesNotExist:
-            output = run_in_container(settings.COALA_RESULTS_IMAGE,
-                                      'python3', 'run.py', sha, clone_url, ref,
-                                      coafile_location)
-            try:
-                results = json.loads(output)
-            except json.JSONDecodeError:  # pragma: no cover, for debugging
-                logging.error('coala image output was not JSON parsable. '
-                              'Output was: ' + output)
-                raise
-            AnalysisResults.objects.create(repo=repo, sha=sha, results=results,
-                                           coafile_location=coafile_location)
-            return results
+            results = json.loads(output)
+        except json.JSONDecodeError:  # pragma: no cover, for debugging
+            logging.error('coala image output was not JSON parsable. '
+                          'Output was: ' + output)
+            raise
+        AnalysisResults.objects.create(repo=repo, sha=sha, results=results,
+                                       coafile_location=coafile_location)
+        return results
+
+    # only one worker spawns a container for the commit, the others wait
+    return single_flight.fill('{}:{}'.format(repo, sha), lookup, compute)
 
 
 def filter_results(old_results: dict, new_results: dict):
@@ -186,7 +211,6 @@ def run_code_analysis(pr: MergeRequest, pr_based_analysis: bool = True,
 
     ref = get_ref(pr)
     pr_status = Status.SUCCESS
-    labels = pr.labels
     config = get_settings('auto_label_pending_or_wip', repo)
     wip_label = config['wip_label']
     pending_label = config['pending_review_label']
@@ -198,8 +222,16 @@ def run_code_analysis(pr: MergeRequest, pr_based_analysis: bool = True,
 
         # Run coala only on head.
         if pr_based_analysis is True:
+            if is_superseded():
+                _finish_statuses(HEAD, COMMITS, pr_based_analysis,
+                                 Status.CANCELED)
+                return
             new_results = analyse(
                 repo, HEAD.sha, igitt_repo.clone_url, ref, coafile_location)
+            if is_superseded():
+                _finish_statuses(HEAD, COMMITS, pr_based_analysis,
+                                 Status.CANCELED)
+                return
 
             filtered_results = filter_results(old_results, new_results)
             add_comment(HEAD, filtered_results, mr_num=pr.number)
@@ -207,11 +239,16 @@ def run_code_analysis(pr: MergeRequest, pr_based_analysis: bool = True,
             # set pr status as failed if any results are found
             if any(s_results for _, s_results in filtered_results.items()):
                 pr_status = Status.FAILED
-                labels.add(wip_label)
-                labels.discard(pending_label)
+                add_labels(pr, wip_label)
+                remove_labels(pr, pending_label)
 
         else:  # Run coala per commit
             for commit in COMMITS:
+                if is_superseded():
+                    # the remaining commits are analysed for the new head
+                    _finish_statuses(HEAD, COMMITS - ANALYZED_COMMITS,
+                                     pr_based_analysis, Status.CANCELED)
+                    return
                 new_results = analyse(
                     repo, commit.sha, igitt_repo.clone_url,
                     ref, coafile_location)
@@ -225,8 +262,8 @@ def run_code_analysis(pr: MergeRequest, pr_based_analysis: bool = True,
                 if any(s_results for _, s_results in filtered_results.items()):
                     pr_status = Status.FAILED
                     status = Status.FAILED
-                    labels.add(wip_label)
-                    labels.discard(pending_label)
+                    add_labels(pr, wip_label)
+                    remove_labels(pr, pending_label)
                 else:
                     status = Status.SUCCESS
 
@@ -234,25 +271,14 @@ def run_code_analysis(pr: MergeRequest, pr_based_analysis: bool = True,
                 ANALYZED_COMMITS.add(commit)
 
         _set_status(pr.head, pr_status, 'review/gitmate/pr')
-        with lock_igitt_object('label mr', pr):
-            pr.labels = labels
 
     except BaseException as exc:  # pragma: no cover
         # Attempt to set ``Status.ERROR`` for all commits that were not
         # analyzed when a new push event occured. However, if these commits
         # continue to be a part of this merge request, the new task would
         # process it properly.
-        if pr_based_analysis is False:
-            for commit in COMMITS - ANALYZED_COMMITS:
-                try:
-                    _set_status(commit, Status.ERROR, 'review/gitmate/commit')
-                except RuntimeError:
-                    pass
-
-        try:
-            _set_status(HEAD, Status.ERROR, 'review/gitmate/pr')
-        except RuntimeError:
-            pass
+        _finish_statuses(HEAD, COMMITS - ANALYZED_COMMITS, pr_based_analysis,
+                         Status.ERROR)
         # sending info to the raven logger interface
         logger = logging.getLogger(__name__)
         logger.error(exc, exc_info=True)
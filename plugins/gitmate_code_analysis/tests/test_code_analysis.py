@@ -11,6 +11,7 @@ from IGitt.GitHub.GitHubCommit import GitHubCommit
 from IGitt.GitHub.GitHubMergeRequest import GitHubMergeRequest
 from IGitt.GitLab.GitLabCommit import GitLabCommit
 from IGitt.GitLab.GitLabMergeRequest import GitLabMergeRequest
+from IGitt.Interfaces.CommitStatus import Status
 from rest_framework.status import HTTP_200_OK
 
 
@@ -130,11 +131,30 @@ class TestCodeAnalysis(GitmateTestCase):
             'pull_request', self.github_data)
         self.assertEqual(response.status_code, HTTP_200_OK)
         comment_mock.assert_not_called()
-        labels_mock.assert_called_with({'process/pending_review'})
+        # the labels are only read, if at all
+        for args, _ in labels_mock.call_args_list:
+            self.assertEqual(args, ())
 
     def test_pr_analysis_no_issues_pr_based_github(self, *args):
         return self.test_pr_analysis_no_issues_github(pr_based=True)
 
+    @patch.object(GitHubCommit, 'set_status')
+    @patch('plugins.gitmate_code_analysis.responders.analyse',
+           return_value={})
+    @patch('plugins.gitmate_code_analysis.responders.is_superseded',
+           return_value=True)
+    def test_pr_analysis_superseded_github(self, _, analyse_mock,
+                                           set_status_mock, __):
+        response = self.simulate_github_webhook_call(
+            'pull_request', self.github_data)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        # the head doesn't stay in progress when a newer push took over
+        analyse_mock.assert_called_once()
+        statuses = [args[0].status for args, _ in
+                    set_status_mock.call_args_list]
+        self.assertEqual(statuses, [Status.RUNNING, Status.CANCELED])
+
     @patch.object(GitHubCommit, 'comment')
     @patch.object(GitHubMergeRequest, 'labels', new_callable=PropertyMock)
     def test_pr_analysis_issues_github(self, labels_mock, comment_mock, _):
@@ -268,7 +288,9 @@ class TestCodeAnalysis(GitmateTestCase):
             'Merge Request Hook', self.gitlab_data)
         self.assertEqual(response.status_code, HTTP_200_OK)
         comment_mock.assert_not_called()
-        labels_mock.assert_called_with({'process/pending_review'})
+        # the labels are only read, if at all
+        for args, _ in labels_mock.call_args_list:
+            self.assertEqual(args, ())
 
     def test_pr_analysis_no_issues_pr_based_gitlab(self, *args):
         return self.test_pr_analysis_no_issues_gitlab(pr_based=True)
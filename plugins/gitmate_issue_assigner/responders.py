@@ -9,6 +9,7 @@ from IGitt.Interfaces import IssueStates
 from IGitt.Interfaces.Comment import Comment
 
 from gitmate.utils import lock_igitt_object
+from gitmate_config.enums import TaskPriority
 from gitmate_hooks.utils import ResponderRegistrar
 from gitmate_config.models import Repository
 
@@ -115,7 +116,8 @@ def assign_issue_on_pr_commit_mention(
             issue.assign(pr.author.username)
 
 
-@ResponderRegistrar.responder('issue_assigner', IssueActions.COMMENTED)
+@ResponderRegistrar.responder('issue_assigner', IssueActions.COMMENTED,
+                              priority=TaskPriority.INTERACTIVE)
 def assign_or_unassign_issue_per_request(
     issue: Issue,
     comment: Comment,
@@ -6,6 +6,9 @@ from IGitt.Interfaces.Issue import Issue
 from IGitt.Interfaces.MergeRequest import MergeRequest
 
 from gitmate_config.models import Repository
+from gitmate.labels import add_labels
+from gitmate.labels import remove_labels
+from gitmate.labels import retain_labels
 from gitmate.utils import lock_igitt_object
 from gitmate_hooks.utils import ResponderRegistrar
 from gitmate.apps import get_settings
@@ -26,21 +29,20 @@ def sync_updated_pr_with_issue(pr: MergeRequest,
         repo=repo, number=pr.number)[0]
     data = defaultdict(dict)
 
-    with lock_igitt_object('label mr', pr):
-        temp_labels = pr.labels
-        settings = get_settings('pr_size_labeller', repo)
-        size_scheme = settings['size_scheme']
-        ignore = {size_scheme.format(size=letter)
-                  for letter in ['S', 'XS', 'M', 'L', 'XL', 'XXL']}
-        settings = get_settings('auto_label_pending_or_wip', repo)
-        ignore.add(settings['wip_label'])
-        ignore.add(settings['pending_review_label'])
-        settings = get_settings('approver', repo)
-        ignore.add(settings['approved_label'])
-        labels = ignore & temp_labels
-        for issue in issues:
-            labels |= issue.labels
-        pr.labels = labels
+    settings = get_settings('pr_size_labeller', repo)
+    size_scheme = settings['size_scheme']
+    ignore = {size_scheme.format(size=letter)
+              for letter in ['S', 'XS', 'M', 'L', 'XL', 'XXL']}
+    settings = get_settings('auto_label_pending_or_wip', repo)
+    ignore.add(settings['wip_label'])
+    ignore.add(settings['pending_review_label'])
+    settings = get_settings('approver', repo)
+    ignore.add(settings['approved_label'])
+    labels = set()
+    for issue in issues:
+        labels |= issue.labels
+    retain_labels(pr, lambda label: label in ignore or label in labels)
+    add_labels(pr, *labels)
 
     if sync_assignees:
         with lock_igitt_object('assign mr', pr):
@@ -58,16 +60,14 @@ def sync_updated_pr_with_issue(pr: MergeRequest,
 def sync_label_add_from_issue_with_pr(issue: Issue, label: str):
     for pr_object in MergeRequestModel.find_mrs_with_issue(issue):
         pr = pr_object.igitt_pr
-        with lock_igitt_object('label mr', pr):
-            pr.labels |= {label}
+        add_labels(pr, label)
 
 
 @ResponderRegistrar.responder('issue_pr_sync', IssueActions.UNLABELED)
 def sync_label_remove_from_issue_with_pr(issue: Issue, label: str):
     for pr_object in MergeRequestModel.find_mrs_with_issue(issue):
         pr = pr_object.igitt_pr
-        with lock_igitt_object('label mr', pr):
-            pr.labels -= {label}
+        remove_labels(pr, label)
 
 
 @ResponderRegistrar.responder(
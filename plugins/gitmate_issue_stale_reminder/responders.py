@@ -9,11 +9,13 @@ from IGitt.Interfaces.MergeRequest import MergeRequest
 from IGitt.Interfaces.Repository import Repository
 
 from gitmate.utils import lock_igitt_object
+from gitmate_config.enums import TaskPriority
 from gitmate_hooks.utils import ResponderRegistrar
 
 
 @ResponderRegistrar.scheduled_responder(
-    'issue_stale_reminder', crontab(minute='0', hour='0,12'), is_active=True)
+    'issue_stale_reminder', crontab(minute='0', hour='0,12'),
+    priority=TaskPriority.HOUSEKEEPING, is_active=True)
 def add_stale_label_to_issues(
         repo: Repository,
         issue_expire_limit: int = 'Expiry limit in no. of days for issues',
@@ -52,7 +54,8 @@ def add_stale_label_to_issues(
     IssueActions.ATTRIBUTES_CHANGED,
     MergeRequestActions.OPENED,
     MergeRequestActions.ATTRIBUTES_CHANGED,
-    MergeRequestActions.SYNCHRONIZED
+    MergeRequestActions.SYNCHRONIZED,
+    priority=TaskPriority.HOUSEKEEPING
 )
 def remove_stale_label_from_issues(
         entity: (Issue, MergeRequest),
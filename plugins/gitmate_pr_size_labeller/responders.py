@@ -1,7 +1,8 @@
 from IGitt.Interfaces.Actions import MergeRequestActions
 from IGitt.Interfaces.MergeRequest import MergeRequest
 
-from gitmate.utils import lock_igitt_object
+from gitmate.labels import add_labels
+from gitmate.labels import remove_labels
 from gitmate_hooks.utils import ResponderRegistrar
 
 
@@ -18,29 +19,28 @@ def add_labels_based_on_size(pr: MergeRequest,
     advance.
     """
     sizes = {'XXL', 'XL', 'L', 'M', 'S', 'XS'}
-    with lock_igitt_object('label mr', pr):
-        labels = pr.labels.difference({
-            size_scheme.format(size=size) for size in sizes
-        })
+    lines_added, lines_deleted = pr.diffstat
+    commit_score = 4 * len(pr.commits)
+    file_score = 4 * len(pr.affected_files)
 
-        lines_added, lines_deleted = pr.diffstat
-        commit_score = 4 * len(pr.commits)
-        file_score = 4 * len(pr.affected_files)
+    if commit_score + file_score + lines_added + lines_deleted <= 100:
+        size = 'XS'
 
-        if commit_score + file_score + lines_added + lines_deleted <= 100:
-            pr.labels = {size_scheme.format(size='XS')}.union(labels)
+    elif commit_score + file_score + lines_added + lines_deleted <= 250:
+        size = 'S'
 
-        elif commit_score + file_score + lines_added + lines_deleted <= 250:
-            pr.labels = {size_scheme.format(size='S')}.union(labels)
+    elif commit_score + file_score + lines_added + lines_deleted <= 500:
+        size = 'M'
 
-        elif commit_score + file_score + lines_added + lines_deleted <= 500:
-            pr.labels = {size_scheme.format(size='M')}.union(labels)
+    elif commit_score + file_score + lines_added + lines_deleted <= 1000:
+        size = 'L'
 
-        elif commit_score + file_score + lines_added + lines_deleted <= 1000:
-            pr.labels = {size_scheme.format(size='L')}.union(labels)
+    elif commit_score + file_score + lines_added + lines_deleted <= 1500:
+        size = 'XL'
 
-        elif commit_score + file_score + lines_added + lines_deleted <= 1500:
-            pr.labels = {size_scheme.format(size='XL')}.union(labels)
+    else:
+        size = 'XXL'
 
-        else:
-            pr.labels = {size_scheme.format(size='XXL')}.union(labels)
+    remove_labels(pr, *(size_scheme.format(size=other)
+                        for other in sizes - {size}))
+    add_labels(pr, size_scheme.format(size=size))
@@ -5,12 +5,15 @@ from IGitt.Interfaces.Actions import MergeRequestActions
 from IGitt.Interfaces.MergeRequest import MergeRequest, MergeRequestStates
 from IGitt.Interfaces.Repository import Repository
 
-from gitmate.utils import lock_igitt_object
+from gitmate.labels import add_labels
+from gitmate.labels import remove_labels
+from gitmate_config.enums import TaskPriority
 from gitmate_hooks.utils import ResponderRegistrar
 
 
 @ResponderRegistrar.scheduled_responder(
-    'pr_stale_reminder', crontab(minute='0', hour='6,18'), is_active=True)
+    'pr_stale_reminder', crontab(minute='0', hour='6,18'),
+    priority=TaskPriority.HOUSEKEEPING, is_active=True)
 def add_stale_label_to_merge_requests(
         repo: Repository,
         pr_expire_limit: int = 'Expiry limit in no. of day for pull requests',
@@ -26,9 +29,7 @@ def add_stale_label_to_merge_requests(
             updated_before=minimum_pr_update_time,
             state=MergeRequestStates.OPEN,
     ):
-        with lock_igitt_object('label mr', pr):
-            if stale_label not in pr.labels:
-                pr.labels = pr.labels | {stale_label}
+        add_labels(pr, stale_label)
 
 
 @ResponderRegistrar.responder(
@@ -39,7 +40,8 @@ def add_stale_label_to_merge_requests(
     MergeRequestActions.SYNCHRONIZED,
     MergeRequestActions.COMMENTED,
     MergeRequestActions.ATTRIBUTES_CHANGED,
-    MergeRequestActions.MERGED
+    MergeRequestActions.MERGED,
+    priority=TaskPriority.HOUSEKEEPING
 )
 def remove_stale_label_from_merge_requests(
         pr: MergeRequest,
@@ -54,5 +56,4 @@ def remove_stale_label_from_merge_requests(
         # the label was ``stale_label``
         return
 
-    with lock_igitt_object('label mr', pr):
-        pr.labels = pr.labels - {stale_label}
+    remove_labels(pr, stale_label)
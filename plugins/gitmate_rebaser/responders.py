@@ -8,6 +8,7 @@ from IGitt.Interfaces.Comment import Comment
 from IGitt.Interfaces.MergeRequest import MergeRequest
 
 from gitmate.utils import run_in_container
+from gitmate_config.enums import TaskPriority
 from gitmate_config.models import Repository
 from gitmate_hooks.utils import ResponderRegistrar
 
@@ -55,7 +56,8 @@ def get_matched_command(body: str, username: str):
     return None, None, None
 
 
-@ResponderRegistrar.responder('rebaser', MergeRequestActions.COMMENTED)
+@ResponderRegistrar.responder('rebaser', MergeRequestActions.COMMENTED,
+                              priority=TaskPriority.INTERACTIVE)
 def apply_command_on_merge_request(
         pr: MergeRequest, comment: Comment,
         enable_rebase: bool = False,
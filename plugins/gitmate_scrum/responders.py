@@ -7,7 +7,8 @@ from IGitt.Interfaces.Actions import MergeRequestActions
 from IGitt.Interfaces.Issue import Issue
 from IGitt.Interfaces.MergeRequest import MergeRequest
 
-
+from gitmate.labels import add_labels
+from gitmate.labels import retain_labels
 from gitmate_hooks.utils import ResponderRegistrar
 
 
@@ -16,12 +17,10 @@ def mark_issue_ongoing(issue: Issue,
                        usernames: Set[str],
                        operating_namespace: str = 'dev',
                        ongoing_label: str = 'ongoing'):
-    labels = issue.labels
     ns_regex = re.compile('^{}/.*$'.format(operating_namespace))
     if bool(usernames):
-        labels = {label for label in labels if not ns_regex.match(label)}
-        labels |= {'{}/{}'.format(operating_namespace, ongoing_label)}
-    issue.labels = labels
+        retain_labels(issue, lambda label: not ns_regex.match(label))
+        add_labels(issue, '{}/{}'.format(operating_namespace, ongoing_label))
 
 
 @ResponderRegistrar.responder('scrum',
@@ -33,13 +32,11 @@ def mark_as_review_or_acceptance(pr: MergeRequest,
                                  operating_namespace: str = 'dev',
                                  review_label: str = 'code-review',
                                  acceptance_label: str = 'acceptance-QA'):
-    labels = pr.labels
     ns_regex = re.compile('^{}/.*$'.format(operating_namespace))
     qa_regex = re.compile(
         r'QA:\s+(?:#|https?:\/\/\S+\/issues\/)[1-9]\d*', re.IGNORECASE)
     new_state = (acceptance_label if pr.state == MergeRequestStates.MERGED
                  else review_label)
     if any(qa_regex.search(commit.message) for commit in pr.commits):
-        labels = {label for label in labels if not ns_regex.match(label)}
-        labels |= {'{}/{}'.format(operating_namespace, new_state)}
-    pr.labels = labels
+        retain_labels(pr, lambda label: not ns_regex.match(label))
+        add_labels(pr, '{}/{}'.format(operating_namespace, new_state))